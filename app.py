@@ -6,16 +6,24 @@ import streamlit as st
 import streamlit.components.v1 as components
 import cv2
 import numpy as np
-from PIL import Image
+import os
 import time
-import plotly.graph_objects as go
+import uuid
 
 try:
     from src.webcam   import get_faces
-    from src.predictor import predict_face
-    from src.smoothing import EmotionSmoother
-    from src.voice     import speak, reset_last_emotion
-    from src.config    import EMOTIONS, EMOTIONS_HI, SYSTEM_NAME, TAGLINE
+    from src.predictor import predict_faces, load_model_async, model_status, get_engine
+    from src.live_engine import LiveEngine
+    from src.voice     import speak
+    from src.render_scheduler import RenderScheduler
+    from src.smoothing import TrackSmoother
+    from src.transport import FrameEncoder
+    from src.recording import SessionRecording, list_recordings
+    from src.history   import EmotionHistory
+    from src.analytics import SessionAnalytics
+    from src.metrics   import metrics, get_metrics_exporter
+    from src.config    import EMOTIONS, EMOTIONS_HI, SYSTEM_NAME, TAGLINE, RENDER_RATES
+    from src.config    import CAMERA_RESOLUTIONS, VIDEO_SAMPLE_FPS, PIPELINE_MODE
 except ImportError as e:
     st.error(f"Import error: {e}")
     st.stop()
@@ -319,35 +327,6 @@ components.html("""
 </script>
 """, height=0)
 
-# ──────────────────────────────────────────────────────────────
-# 🧭 TOP NAVBAR
-# ──────────────────────────────────────────────────────────────
-st.markdown(f"""
-<div class="navbar">
-  <div class="nav-left">
-    <div class="nav-logo-box">
-      <i data-lucide="brain-circuit" style="stroke:#fff; width:20px; height:20px;"></i>
-    </div>
-    <div>
-      <div class="nav-logo">{SYSTEM_NAME}</div>
-      <div class="nav-tagline">AI JO DIL KI BAAT JAAN LE</div>
-    </div>
-  </div>
-  
-  <div class="status-pill">
-    <div class="status-dot"></div>
-    Camera Ready
-  </div>
-
-  <div style="display:flex; align-items:center; gap:15px; opacity:0.8;">
-    <i data-lucide="moon" style="width:18px; height:18px; cursor:pointer;"></i>
-    <div style="width:32px; height:32px; background:var(--accent); border-radius:8px; display:flex; align-items:center; justify-content:center; cursor:pointer;">
-      <i data-lucide="mic" style="stroke:#000; width:18px; height:18px;"></i>
-    </div>
-  </div>
-</div>
-""", unsafe_allow_html=True)
-
 # ──────────────────────────────────────────────────────────────
 # Sidebar (Control Panel)
 # ──────────────────────────────────────────────────────────────
@@ -355,6 +334,9 @@ with st.sidebar:
     st.markdown('<div class="sb-header">AI CONTROL PANEL</div>', unsafe_allow_html=True)
 
     voice_on = st.toggle("Voice Feedback", value=True, key="voice")
+    record_on = st.toggle("Record Session", value=False, key="record")
+    # Replay never loads the model; open the app with ?mode=replay to skip it from the start
+    replay_mode = st.toggle("Replay Mode", value=st.query_params.get("mode") == "replay", key="replay")
     
     st.markdown('<br>', unsafe_allow_html=True)
     st.markdown('<div class="sb-lbl">Emotion Sensitivity</div>', unsafe_allow_html=True)
@@ -366,25 +348,83 @@ with st.sidebar:
 
     st.markdown('<br>', unsafe_allow_html=True)
     st.markdown('<div class="sb-lbl">Webcam Resolution</div>', unsafe_allow_html=True)
-    res = st.selectbox("", ["1080p HD", "720p SD", "4k Ultra"], label_visibility="collapsed")
+    res = st.selectbox("", list(CAMERA_RESOLUTIONS), label_visibility="collapsed")
 
     st.markdown('<div style="height:100px;"></div>', unsafe_allow_html=True)
     st.markdown('<div class="sb-sep" style="margin-bottom:20px;"></div>', unsafe_allow_html=True)
     adv_analytics = st.toggle("Advanced Analytics", value=True)
 
-# ──────────────────────────────────────────────────────────────
-# Session State
-# ──────────────────────────────────────────────────────────────
+# Model loads and warms up in the background so the UI paints immediately.
+# In "processes" mode only the inference process loads it.
+if not replay_mode and PIPELINE_MODE != "processes":
+    load_model_async()
+
 # ──────────────────────────────────────────────────────────────
 # Session State
 # ──────────────────────────────────────────────────────────────
 if "n_detections"     not in st.session_state: st.session_state.n_detections     = 0
 if "n_frames"         not in st.session_state: st.session_state.n_frames         = 0
 if "session_start"    not in st.session_state: st.session_state.session_start    = time.time()
-if "emotion_history"  not in st.session_state: st.session_state.emotion_history  = []
+if "emotion_history"  not in st.session_state: st.session_state.emotion_history  = EmotionHistory()
+if "session_id"       not in st.session_state: st.session_state.session_id       = uuid.uuid4().hex[:8]
 if "stability_score"  not in st.session_state: st.session_state.stability_score  = 92
+if "analytics"        not in st.session_state: st.session_state.analytics        = SessionAnalytics()
+
+# Every browser session shares this process; its timings, gauges and providers stay in its own scope
+metrics.bind(metrics.scope(st.session_state.session_id))
+
+# Camera, pipeline, smoother and voice outlive reruns; settings are applied in place
+if "live" not in st.session_state: st.session_state.live = LiveEngine(session=st.session_state.session_id)
+live = st.session_state.live
+live.configure(sensitivity=sensitivity, resolution=CAMERA_RESOLUTIONS[res], voice=voice_on, record=record_on)
+smoother = live.smoother
+
+# ──────────────────────────────────────────────────────────────
+# 🧭 TOP NAVBAR
+# ──────────────────────────────────────────────────────────────
+MODEL_STATUS_PILL = {
+    "idle":    ("Model Idle",       "#94A3B8"),
+    "loading": ("Model Warming Up", "#FBBF24"),
+    "ready":   ("Camera Ready",     "#22D3EE"),
+    "missing": ("Model Missing",    "#F87171"),
+    "error":   ("Model Error",      "#F87171"),
+}
+
+def render_navbar():
+    # In "processes" mode this is the inference process's model; the UI never loads one
+    label, color = MODEL_STATUS_PILL[live.model_status()]
+    st.markdown(f"""
+<div class="navbar">
+  <div class="nav-left">
+    <div class="nav-logo-box">
+      <i data-lucide="brain-circuit" style="stroke:#fff; width:20px; height:20px;"></i>
+    </div>
+    <div>
+      <div class="nav-logo">{SYSTEM_NAME}</div>
+      <div class="nav-tagline">AI JO DIL KI BAAT JAAN LE</div>
+    </div>
+  </div>
+  
+  <div class="status-pill" style="color:{color}; border-color:{color}55; background:{color}22;">
+    <div class="status-dot" style="background:{color}; box-shadow:0 0 10px {color};"></div>
+    {label}
+  </div>
+
+  <div style="display:flex; align-items:center; gap:15px; opacity:0.8;">
+    <i data-lucide="moon" style="width:18px; height:18px; cursor:pointer;"></i>
+    <div style="width:32px; height:32px; background:var(--accent); border-radius:8px; display:flex; align-items:center; justify-content:center; cursor:pointer;">
+      <i data-lucide="mic" style="stroke:#000; width:18px; height:18px;"></i>
+    </div>
+  </div>
+</div>
+    """, unsafe_allow_html=True)
+
+# Poll the readiness pill only while the model is still warming up
+if live.model_status() == "loading" and hasattr(st, "fragment"):
+    st.fragment(run_every=1.0)(render_navbar)()
+else:
+    render_navbar()
 
-smoother = EmotionSmoother(size=sensitivity)
 
 # ──────────────────────────────────────────────────────────────
 # 🎨 DASHBOARD RENDERERS
@@ -392,7 +432,7 @@ smoother = EmotionSmoother(size=sensitivity)
 
 def render_stability(score, status="High Stability"):
     offset = 251.2 - (251.2 * score / 100)
-    st.markdown(f"""
+    stability_slot.markdown(f"""
     <div style="display:flex; align-items:center; gap:20px;">
         <div class="gauge-container">
             <svg class="gauge-svg" viewBox="0 0 100 100">
@@ -445,9 +485,10 @@ def render_insight(emotion):
     </div>
     """, unsafe_allow_html=True)
 
-def render_history_chart():
-    history = st.session_state.emotion_history[-50:] if st.session_state.emotion_history else []
-    if not history: return
+def render_history_chart(analytics, now):
+    import plotly.graph_objects as go
+    history = analytics.timeline(now)
+    if not any(v is not None for v in history): return
     
     fig = go.Figure(go.Scatter(
         y=history, mode='lines', 
@@ -463,12 +504,44 @@ def render_history_chart():
     )
     history_slot.plotly_chart(fig, use_container_width=True, config={"displayModeBar": False})
 
-def render_freq_gauge():
-    val = 85 # Placeholder or logic based on detections
+def render_hud(hud):
+    fps = f"{hud['fps']:.1f}" if hud["fps"] else "—"
+    lat = f"{hud['latency_ms']:.0f}ms" if hud["latency_ms"] is not None else "—"
+    hud_slot.markdown(f"""
+    <div class="scanner-container">
+        <div class="rec-label">
+            <div class="rec-dot"></div> REC
+        </div>
+        <div class="scanner-hud">
+            <span>FPS: {fps}</span>
+            <span>RES: {hud['res']}</span>
+            <span>LATENCY: {lat}</span>
+        </div>
+    """, unsafe_allow_html=True)
+
+STAGE_LABELS = [("capture", "cap"), ("gray", "gray"), ("detect", "det"), ("preprocess", "pre"),
+                ("inference", "inf"), ("smooth", "smooth"), ("annotate", "ann"), ("encode", "enc"), ("render", "ui")]
+
+def render_transport(stats, stages):
+    timings = " · ".join(f"{short} {stages[k]['p50_ms']:.1f}" for k, short in STAGE_LABELS
+                         if stages.get(k, {}).get("count"))
+    transport_slot.markdown(f"""
+    <div style="font-family:monospace; font-size:10px; opacity:0.5; margin-top:6px;">
+        {stats['format'].upper()} Q{stats['quality']} · {stats['bytes_per_frame'] / 1024:.1f} KB/frame · encode {stats['encode_ms']:.2f} ms<br>
+        p50 ms: {timings}
+    </div>
+    """, unsafe_allow_html=True)
+
+def render_freq_gauge(analytics, now):
+    import plotly.graph_objects as go
+    # Share of the last minute's frames with a face in view
+    val = analytics.presence(now)
     fig = go.Figure(go.Indicator(
         mode = "gauge+number",
         value = val,
-        number = {'suffix': "%", 'font': {'color': 'white', 'size': 30}},
+        number = {'suffix': "%", 'valueformat': ".0f", 'font': {'color': 'white', 'size': 30}},
+        title = {'text': f"{analytics.detections_per_minute(now):.0f} detections/min",
+                 'font': {'color': '#94A3B8', 'size': 11}},
         gauge = {
             'axis': {'range': [0, 100], 'visible': False},
             'bar': {'color': "#22C55E"},
@@ -482,10 +555,66 @@ def render_freq_gauge():
     )
     freq_slot.plotly_chart(fig, use_container_width=True, config={"displayModeBar": False})
 
+def render_summary(analytics, now):
+    summary = analytics.summary(now)
+    dwell = "".join(f"""
+        <div class="stat-header" style="font-size:11px;">
+            <span style="color:{EMOTION_COLORS.get(emo, '#22D3EE')};">{emo}</span>
+            <span>{secs:.0f}s · {pct:.0f}%</span>
+        </div>""" for emo, secs, pct in summary["dwell"][:4])
+    shifts = " · ".join(f"{a} → {b} ×{n}" for a, b, n in summary["transitions"]) or "—"
+    summary_slot.markdown(f"""
+    <div class="glass-card" style="padding:14px;">
+        <div class="sb-header">SESSION SUMMARY</div>
+        <div style="font-size:12px; opacity:0.7; margin-bottom:8px;">
+            {summary['elapsed_s'] / 60:.1f} min · {summary['tracks']} faces · {summary['detections']} detections
+            · {summary['per_minute']:.0f}/min
+        </div>
+        <div style="font-size:14px; font-weight:700; color:white; margin-bottom:6px;">
+            Dominant: {summary['dominant'] or '—'}
+        </div>
+        {dwell}
+        <div style="font-size:11px; opacity:0.5; margin-top:8px;">
+            {summary['switches']} shifts · {shifts}
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+def render_video_report(report):
+    import plotly.graph_objects as go
+    s = report.stats
+    st.markdown(f"""
+    <div style="font-family:monospace; font-size:12px; opacity:0.7; margin:8px 0;">
+        {s['duration_s']:.1f}s of video · {s['samples']} frames sampled · {s['faces']} faces · {s['tracks']} tracks ·
+        analysed in {s['wall_s']:.1f}s ({s['realtime_factor']:.1f}× real time)
+    </div>
+    """, unsafe_allow_html=True)
+    rows = [r for r in report.timeline if r[2]]
+    if not rows:
+        st.warning("No faces detected in this video.")
+        return
+    seconds = [r[0] for r in rows]
+    fig = go.Figure()
+    for i, emo in enumerate(EMOTIONS):
+        fig.add_trace(go.Scatter(
+            x=seconds, y=[r[4 + i] for r in rows], name=emo, mode='lines',
+            stackgroup='one', line=dict(width=0.5, color=EMOTION_COLORS.get(emo, "#22D3EE"))
+        ))
+    fig.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+        height=260, margin=dict(l=0, r=0, t=10, b=0),
+        xaxis=dict(title="seconds", color="#94A3B8"), yaxis=dict(visible=False),
+        legend=dict(orientation="h", font=dict(color="#94A3B8"))
+    )
+    st.plotly_chart(fig, use_container_width=True, config={"displayModeBar": False})
+    d_left, d_right = st.columns(2)
+    d_left.download_button("Timeline CSV", report.timeline_csv(), "emotion_timeline.csv", "text/csv")
+    d_right.download_button("Per-track CSV", report.tracks_csv(), "emotion_tracks.csv", "text/csv")
+
 # ──────────────────────────────────────────────────────────────
 # 🧩 MAIN LAYOUT
 # ──────────────────────────────────────────────────────────────
-tab1, tab2 = st.tabs(["Live Emotion Scan", "Image Emotion Analysis"])
+tab1, tab2, tab3 = st.tabs(["Live Emotion Scan", "Image Emotion Analysis", "Video Emotion Analysis"])
 
 with tab1:
     left, right = st.columns([2.2, 1], gap="medium")
@@ -493,21 +622,13 @@ with tab1:
     with left:
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
         
-        # Scanner HUD Container
-        st.markdown("""
-        <div class="scanner-container">
-            <div class="rec-label">
-                <div class="rec-dot"></div> REC
-            </div>
-            <div class="scanner-hud">
-                <span>FPS: 59.94</span>
-                <span>RES: 1080p</span>
-                <span>LATENCY: 12ms</span>
-            </div>
-        """, unsafe_allow_html=True)
+        # Scanner HUD Container (values come from src.metrics while the engine runs)
+        hud_slot = st.empty()
+        render_hud(metrics.hud())
         
         frame_slot = st.empty()
         st.markdown('</div>', unsafe_allow_html=True) # close scanner-container
+        transport_slot = st.empty()
         
         st.markdown('<br>', unsafe_allow_html=True)
         
@@ -542,90 +663,266 @@ with tab1:
         st.markdown('<div style="margin-top:20px;"></div>', unsafe_allow_html=True)
         insight_slot = st.empty()
 
+        # Session Summary (dwell time, shifts, rate)
+        st.markdown('<div style="margin-top:20px;"></div>', unsafe_allow_html=True)
+        summary_slot = st.empty()
+
 with tab2:
     st.markdown('<div class="glass-card">', unsafe_allow_html=True)
     st.markdown('<div class="card-title">IMAGE EMOTION ENGINE</div>', unsafe_allow_html=True)
     uploaded = st.file_uploader("", type=["jpg","png","jpeg"], label_visibility="collapsed", key="uploader")
     if uploaded:
+        from PIL import Image
         pil_img    = Image.open(uploaded)
         upload_arr = np.array(pil_img)
         upload_bgr = cv2.cvtColor(upload_arr, cv2.COLOR_RGB2BGR)
         st.image(pil_img, use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
+with tab3:
+    st.markdown('<div class="glass-card">', unsafe_allow_html=True)
+    st.markdown('<div class="card-title">VIDEO EMOTION ENGINE</div>', unsafe_allow_html=True)
+    video_file = st.file_uploader("", type=["mp4", "avi", "mov", "mkv", "webm"],
+                                  label_visibility="collapsed", key="video_uploader")
+    video_fps = st.slider("Frames analysed per second of video", 1.0, 30.0, float(VIDEO_SAMPLE_FPS), 1.0)
+    if video_file and st.button("Analyze Video", key="analyze_video"):
+        import tempfile
+        from src.video_analyze import analyze_video
+        # OpenCV needs a real file to seek in
+        with tempfile.NamedTemporaryFile(suffix=os.path.splitext(video_file.name)[1], delete=False) as tmp:
+            tmp.write(video_file.getbuffer())
+        progress_bar = st.progress(0.0, text="Analyzing video…")
+        try:
+            st.session_state.video_report = analyze_video(
+                tmp.name, sample_fps=video_fps,
+                progress=lambda done, total: progress_bar.progress(
+                    min(1.0, done / total) if total else 0.0, text=f"Analyzing video… {done}/{total} frames"))
+        except (IOError, RuntimeError) as e:
+            st.error(str(e))
+        finally:
+            progress_bar.empty()
+            os.remove(tmp.name)
+    if st.session_state.get("video_report") is not None:
+        render_video_report(st.session_state.video_report)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+# ──────────────────────────────────────────────────────────────
+# Dashboard Feed (shared by the live loop and replay)
+# ──────────────────────────────────────────────────────────────
+def make_scheduler():
+    scheduler = RenderScheduler()
+    scheduler.register("bars",      render_emotion_bars,  RENDER_RATES["bars"],
+                       key=lambda p: tuple(np.round(np.asarray(p) * 1000).astype(int)))
+    scheduler.register("stability", render_stability,     RENDER_RATES["stability"], key=lambda s: int(s))
+    scheduler.register("insight",   render_insight,       RENDER_RATES["insight"])
+    scheduler.register("history",   render_history_chart, RENDER_RATES["history"],
+                       key=lambda a, now: tuple(a.timeline(now)))
+    scheduler.register("freq",      render_freq_gauge,    RENDER_RATES["freq"],
+                       key=lambda a, now: (round(a.presence(now)), round(a.detections_per_minute(now))))
+    scheduler.register("summary",   render_summary,       RENDER_RATES["summary"],
+                       key=lambda a, now: (a.detections, len(a.tracks), int(now - (a.first_ts or now))))
+    scheduler.register("transport", render_transport,     RENDER_RATES["transport"],
+                       key=lambda t, s: (t["frames"] // 10, round(t["bytes_per_frame"], -2)))
+    scheduler.register("hud",       render_hud,           RENDER_RATES["hud"],
+                       key=lambda h: (round(h["fps"], 1), h["res"], round(h["latency_ms"] or 0)))
+    return scheduler
+
+def push_detections(scheduler, smoother, ts, track_ids, raw_probs):
+    """Smooth one frame's raw predictions and queue the widget updates. Returns (emotions, probs)."""
+    with metrics.time("smooth"):
+        emotions, probs = smoother.update_many(track_ids, raw_probs, ts)
+
+    # Default empty state
+    if len(emotions) == 0:
+        scheduler.update("bars", [0]*7)
+        scheduler.update("stability", st.session_state.stability_score)
+
+    analytics = st.session_state.analytics
+    analytics.observe_frame(ts, len(emotions))
+    for track_id, emotion, prob in zip(track_ids, emotions, probs):
+        st.session_state.n_detections += 1
+
+        # Update History and the O(1) session analytics
+        emo_idx = EMOTIONS.index(emotion)
+        st.session_state.emotion_history.append(ts, emo_idx, prob)
+        analytics.observe(ts, track_id, emo_idx)
+
+        # Dashboard Updates (pushed by the scheduler at their own rates)
+        scheduler.update("bars", prob)
+        scheduler.update("stability", st.session_state.stability_score)
+        scheduler.update("insight", emotion)
+
+    # Analytics widgets read fixed-size bins, once per frame so they also decay without faces
+    scheduler.update("history", analytics, ts)
+    scheduler.update("freq", analytics, ts)
+    scheduler.update("summary", analytics, ts)
+
+    # Stability from the incrementally kept rolling std of recent emotions
+    st.session_state.stability_score = st.session_state.emotion_history.stability(
+        default=st.session_state.stability_score)
+    return emotions, probs
+
+def draw_face(frame, box, emotion, prob, scale):
+    """HUD Face Box (Match Design), in display coordinates."""
+    color_hex = EMOTION_COLORS.get(emotion, "#22D3EE")
+    color_bgr = tuple(int(color_hex.lstrip('#')[i:i+2], 16) for i in (4, 2, 0)) # Hex to BGR
+    x, y, w, h = (int(v * scale) for v in box)
+    conf = prob[EMOTIONS.index(emotion)] * 100
+    cv2.rectangle(frame, (x, y), (x+w, y+h), color_bgr, 2)
+
+    # Label background
+    label = f"{emotion.upper()} {conf:.1f}%"
+    (l_w, l_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)
+    cv2.rectangle(frame, (x, y-25), (x + l_w + 10, y), color_bgr, -1)
+    cv2.putText(frame, label, (x+5, y-8), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0,0,0), 2)
+
+def reset_dashboard():
+    st.session_state.emotion_history = EmotionHistory()
+    st.session_state.analytics = SessionAnalytics()
+    st.session_state.n_detections = 0
+    st.session_state.n_frames = 0
+
 # ──────────────────────────────────────────────────────────────
 # Live Webcam Loop
 # ──────────────────────────────────────────────────────────────
 with left:
-    run = st.toggle("Initialize Engine", value=False, key="run_engine")
-
-if run:
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
+    if replay_mode:
+        run = False
+        recordings = list_recordings()
+        recording, play = None, False
+        if not recordings:
+            st.info("No recordings yet — turn on Record Session during a live scan.")
+        else:
+            r_pick, r_speed = st.columns([2, 1])
+            rec_path = r_pick.selectbox("Recording", recordings, format_func=os.path.basename, key="replay_file")
+            speed = r_speed.select_slider("Speed", ["0.25x", "0.5x", "1x", "2x", "4x", "8x", "16x", "max"],
+                                          value="1x", key="replay_speed")
+            try:
+                recording = SessionRecording(rec_path)
+            except (OSError, ValueError) as e:     # e.g. a zero-length file left by a crash
+                st.error(f"Cannot open {os.path.basename(rec_path)}: {e}")
+            else:
+                start_s = st.slider("Start at (seconds)", 0.0, max(recording.duration_s, 1.0), 0.0, 1.0,
+                                    key="replay_start")
+                play = st.toggle("Play", value=False, key="replay_play")
+    else:
+        run = st.toggle("Initialize Engine", value=False, key="run_engine")
+
+if not run:
+    live.stop()
+
+if replay_mode:
+    # ──────────────────────────────────────────────────────────
+    # Session Replay: recorded raw predictions drive the same widgets, no model or camera
+    # ──────────────────────────────────────────────────────────
+    if recording is not None and play:
+        scheduler = make_scheduler()
+        smoother = TrackSmoother(window=sensitivity)
+        reset_dashboard()
+        h, w = recording.meta.get("frame_size", (720, 1280))
+        encoder = FrameEncoder()
+        blank, scale = encoder.prepare(np.zeros((h, w, 3), dtype=np.uint8))
+        blank[:] = (23, 15, 11)
+        rate = None if speed == "max" else float(speed[:-1])
+        metrics.reset()
+        metrics.set_gauge("resolution", f"{h}p")
+        try:
+            wall0, ts0 = time.monotonic(), None
+            for fr in recording.frames(start_s):
+                if ts0 is None: ts0 = fr.ts
+                if rate:
+                    delay = wall0 + (fr.ts - ts0) / rate - time.monotonic()
+                    if delay > 0: time.sleep(delay)
+                st.session_state.n_frames += 1
+                emotions, probs = push_detections(scheduler, smoother, fr.ts, fr.track_ids, fr.probs)
+                if encoder.due():
+                    frame = blank.copy()
+                    for box, emotion, prob in zip(fr.boxes, emotions, probs):
+                        draw_face(frame, box, emotion, prob, scale)
+                    frame_slot.image(encoder.encode(frame), use_container_width=True)
+                    transport_slot.markdown(f"""
+                    <div style="font-family:monospace; font-size:10px; opacity:0.5; margin-top:6px;">
+                        REPLAY {fr.ts - recording.start_ts:.1f}s / {recording.duration_s:.1f}s · {speed}
+                    </div>
+                    """, unsafe_allow_html=True)
+                metrics.frame_done()
+                scheduler.update("hud", metrics.hud())
+                scheduler.tick()
+            scheduler.tick(force=True)
+        except ValueError as e:                     # corrupt chunk mid-file
+            st.error(str(e))
+        finally:
+            recording.close()
+    elif recording is not None:
+        recording.close()
+
+elif run:
+    if PIPELINE_MODE != "processes" and model_status() != "ready":
+        with st.spinner("Warming up emotion model…"):
+            get_engine()
+    # Capture and detect/infer run on the engine's threads (or processes); this loop is the UI consumer
+    started = live.start()
+    if started and live.model_status() == "loading":
+        with st.spinner("Warming up emotion model…"):
+            while live.running and live.model_status() == "loading":
+                time.sleep(0.2)
+        if live.running:
+            st.rerun()  # repaint the status pill now that the inference process has reported
+        st.error("The inference process exited while loading the model — see the server log.")
+    elif not started:
         st.error("Camera unavailable — check permissions and refresh.")
     else:
-        reset_last_emotion()
-        fps_timer = time.time()
+        scheduler = make_scheduler()
+
+        # Display path: downscale → annotate → encode, capped at DISPLAY_FPS
+        encoder, mjpeg = live.encoder, live.mjpeg
+        if mjpeg:
+            frame_slot.markdown(f'<img src="{mjpeg.url}" style="width:100%; display:block;">', unsafe_allow_html=True)
+
+        # Stage timings feed the HUD and the local /metrics endpoint
+        metrics.register_provider("render", scheduler.stats)
+        get_metrics_exporter()
         try:
             while run:
-                ret, frame = cap.read()
-                if not ret: break
+                result = live.get(timeout=1.0)
+                if result is None:
+                    if not live.running: break
+                    continue
+                live.record_frame(result)
+                show = encoder.due()
+                if show:
+                    frame, scale = encoder.prepare(result.frame)
+                    metrics.set_gauge("resolution", f"{result.frame.shape[0]}p")
 
                 st.session_state.n_frames += 1
-                curr_time = time.time()
-                fps = 1 / (curr_time - fps_timer) if (curr_time - fps_timer) > 0 else 30
-                fps_timer = curr_time
-
-                gray, faces = get_faces(frame)
-                
-                # Default empty state
-                if len(faces) == 0:
-                    render_emotion_bars([0]*7)
-                    render_stability(st.session_state.stability_score)
-                
-                for (x, y, w, h) in faces:
-                    face = gray[y:y+h, x:x+w]
-                    raw_em, prob = predict_face(face)
-                    emotion  = smoother.update(raw_em)
-                    color_hex = EMOTION_COLORS.get(emotion, "#22D3EE")
-                    color_bgr = tuple(int(color_hex.lstrip('#')[i:i+2], 16) for i in (4, 2, 0)) # Hex to BGR
-                    
-                    st.session_state.n_detections += 1
-                    
-                    # Update History
-                    emo_idx = list(EMOTIONS).index(emotion)
-                    st.session_state.emotion_history.append(emo_idx)
-                    
-                    # Dashboard Updates
-                    render_emotion_bars(prob[0])
-                    render_stability(st.session_state.stability_score)
-                    render_insight(emotion)
-                    render_history_chart()
-                    render_freq_gauge()
-
-                    if voice_on: speak(emotion)
-
-                    # HUD Face Box (Match Design)
-                    conf = prob[0][emo_idx] * 100
-                    cv2.rectangle(frame, (x, y), (x+w, y+h), color_bgr, 2)
-                    
-                    # Label background
-                    label = f"{emotion.upper()} {conf:.1f}%"
-                    (l_w, l_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)
-                    cv2.rectangle(frame, (x, y-25), (x + l_w + 10, y), color_bgr, -1)
-                    cv2.putText(frame, label, (x+5, y-8), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0,0,0), 2)
-
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                frame_slot.image(frame_rgb, use_container_width=True)
-                
-                # Stability logic (mock for now, or based on variance)
-                if len(st.session_state.emotion_history) > 10:
-                    recent = st.session_state.emotion_history[-10:]
-                    st.session_state.stability_score = 100 - (np.std(recent) * 20)
-                    st.session_state.stability_score = max(0, min(100, st.session_state.stability_score))
+                emotions, probs = push_detections(scheduler, smoother, result.captured_at,
+                                                  [t.id for t in result.tracks], result.probs)
+                for emotion in emotions:
+                    live.speak(emotion)
+
+                t_render = time.perf_counter()
+                if show:
+                    with metrics.time("annotate"):
+                        for box, emotion, prob in zip(result.boxes, emotions, probs):
+                            draw_face(frame, box, emotion, prob, scale)
+                    with metrics.time("encode"):
+                        encoded = encoder.encode(frame)
+                    t_render = time.perf_counter()
+                    if mjpeg: mjpeg.publish(encoded)
+                    else:     frame_slot.image(encoded, use_container_width=True)
+                    scheduler.update("transport", encoder.stats(), metrics.snapshot()["stages"])
+
+                # Push only the widgets that are due and whose content changed
+                scheduler.update("hud", metrics.hud())
+                scheduler.tick()
+                metrics.observe("render", (time.perf_counter() - t_render) * 1000)
+                metrics.frame_done(result.captured_at)
 
         finally:
-            cap.release()
+            # A rerun interrupts this loop but leaves the engine running for the next one
+            metrics.unregister_provider("render")
+            if not live.running:
+                live.stop()
 
 # ──────────────────────────────────────────────────────────────
 # Image Upload Detection
@@ -633,12 +930,14 @@ if run:
 elif uploaded:
     gray, faces = get_faces(upload_bgr)
     if faces is not None and len(faces) > 0:
-        for (x, y, w, h) in faces:
-            face = gray[y:y+h, x:x+w]
-            emotion, prob = predict_face(face)
-            
+        try:
+            emotions, probs = predict_faces(gray, faces)
+        except (OSError, RuntimeError) as e:     # inference daemon down; it reconnects on the next try
+            st.error(f"Inference unavailable: {e}")
+            emotions, probs = [], []
+        for emotion, prob in zip(emotions, probs):
             # Dashboard Updates
-            render_emotion_bars(prob[0])
+            render_emotion_bars(prob)
             render_insight(emotion)
             
             if voice_on: speak(emotion)
@@ -0,0 +1 @@
+# benchmarks package — run modules with `python -m benchmarks.<name>` from the repo root
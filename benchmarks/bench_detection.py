@@ -0,0 +1,116 @@
+"""
+bench_detection.py — Face detection time vs recall on synthetic frames.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_detection [--face face.jpg] [--faces 3] [--iterations 20]
+
+Faces are pasted at known positions onto a noise background at 480p, 720p,
+1080p and 4K, so recall is measured against exact ground truth. Each
+resolution is measured with large faces (15-30% of frame height) and with
+small ones (45-90 px), which the live tracker's MIN_FACE_FRAC floor
+deliberately skips at high resolutions but stills must still find. The face
+patch is taken from --face, else the first image found in dataset/test,
+else a drawn placeholder (Haar may not fire on it; pass --face for
+meaningful recall numbers).
+"""
+import os
+import argparse
+import cv2
+import numpy as np
+
+from benchmarks.common import measure
+from src.webcam import FaceDetector, iou, _face_cascade
+from src.config import MIN_FACE_FRAC
+
+RESOLUTIONS = {"480p": (480, 854), "720p": (720, 1280), "1080p": (1080, 1920), "4K": (2160, 3840)}
+TEST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../dataset/test")
+
+
+def load_face_patch(path=None):
+    """Grayscale face patch to paste into frames (see module docstring)."""
+    if path:
+        img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            raise FileNotFoundError(path)
+        faces = _face_cascade.detectMultiScale(img, 1.1, 5)
+        if len(faces):
+            x, y, w, h = max(faces, key=lambda b: b[2] * b[3])
+            m = w // 4
+            return img[max(0, y-m):y+h+m, max(0, x-m):x+w+m]
+        return img
+    if os.path.isdir(TEST_DIR):
+        for root, _, files in sorted(os.walk(TEST_DIR)):
+            for f in sorted(files):
+                img = cv2.imread(os.path.join(root, f), cv2.IMREAD_GRAYSCALE)
+                if img is not None:
+                    return img
+    patch = np.full((100, 100), 190, np.uint8)
+    cv2.ellipse(patch, (50, 52), (38, 48), 0, 0, 360, 170, -1)
+    for ex in (33, 67):
+        cv2.ellipse(patch, (ex, 40), (10, 5), 0, 0, 360, 40, -1)
+        cv2.line(patch, (ex - 12, 30), (ex + 12, 28), 60, 3)
+    cv2.ellipse(patch, (50, 60), (5, 10), 0, 0, 360, 130, -1)
+    cv2.ellipse(patch, (50, 78), (16, 5), 0, 0, 360, 70, -1)
+    return cv2.GaussianBlur(patch, (0, 0), 1)
+
+
+def make_frame(shape, patch, n_faces, rng, side_px=None):
+    """
+    Noise frame with `n_faces` non-overlapping pasted faces. Returns (gray, truth).
+    Face sides are 15-30% of frame height, or drawn from `side_px` (lo, hi) pixels.
+    """
+    H, W = shape
+    gray = cv2.GaussianBlur(rng.integers(40, 160, (H, W), dtype=np.uint8), (0, 0), 4)
+    truth = []
+    ph, pw = patch.shape
+    while len(truth) < n_faces:
+        side = int(rng.uniform(*side_px)) if side_px else int(H * rng.uniform(0.15, 0.3))
+        fw = int(side * pw / ph)
+        x, y = int(rng.integers(0, W - fw)), int(rng.integers(0, H - side))
+        box = (x, y, fw, side)
+        if any(iou(box, t) > 0 for t in truth):
+            continue
+        gray[y:y+side, x:x+fw] = cv2.resize(patch, (fw, side), interpolation=cv2.INTER_LINEAR)
+        truth.append(box)
+    return gray, truth
+
+
+def recall(found, truth, thresh=0.3):
+    hits = sum(1 for t in truth if any(iou(t, tuple(f)) >= thresh for f in found))
+    return hits / len(truth) if truth else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Face detection time vs recall.")
+    parser.add_argument("--face", help="Photo containing a face to paste into frames")
+    parser.add_argument("--faces", type=int, default=3)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    patch = load_face_patch(args.face)
+    stills = FaceDetector(detect_width=None, max_face_frac=None)   # what get_faces / detect_faces use
+    live = FaceDetector(min_face_frac=MIN_FACE_FRAC)
+
+    variants = {
+        "full-res (legacy)": lambda g, t: _face_cascade.detectMultiScale(g, 1.3, 5, minSize=(30, 30)),
+        "stills":            lambda g, t: stills.detect(g),
+        "live":              lambda g, t: live.detect(g),
+        "live + ROI":        lambda g, t: live.detect(g, rois=t),
+    }
+
+    print(f"{'resolution':<8} {'faces':<6} {'variant':<20} {'p50 ms':>9} {'p99 ms':>9} {'recall':>7}")
+    for res, shape in RESOLUTIONS.items():
+        for size, side_px in (("large", None), ("small", (45, 90))):
+            gray, truth = make_frame(shape, patch, args.faces, rng, side_px)
+            # ROI variant gets the truth boxes nudged, as a tracker would supply them
+            rois = [(x + int(w * 0.1), y - int(h * 0.1), w, h) for x, y, w, h in truth]
+            for name, fn in variants.items():
+                stats = measure(lambda: fn(gray, rois), args.iterations, warmup=2)
+                r = recall(fn(gray, rois), truth)
+                print(f"{res:<8} {size:<6} {name:<20} {stats['p50_ms']:>9.2f} {stats['p99_ms']:>9.2f} {r:>7.2f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
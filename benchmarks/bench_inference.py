@@ -0,0 +1,40 @@
+"""
+bench_inference.py — `model.predict` vs the configured inference backend.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_inference --iterations 300 --batch 1 4 16
+"""
+import argparse
+import numpy as np
+
+from benchmarks.common import measure, print_row
+from src.config import IMG_SIZE
+from src import predictor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    predictor.load_model()
+    if predictor.engine is None:
+        print("Model not loaded — nothing to benchmark.")
+        return
+
+    rng = np.random.default_rng(0)
+    for n in args.batch:
+        batch = rng.random((n, IMG_SIZE, IMG_SIZE, 1), dtype="float32")
+        new = measure(lambda: predictor.engine.predict(batch), args.iterations)
+        if predictor.model is not None:
+            old = measure(lambda: predictor.model.predict(batch, verbose=0), args.iterations)
+            print_row(f"model.predict      batch={n}", old)
+        print_row(f"{predictor.engine.name:<18} batch={n}", new)
+        if predictor.model is not None:
+            print(f"{'speed-up (p50)':<36} x{old['p50_ms'] / new['p50_ms']:.1f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
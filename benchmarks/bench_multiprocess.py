@@ -0,0 +1,110 @@
+"""
+bench_multiprocess.py — End-to-end FPS of the threaded vs the multi-process pipeline.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_multiprocess                       # synthetic 1080p camera, 2 faces
+    python -m benchmarks.bench_multiprocess --source-fps 30 --faces 3 --duration 15
+    python -m benchmarks.bench_multiprocess --video clip.mp4
+
+Both modes feed the same source. The synthetic camera cycles pre-rendered
+1080p frames at --source-fps (0 = as fast as it is read). A UI consumer does
+the dashboard's per-frame work on every result: track smoothing, downscale,
+box annotation and encode. The benchmark reports the rate at which the UI
+receives results (end-to-end FPS), capture-to-UI latency, and how many
+frames each stage handled. The multi-process mode only helps when the host
+has cores to spare; on a single core it pays extra for the process hops.
+"""
+import os
+import time
+import argparse
+import functools
+import cv2
+import numpy as np
+
+from benchmarks.suite import SyntheticCapture, synthetic_frames, RESOLUTIONS
+
+
+def synthetic_camera(fps, faces, seed=0):
+    """Picklable source factory, so the capture process builds its own frames."""
+    return SyntheticCapture(synthetic_frames(RESOLUTIONS["1080p"], faces, count=8, seed=seed), fps=fps)
+
+
+def consume(pipeline, duration, warmup=2.0):
+    from src.smoothing import TrackSmoother
+    from src.transport import FrameEncoder
+    smoother, encoder = TrackSmoother(), FrameEncoder(max_fps=0)
+    deadline = time.perf_counter() + 120.0
+    while pipeline.get(timeout=1.0) is None:        # model load in the worker
+        if time.perf_counter() > deadline or not pipeline.alive:
+            raise RuntimeError("pipeline produced no frames")
+    end_warmup = time.perf_counter() + warmup
+    while time.perf_counter() < end_warmup:
+        pipeline.get(timeout=1.0)
+
+    before = pipeline.stats()
+    latencies, frames = [], 0
+    t0 = time.perf_counter()
+    end = t0 + duration
+    while time.perf_counter() < end:
+        result = pipeline.get(timeout=1.0)
+        if result is None:
+            if not pipeline.alive:
+                break
+            continue
+        emotions, _ = smoother.update_many([t.id for t in result.tracks], result.probs, result.captured_at)
+        frame, scale = encoder.prepare(result.frame)
+        for (x, y, w, h), emotion in zip(result.boxes, emotions):
+            x, y, w, h = (int(v * scale) for v in (x, y, w, h))
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+            cv2.putText(frame, emotion, (x, y - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+        encoder.encode(frame)
+        latencies.append(time.time() - result.captured_at)
+        frames += 1
+    wall = time.perf_counter() - t0
+    after = pipeline.stats()
+    lat = np.asarray(latencies or [0.0]) * 1000
+    return {
+        "ui_fps": frames / wall,
+        "captured_fps": (after["capture"]["frames"] - before["capture"]["frames"]) / wall,
+        "inferred_fps": (after["inference"]["frames"] - before["inference"]["frames"]) / wall,
+        "p50_ms": float(np.percentile(lat, 50)),
+        "p95_ms": float(np.percentile(lat, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Threaded vs multi-process pipeline at 1080p.")
+    parser.add_argument("--video", help="Video file to use instead of the synthetic camera")
+    parser.add_argument("--source-fps", type=float, default=60.0)
+    parser.add_argument("--faces", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--modes", nargs="+", choices=["threads", "processes"], default=["threads", "processes"])
+    args = parser.parse_args()
+
+    from src.predictor import get_engine
+    from src.pipeline import Pipeline
+    from src.process_pipeline import ProcessPipeline
+
+    source = args.video or functools.partial(synthetic_camera, args.source_fps, args.faces)
+    label = args.video or f"synthetic 1080p camera @ {args.source_fps:g} fps, {args.faces} faces"
+    print(f"Source: {label} · {os.cpu_count()} CPU(s) · {args.duration:g}s per mode\n")
+    print(f"{'mode':<10} {'UI fps':>8} {'captured':>9} {'inferred':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for mode in args.modes:
+        if mode == "threads":
+            if get_engine() is None:
+                print("Model not loaded — nothing to benchmark.")
+                return
+            cap = cv2.VideoCapture(source) if args.video else source()
+            pipeline = Pipeline(cap).start()
+        else:
+            pipeline = ProcessPipeline(source).start()
+        try:
+            r = consume(pipeline, args.duration)
+        finally:
+            pipeline.stop()
+        print(f"{mode:<10} {r['ui_fps']:>8.1f} {r['captured_fps']:>9.1f} {r['inferred_fps']:>9.1f} "
+              f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
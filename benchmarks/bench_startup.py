@@ -0,0 +1,82 @@
+"""
+bench_startup.py — Import-time profile of the modules app.py loads at startup.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_startup [--top 15] [--json startup.json]
+
+Runs a fresh interpreter with `-X importtime`, prints the slowest imports
+and flags any heavy dependency that has leaked back into the eager import
+path (those must only load lazily or in the background model thread).
+"""
+import sys
+import json
+import argparse
+import subprocess
+
+# What app.py imports before it paints anything
+STARTUP_MODULES = ["streamlit", "cv2", "numpy", "src.webcam", "src.predictor", "src.smoothing", "src.voice", "src.config"]
+# Must not be pulled in by the modules above
+HEAVY_MODULES = ["tensorflow", "keras", "plotly", "PIL", "pyttsx3", "elevenlabs", "gtts", "pygame"]
+
+
+def profile(modules):
+    """Return ({module: (self_us, cumulative_us)}, wall_ms) for importing `modules`."""
+    code = "import time; t=time.perf_counter()\n"
+    code += "".join(f"import {m}\n" for m in modules)
+    code += "print((time.perf_counter()-t)*1000)"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    table = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        table[name.strip()] = (int(self_us), int(cum_us))
+    return table, float(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile of app startup.")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", help="Write the full report to this file")
+    parser.add_argument("--modules", nargs="+", default=STARTUP_MODULES)
+    args = parser.parse_args()
+
+    available = [m for m in args.modules if subprocess.run(
+        [sys.executable, "-c", f"import {m}"], capture_output=True).returncode == 0]
+    skipped = sorted(set(args.modules) - set(available))
+
+    table, wall_ms = profile(available)
+    leaked = sorted(m for m in HEAVY_MODULES if m in table)
+
+    print(f"Total import wall time: {wall_ms:.1f} ms ({len(table)} modules)")
+    if skipped:
+        print(f"Skipped (not importable here): {', '.join(skipped)}")
+    print(f"\n{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, (self_us, cum_us) in sorted(table.items(), key=lambda kv: -kv[1][1])[:args.top]:
+        print(f"{cum_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+    if leaked:
+        print(f"\n[WARNING] Heavy modules imported eagerly: {', '.join(leaked)}")
+    else:
+        print("\n[SUCCESS] No heavy modules on the eager import path.")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "wall_ms": wall_ms,
+                "leaked_heavy_modules": leaked,
+                "skipped": skipped,
+                "modules": {k: {"self_us": v[0], "cumulative_us": v[1]} for k, v in table.items()},
+            }, f, indent=2)
+
+    sys.exit(1 if leaked else 0)
+
+
+if __name__ == "__main__":
+    main()
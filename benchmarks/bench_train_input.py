@@ -0,0 +1,109 @@
+"""
+bench_train_input.py — Training input throughput: ImageDataGenerator vs tf.data.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_train_input [--data-dir dataset/train] [--batches 100]
+
+Reports images/sec for the legacy flow_from_directory generator and for the
+tf.data pipeline in src/input_pipeline.py, both with train.py's augmentation
+settings. tf.data is measured twice: the first pass (decoding from disk)
+and a steady-state pass served from its in-memory cache. A third variant
+reads a packed memory-mapped shard (src/dataset_pack.py), packed into a
+temp directory unless --packed-dir is given; its open time is reported
+too. Without a dataset a synthetic tree of random 48x48 PNGs is generated.
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import cv2
+import numpy as np
+
+from src.config import EMOTIONS, IMG_SIZE
+
+TRAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../dataset/train")
+BATCH_SIZE = 64
+
+
+def make_synthetic_tree(root, per_class, seed=0):
+    rng = np.random.default_rng(seed)
+    for name in EMOTIONS:
+        d = os.path.join(root, name.lower())
+        os.makedirs(d, exist_ok=True)
+        for i in range(per_class):
+            img = rng.integers(0, 256, (IMG_SIZE, IMG_SIZE), dtype=np.uint8)
+            cv2.imwrite(os.path.join(d, f"{i:05d}.png"), img)
+    return root
+
+
+def images_per_sec(iterator, batches):
+    """Pull `batches` batches (after one warm-up batch). Returns images/sec."""
+    next(iterator)
+    n = 0
+    t0 = time.perf_counter()
+    for _ in range(batches):
+        x, _ = next(iterator)
+        n += len(x)
+    return n / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Training input pipeline throughput.")
+    parser.add_argument("--data-dir", default=TRAIN_DIR)
+    parser.add_argument("--batches", type=int, default=100)
+    parser.add_argument("--packed-dir", help="Existing packed shard for --data-dir (default: pack to a temp dir)")
+    parser.add_argument("--synthetic-per-class", type=int, default=1000)
+    args = parser.parse_args()
+
+    from tensorflow.keras.preprocessing.image import ImageDataGenerator
+    from src.input_pipeline import make_dataset
+    from src.dataset_pack import list_images, pack, PackedDataset
+
+    tmp = tempfile.mkdtemp(prefix="cortex-bench-")
+    root = args.data_dir
+    if not os.path.isdir(root):
+        root = make_synthetic_tree(os.path.join(tmp, "tree"), args.synthetic_per_class)
+        print(f"No dataset at {args.data_dir}; using {args.synthetic_per_class} synthetic images per class.")
+    try:
+        n_images = len(list_images(root)[0])
+        batches = min(args.batches, max(1, n_images // BATCH_SIZE - 1))
+
+        gen = ImageDataGenerator(
+            rescale=1./255, rotation_range=20, width_shift_range=0.1, height_shift_range=0.1,
+            shear_range=0.1, zoom_range=0.1, horizontal_flip=True, fill_mode='nearest'
+        ).flow_from_directory(root, target_size=(IMG_SIZE, IMG_SIZE), batch_size=BATCH_SIZE,
+                              color_mode='grayscale', class_mode='categorical', shuffle=True)
+        legacy = images_per_sec(iter(gen), batches)
+
+        ds, _, _ = make_dataset(root, IMG_SIZE, BATCH_SIZE, training=True)
+        it = iter(ds)
+        cold = images_per_sec(it, batches)
+        for _ in range(n_images // BATCH_SIZE):      # finish the first epoch so the cache is full
+            next(it)
+        warm = images_per_sec(it, batches)
+
+        packed_dir = args.packed_dir
+        if not packed_dir:
+            t0 = time.perf_counter()
+            packed_dir = os.path.join(tmp, "packed")
+            pack(root, packed_dir, IMG_SIZE)
+            print(f"Packed {n_images} images in {time.perf_counter() - t0:.2f}s")
+        t0 = time.perf_counter()
+        PackedDataset(packed_dir)
+        print(f"Opened packed shard in {(time.perf_counter() - t0) * 1000:.2f} ms")
+        ds, _, _ = make_dataset(packed_dir, IMG_SIZE, BATCH_SIZE, training=True)
+        mapped = images_per_sec(iter(ds), batches)
+
+        print(f"\n{'pipeline':<28} {'images/s':>10} {'speed-up':>9}")
+        for name, rate in (("ImageDataGenerator", legacy),
+                           ("tf.data (first epoch)", cold),
+                           ("tf.data (cached)", warm),
+                           ("tf.data (packed memmap)", mapped)):
+            print(f"{name:<28} {rate:>10.0f} {rate / legacy:>8.1f}x")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+bench_transport.py — Bytes per frame and encode time for the display path.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_transport [--iterations 50]
+
+Compares shipping the raw full-resolution RGB frame (the old st.image path)
+against FrameEncoder at several display widths, formats and qualities.
+"""
+import argparse
+import cv2
+import numpy as np
+
+from benchmarks.common import measure
+from src.transport import FrameEncoder
+
+
+def synthetic_frame(h=1080, w=1920, seed=0):
+    """Camera-like frame: smooth gradients plus mild sensor noise."""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:h, 0:w]
+    base = np.stack([(xx / w * 200), (yy / h * 180), ((xx + yy) / (w + h) * 160)], axis=-1)
+    noise = cv2.GaussianBlur(rng.normal(0, 25, (h, w, 3)), (0, 0), 3)
+    return np.clip(base + noise, 0, 255).astype(np.uint8)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame transport cost.")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    frame = synthetic_frame()
+    print(f"{'variant':<28} {'KB/frame':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    print(f"{'raw RGB 1920 (old path)':<28} {frame.nbytes / 1024:>10.1f} {'-':>8} {'-':>8}")
+
+    for width in (1920, 960, 640):
+        for fmt, quality in (("jpeg", 60), ("jpeg", 80), ("jpeg", 95), ("webp", 80)):
+            enc = FrameEncoder(display_width=width, fmt=fmt, quality=quality, max_fps=0)
+            stats = measure(lambda: enc.encode(enc.prepare(frame)[0]), args.iterations, warmup=3)
+            size = enc.stats()["bytes_per_frame"] / 1024
+            print(f"{f'{fmt} q{quality} @ {width}px':<28} {size:>10.1f} {stats['p50_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+common.py — shared timing helpers for the benchmark scripts.
+"""
+import time
+import numpy as np
+
+
+def measure(fn, iterations=200, warmup=10):
+    """
+    Call `fn()` `warmup` times untimed, then `iterations` times timed.
+    Returns a dict of latency percentiles (ms) and ops/sec.
+    """
+    for _ in range(warmup):
+        fn()
+    samples = np.empty(iterations, dtype="float64")
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples[i] = time.perf_counter() - t0
+    samples *= 1000.0
+    return {
+        "p50_ms":  float(np.percentile(samples, 50)),
+        "p95_ms":  float(np.percentile(samples, 95)),
+        "p99_ms":  float(np.percentile(samples, 99)),
+        "mean_ms": float(samples.mean()),
+        "ops_sec": float(1000.0 / samples.mean()) if samples.mean() > 0 else 0.0,
+    }
+
+
+def print_row(name, stats):
+    print(f"{name:<36} p50 {stats['p50_ms']:8.3f} ms   p99 {stats['p99_ms']:8.3f} ms   "
+          f"{stats['ops_sec']:9.1f} ops/s")
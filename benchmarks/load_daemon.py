@@ -0,0 +1,133 @@
+"""
+load_daemon.py — Many dashboard-like client processes against one inference daemon.
+
+Usage (from the repo root):
+    python -m benchmarks.load_daemon --sessions 1 4 16 --faces-per-request 1
+
+Starts an in-process InferenceDaemon on a temporary socket, then for each
+level spawns that many client processes. Each one imports only
+src.inference_daemon, like a session with INFERENCE_DAEMON_SOCKET on, and
+sends face batches in a closed loop for --duration seconds. Reports
+requests/s, faces/s, latency percentiles, the daemon's mean micro-batch size
+and the peak RSS of a client process. For comparison, it also reports the
+peak RSS of one process that loads its own model, which is what every
+session costs without the daemon.
+"""
+import os
+import time
+import argparse
+import resource
+import tempfile
+import multiprocessing as mp
+import numpy as np
+
+from src.config import IMG_SIZE, INFERENCE_BACKEND, SERVER_MAX_BATCH, SERVER_MAX_WAIT_MS
+
+
+def _rss_mb():
+    # VmHWM, not ru_maxrss: the latter survives exec and would report the parent's peak
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _client(path, faces, duration, start, out):
+    from src.inference_daemon import DaemonClient
+    client = DaemonClient(path)
+    crops = np.random.default_rng(os.getpid()).integers(0, 256, (faces, IMG_SIZE, IMG_SIZE), dtype=np.uint8)
+    client.predict_crops(crops)
+    start.wait()
+    lat = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        client.predict_crops(crops)
+        lat.append(time.perf_counter() - t0)
+    client.close()
+    out.put((lat, _rss_mb()))
+
+
+def _own_model(backend, out):
+    from src.backends import load_backend
+    engine = load_backend(backend)
+    engine.predict(np.zeros((1, IMG_SIZE, IMG_SIZE, 1), dtype="float32"))
+    out.put(_rss_mb())
+
+
+def run_level(ctx, path, daemon, sessions, faces, duration):
+    start, out = ctx.Barrier(sessions + 1), ctx.Queue()
+    procs = [ctx.Process(target=_client, args=(path, faces, duration, start, out)) for _ in range(sessions)]
+    for p in procs:
+        p.start()
+    start.wait()
+    before = daemon.batcher.stats()
+    t0 = time.perf_counter()
+    results = [out.get() for _ in procs]
+    wall = time.perf_counter() - t0
+    after = daemon.batcher.stats()
+    for p in procs:
+        p.join()
+    lat = np.concatenate([np.asarray(r[0]) for r in results]) * 1000
+    batches = after["batches"] - before["batches"]
+    return {
+        "req_s": len(lat) / wall,
+        "faces_s": len(lat) * faces / wall,
+        "p50_ms": float(np.percentile(lat, 50)),
+        "p95_ms": float(np.percentile(lat, 95)),
+        "p99_ms": float(np.percentile(lat, 99)),
+        "mean_batch": (after["items"] - before["items"]) / batches if batches else 0.0,
+        "client_rss_mb": max(r[1] for r in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for src/inference_daemon.py.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--faces-per-request", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=SERVER_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=SERVER_MAX_WAIT_MS)
+    parser.add_argument("--backend", default=INFERENCE_BACKEND)
+    args = parser.parse_args()
+
+    from src.backends import load_backend
+    from src.batching import MicroBatcher
+    from src.inference_daemon import InferenceDaemon
+    try:
+        engine = load_backend(args.backend)
+    except FileNotFoundError:
+        print("Model not found — nothing to benchmark.")
+        return
+
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    p = ctx.Process(target=_own_model, args=(args.backend, out))
+    p.start()
+    own_rss = out.get()
+    p.join()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="cortex-"), "infer.sock")
+    daemon = InferenceDaemon(path, MicroBatcher(engine.predict, args.max_batch, args.max_wait_ms))
+    daemon.backend = engine.name
+    daemon.start()
+    try:
+        print(f"{engine.name}, {args.faces_per_request} face(s)/request, max batch {args.max_batch}, "
+              f"max wait {args.max_wait_ms} ms")
+        print(f"Process with its own model: {own_rss:.0f} MB peak RSS\n")
+        print(f"{'sessions':>8} {'req/s':>9} {'faces/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'batch':>6} {'client MB':>10}")
+        for n in args.sessions:
+            r = run_level(ctx, path, daemon, n, args.faces_per_request, args.duration)
+            print(f"{n:>8} {r['req_s']:>9.1f} {r['faces_s']:>9.1f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+                  f"{r['p99_ms']:>8.2f} {r['mean_batch']:>6.1f} {r['client_rss_mb']:>10.0f}")
+    finally:
+        daemon.stop()
+
+
+if __name__ == "__main__":
+    main()
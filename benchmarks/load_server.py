@@ -0,0 +1,152 @@
+"""
+load_server.py — Throughput and tail latency of the HTTP inference server.
+
+Usage (from the repo root):
+    python -m benchmarks.load_server --spawn --max-batch 1 32      # in-process server, unbatched vs batched
+    python -m benchmarks.load_server --url http://127.0.0.1:8600 --concurrency 1 8 32 --endpoint image
+
+Each concurrency level runs N client threads on keep-alive connections for
+--duration seconds. Reports requests/s, faces/s, latency percentiles and the
+server's mean micro-batch size over that level (from /stats).
+"""
+import io
+import json
+import time
+import argparse
+import threading
+import http.client
+from urllib.parse import urlparse
+import cv2
+import numpy as np
+
+from benchmarks.bench_detection import load_face_patch, make_frame
+from src.config import IMG_SIZE, SERVER_MAX_WAIT_MS
+
+
+def make_payload(endpoint, faces_per_request, rng):
+    """(path, body, content_type) for one request."""
+    if endpoint == "image":
+        gray, _ = make_frame((480, 640), load_face_patch(), faces_per_request, rng)
+        ok, buf = cv2.imencode(".jpg", gray)
+        return "/v1/image", buf.tobytes(), "image/jpeg"
+    crops = rng.integers(0, 256, (faces_per_request, IMG_SIZE, IMG_SIZE), dtype=np.uint8)
+    buf = io.BytesIO()
+    np.save(buf, crops)
+    return "/v1/faces", buf.getvalue(), "application/x-npy"
+
+
+def _get_json(url, path):
+    u = urlparse(url)
+    conn = http.client.HTTPConnection(u.hostname, u.port, timeout=10)
+    conn.request("GET", path)
+    data = json.loads(conn.getresponse().read())
+    conn.close()
+    return data
+
+
+def run_level(url, payload, concurrency, duration):
+    path, body, ctype = payload
+    u = urlparse(url)
+    latencies, faces, errors = [], [0], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    start = threading.Barrier(concurrency + 1)
+
+    def client():
+        conn = http.client.HTTPConnection(u.hostname, u.port, timeout=30)
+        mine, n_faces, n_err = [], 0, 0
+        start.wait()
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                conn.request("POST", path, body, {"Content-Type": ctype})
+                resp = conn.getresponse()
+                data = resp.read()
+                if resp.status != 200:
+                    n_err += 1
+                    continue
+                n_faces += len(json.loads(data)["faces"])
+                mine.append(time.perf_counter() - t0)
+            except (OSError, http.client.HTTPException):
+                n_err += 1
+                conn.close()
+                conn = http.client.HTTPConnection(u.hostname, u.port, timeout=30)
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+            faces[0] += n_faces
+            errors[0] += n_err
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    before = _get_json(url, "/stats")["batcher"]
+    start.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    after = _get_json(url, "/stats")["batcher"]
+
+    lat = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+    batches = after["batches"] - before["batches"]
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "req_s": len(latencies) / wall,
+        "faces_s": faces[0] / wall,
+        "p50_ms": float(np.percentile(lat, 50)),
+        "p95_ms": float(np.percentile(lat, 95)),
+        "p99_ms": float(np.percentile(lat, 99)),
+        "mean_batch": (after["items"] - before["items"]) / batches if batches else 0.0,
+    }
+
+
+def sweep(url, payload, levels, duration, label):
+    print(f"\n{label}")
+    print(f"{'conc':>5} {'req/s':>9} {'faces/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'batch':>6} {'errors':>7}")
+    for c in levels:
+        r = run_level(url, payload, c, duration)
+        print(f"{c:>5} {r['req_s']:>9.1f} {r['faces_s']:>9.1f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+              f"{r['p99_ms']:>8.2f} {r['mean_batch']:>6.1f} {r['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for src/server.py.")
+    parser.add_argument("--url", default="http://127.0.0.1:8600")
+    parser.add_argument("--spawn", action="store_true", help="Start an in-process server on a free port")
+    parser.add_argument("--max-batch", type=int, nargs="+", default=[32],
+                        help="With --spawn: one sweep per micro-batch limit (1 = no batching)")
+    parser.add_argument("--max-wait-ms", type=float, default=SERVER_MAX_WAIT_MS)
+    parser.add_argument("--endpoint", choices=["faces", "image"], default="faces")
+    parser.add_argument("--faces-per-request", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    payload = make_payload(args.endpoint, args.faces_per_request, np.random.default_rng(0))
+    print(f"Payload: {args.endpoint}, {args.faces_per_request} face(s), {len(payload[1]) / 1024:.1f} KB")
+
+    if not args.spawn:
+        sweep(args.url, payload, args.concurrency, args.duration, f"Server at {args.url}")
+        return
+
+    from src.server import InferenceServer
+    from src.batching import MicroBatcher
+    from src.predictor import get_engine
+    engine = get_engine()
+    if engine is None:
+        print("Model not loaded — nothing to benchmark.")
+        return
+    for max_batch in args.max_batch:
+        server = InferenceServer(port=0, batcher=MicroBatcher(engine.predict, max_batch, args.max_wait_ms)).start()
+        try:
+            sweep(server.url, payload, args.concurrency, args.duration,
+                  f"{engine.name}, max batch {max_batch}, max wait {args.max_wait_ms} ms")
+        finally:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
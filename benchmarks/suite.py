@@ -0,0 +1,247 @@
+"""
+suite.py — Regression-guarded benchmark suite for the vision hot paths.
+
+Usage (from the repo root):
+    python -m benchmarks.suite --save-baseline          # record benchmarks/baselines/baseline.json
+    python -m benchmarks.suite                          # compare; exit 1 on regression
+    python -m benchmarks.suite --only get_faces predict --threshold 0.3 --json run.json
+
+Cases: get_faces at 480p/720p/1080p with 0, 1 and 3 faces; predict_face on
+one crop and predict_faces on batches of 4/16/32; EmotionSmoother and
+TrackSmoother updates; and an end-to-end synthetic-camera frame (track →
+predict → smooth → history → display encode), both inline and through the
+threaded Pipeline. Inputs are generated from fixed seeds.
+
+A case regresses when its --metric (default p50_ms) exceeds the baseline by
+more than --threshold (default 20%) and by at least --min-delta-ms, so
+microsecond-scale cases cannot fail on timer jitter alone. Baselines are machine-specific; record
+one on the machine you compare on.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import cv2
+import numpy as np
+
+from benchmarks.common import measure
+from benchmarks.bench_detection import load_face_patch, make_frame
+from src.config import EMOTIONS, IMG_SIZE
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "baseline.json")
+RESOLUTIONS = {"480p": (480, 854), "720p": (720, 1280), "1080p": (1080, 1920)}
+FACE_COUNTS = (0, 1, 3)
+
+
+class SyntheticCapture:
+    """cv2.VideoCapture stand-in cycling pre-rendered frames at `fps` (0 = as fast as asked)."""
+
+    def __init__(self, frames, fps=30):
+        self.frames = frames
+        self.interval = 1.0 / fps if fps else 0.0
+        self._i = 0
+        self._next = time.perf_counter()
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.interval:
+            delay = self._next - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._next = max(self._next + self.interval, time.perf_counter())
+        frame = self.frames[self._i % len(self.frames)]
+        self._i += 1
+        return True, frame
+
+    def release(self):
+        pass
+
+
+def synthetic_frames(shape, n_faces, count=8, seed=0):
+    rng = np.random.default_rng(seed)
+    patch = load_face_patch()
+    return [cv2.cvtColor(make_frame(shape, patch, n_faces, rng)[0], cv2.COLOR_GRAY2BGR) for _ in range(count)]
+
+
+# ── cases ───────────────────────────────────────────────────
+def cases_get_faces():
+    from src.webcam import get_faces
+    for res, shape in RESOLUTIONS.items():
+        for n in FACE_COUNTS:
+            frame = synthetic_frames(shape, n, count=1)[0]
+            yield f"get_faces/{res}/{n}faces", (lambda f=frame: get_faces(f)), 30
+
+
+def cases_predict():
+    from src import predictor
+    if predictor.get_engine() is None:
+        print("[SKIP] predict: model not loaded", file=sys.stderr)
+        return
+    rng = np.random.default_rng(1)
+    crop = rng.integers(0, 256, (IMG_SIZE, IMG_SIZE), dtype=np.uint8)
+    yield "predict/predict_face/1", (lambda: predictor.predict_face(crop)), 200
+    gray = rng.integers(0, 256, (720, 1280), dtype=np.uint8)
+    for n in (4, 16, 32):
+        boxes = [(int(x), int(y), 96, 96) for x, y in zip(rng.integers(0, 1180, n), rng.integers(0, 620, n))]
+        yield f"predict/predict_faces/{n}", (lambda b=boxes: predictor.predict_faces(gray, b)), 100
+
+
+def cases_smoothing():
+    from src.smoothing import EmotionSmoother, TrackSmoother
+    rng = np.random.default_rng(2)
+    labels = [EMOTIONS[i] for i in rng.integers(0, len(EMOTIONS), 1024)]
+    legacy, it = EmotionSmoother(size=8), iter(range(10**9))
+    yield "smoothing/EmotionSmoother.update", (lambda: legacy.update(labels[next(it) % 1024])), 5000
+    probs = rng.dirichlet(np.ones(len(EMOTIONS)), size=(1024, 4)).astype("float32")
+    for mode in ("ema", "window"):
+        ts, clock = TrackSmoother(mode=mode), iter(range(10**9))
+        def step(ts=ts, clock=clock):
+            i = next(clock)
+            ts.update_many([1, 2, 3, 4], probs[i % 1024], now=i * 0.033)
+        yield f"smoothing/TrackSmoother.{mode}/4tracks", step, 5000
+
+
+def cases_pipeline():
+    from src import predictor
+    if predictor.get_engine() is None:
+        print("[SKIP] pipeline: model not loaded", file=sys.stderr)
+        return
+    from src.tracking import FaceTracker
+    from src.smoothing import TrackSmoother
+    from src.history import EmotionHistory
+    from src.transport import FrameEncoder
+    from src.pipeline import Pipeline
+
+    frames = synthetic_frames(RESOLUTIONS["720p"], 2, count=16, seed=3)
+    tracker, smoother, history, encoder = FaceTracker(), TrackSmoother(), EmotionHistory(), FrameEncoder(max_fps=0)
+    clock = iter(range(10**9))
+
+    def inline():
+        i = next(clock)
+        gray, tracks = tracker.update(frames[i % len(frames)])
+        _, probs = predictor.predict_faces(gray, [t.box for t in tracks])
+        emotions, smoothed = smoother.update_many([t.id for t in tracks], probs, i * 0.033)
+        for e, p in zip(emotions, smoothed):
+            history.append(i * 0.033, EMOTIONS.index(e), p)
+        frame, _ = encoder.prepare(frames[i % len(frames)])
+        encoder.encode(frame)
+    yield "pipeline/inline/720p/2faces", inline, 100
+
+    holder = {}
+
+    def threaded():
+        if "p" not in holder:
+            holder["p"] = Pipeline(SyntheticCapture(frames, fps=120)).start()
+        holder["p"].get(timeout=5.0)
+    yield "pipeline/threaded/720p/2faces", threaded, 100
+    if "p" in holder:
+        holder["p"].stop()
+
+
+GROUPS = {
+    "get_faces": cases_get_faces,
+    "predict":   cases_predict,
+    "smoothing": cases_smoothing,
+    "pipeline":  cases_pipeline,
+}
+
+
+# ── runner ──────────────────────────────────────────────────
+def run(groups, scale=1.0):
+    results = {}
+    for g in groups:
+        for name, fn, iterations in GROUPS[g]():
+            n = max(5, int(iterations * scale))
+            stats = measure(fn, n, warmup=max(2, n // 10))
+            results[name] = stats
+            print(f"{name:<40} p50 {stats['p50_ms']:9.3f} ms  p95 {stats['p95_ms']:9.3f} ms  "
+                  f"p99 {stats['p99_ms']:9.3f} ms  {stats['ops_sec']:10.1f} ops/s")
+    return results
+
+
+def compare(results, baseline, metric, threshold, min_delta_ms=0.0):
+    """Returns a list of (name, baseline, current, ratio) regressions."""
+    regressions = []
+    print(f"\n{'case':<40} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if not base or metric not in base:
+            print(f"{name:<40} {'—':>10} {stats[metric]:>10.3f}      new")
+            continue
+        ratio = stats[metric] / base[metric] if base[metric] else 1.0
+        slower = ratio > 1 + threshold and stats[metric] - base[metric] >= min_delta_ms
+        flag = "  REGRESSION" if slower else ""
+        print(f"{name:<40} {base[metric]:>10.3f} {stats[metric]:>10.3f} {ratio - 1:>+7.0%}{flag}")
+        if flag:
+            regressions.append((name, base[metric], stats[metric], ratio))
+    return regressions
+
+
+def _meta():
+    from src.config import INFERENCE_BACKEND
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "backend": INFERENCE_BACKEND,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vision hot-path benchmark suite.")
+    parser.add_argument("--only", nargs="+", choices=list(GROUPS), default=list(GROUPS))
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.20, help="Allowed slowdown, e.g. 0.2 = 20%%")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05,
+                        help="Ignore slowdowns smaller than this in absolute terms")
+    parser.add_argument("--metric", choices=["p50_ms", "p95_ms", "p99_ms", "mean_ms"], default="p50_ms")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply iteration counts (e.g. 0.2 for a quick run)")
+    parser.add_argument("--json", help="Also write this run's results here")
+    args = parser.parse_args()
+
+    cv2.setRNGSeed(0)
+    results = run(args.only, args.scale)
+    report = {"meta": _meta(), "results": results}
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                old = json.load(f)
+            old["results"].update(results)         # keep cases not run this time
+            report["results"] = old["results"]
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[SUCCESS] Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline first.")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("meta", {}).get("machine") != report["meta"]["machine"] or \
+            baseline.get("meta", {}).get("cpus") != report["meta"]["cpus"]:
+        print("\n[WARNING] Baseline was recorded on different hardware; comparisons may be meaningless.")
+    regressions = compare(results, baseline["results"], args.metric, args.threshold, args.min_delta_ms)
+    if regressions:
+        print(f"\n[ERROR] {len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%} ({args.metric}).")
+        sys.exit(1)
+    print(f"\n[SUCCESS] No regressions beyond {args.threshold:.0%} ({args.metric}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+analytics.py — Incremental session analytics for the live dashboard.
+Every smoothed prediction updates a handful of running accumulators in O(1):
+
+    dwell time       seconds each emotion was held, per track and overall
+                     (gaps longer than ANALYTICS_MAX_GAP_S are not counted)
+    transitions      7×7 counts of a track's label changing from row to column
+    rate             per-second bins over the last ANALYTICS_RATE_WINDOW_S:
+                     frames, frames with a face, detections
+    timeline         ANALYTICS_TIMELINE_BINS bins over HISTORY_WINDOW_S holding
+                     detections and their summed emotion index
+    tracks           a TrackSummary per track id (oldest evicted past
+                     ANALYTICS_MAX_TRACKS)
+
+Queries only read the fixed-size bins, so the gauge, history card and summary
+panel never rescan EmotionHistory, however long the session runs.
+"""
+import numpy as np
+from src.config import (
+    EMOTIONS, HISTORY_WINDOW_S, ANALYTICS_MAX_GAP_S, ANALYTICS_RATE_WINDOW_S,
+    ANALYTICS_TIMELINE_BINS, ANALYTICS_MAX_TRACKS
+)
+
+_N = len(EMOTIONS)
+
+
+class _Bins:
+    """Ring of `bins` time bins spanning `span_s`; each column is summed per bin."""
+
+    def __init__(self, span_s, bins, columns):
+        self.bin_s = span_s / bins
+        self.n = bins
+        self.data = np.zeros((bins, columns), dtype="float64")
+        self._newest = None          # absolute bin number (ts // bin_s) of the newest bin
+
+    def _slot(self, ts):
+        b = int(ts // self.bin_s)
+        if self._newest is None or b - self._newest >= self.n:
+            self.data[:] = 0
+            self._newest = b
+        elif b > self._newest:
+            for k in range(self._newest + 1, b + 1):      # at most `n` bins, usually one
+                self.data[k % self.n] = 0
+            self._newest = b
+        elif b <= self._newest - self.n:
+            return None                                   # older than the window
+        return b % self.n
+
+    def add(self, ts, values):
+        i = self._slot(ts)
+        if i is not None:
+            self.data[i] += values
+
+    def series(self, now):
+        """(bins, columns) array, oldest bin first, ending at the bin holding `now`."""
+        if self._newest is None:
+            return self.data
+        self._slot(now)
+        return self.data[np.arange(self._newest - self.n + 1, self._newest + 1) % self.n]
+
+
+class TrackSummary:
+    """Running totals for one track: lifetime, detections, dwell per emotion, label switches."""
+
+    __slots__ = ("id", "first_ts", "last_ts", "emotion", "detections", "counts", "dwell_s", "switches")
+
+    def __init__(self, track_id, ts):
+        self.id = track_id
+        self.first_ts = ts
+        self.last_ts = ts
+        self.emotion = None
+        self.detections = 0
+        self.counts = np.zeros(_N, dtype="int64")
+        self.dwell_s = np.zeros(_N, dtype="float64")
+        self.switches = 0
+
+    @property
+    def dominant(self):
+        return EMOTIONS[int(np.argmax(self.dwell_s if self.dwell_s.any() else self.counts))]
+
+    def as_dict(self):
+        return {
+            "track_id": self.id,
+            "duration_s": round(self.last_ts - self.first_ts, 2),
+            "detections": self.detections,
+            "dominant": self.dominant,
+            "switches": self.switches,
+            "dwell_s": {e: round(float(s), 2) for e, s in zip(EMOTIONS, self.dwell_s)},
+        }
+
+
+class SessionAnalytics:
+
+    def __init__(self, max_gap_s=ANALYTICS_MAX_GAP_S, rate_window_s=ANALYTICS_RATE_WINDOW_S,
+                 timeline_s=HISTORY_WINDOW_S, timeline_bins=ANALYTICS_TIMELINE_BINS,
+                 max_tracks=ANALYTICS_MAX_TRACKS):
+        self.max_gap_s = max_gap_s
+        self.rate_window_s = rate_window_s
+        self.max_tracks = max_tracks
+        self.dwell_s = np.zeros(_N, dtype="float64")
+        self.counts = np.zeros(_N, dtype="int64")
+        self.transitions = np.zeros((_N, _N), dtype="int64")
+        self.tracks = {}
+        self.frames = 0
+        self.detections = 0
+        self.first_ts = None
+        self._rate = _Bins(rate_window_s, max(1, int(rate_window_s)), 3)    # frames, frames with faces, detections
+        self._timeline = _Bins(timeline_s, timeline_bins, 2)                # detections, sum of emotion indices
+
+    # ── writes ──────────────────────────────────────────────
+    def observe_frame(self, ts, n_faces):
+        """Count one processed frame, with or without faces (drives presence and rates)."""
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.frames += 1
+        self._rate.add(ts, (1.0, 1.0 if n_faces else 0.0, float(n_faces)))
+
+    def observe(self, ts, track_id, emo_idx):
+        """Fold in one smoothed prediction for `track_id`."""
+        t = self.tracks.get(track_id)
+        if t is None:
+            if len(self.tracks) >= self.max_tracks:
+                del self.tracks[min(self.tracks.values(), key=lambda s: s.last_ts).id]
+            t = self.tracks[track_id] = TrackSummary(track_id, ts)
+        elif t.emotion is not None:
+            gap = ts - t.last_ts
+            if 0 < gap <= self.max_gap_s:
+                self.dwell_s[t.emotion] += gap
+                t.dwell_s[t.emotion] += gap
+            if emo_idx != t.emotion:
+                self.transitions[t.emotion, emo_idx] += 1
+                t.switches += 1
+        t.emotion = emo_idx
+        t.last_ts = ts
+        t.detections += 1
+        t.counts[emo_idx] += 1
+        self.counts[emo_idx] += 1
+        self.detections += 1
+        self._timeline.add(ts, (1.0, float(emo_idx)))
+
+    # ── queries (fixed cost) ────────────────────────────────
+    def _recent(self, now):
+        frames, with_faces, detections = self._rate.series(now).sum(0)
+        span = min(self.rate_window_s, now - self.first_ts) if self.first_ts is not None else 0.0
+        return frames, with_faces, detections, max(span, self._rate.bin_s)
+
+    def presence(self, now):
+        """Percent of recent frames that had at least one face."""
+        frames, with_faces, _, _ = self._recent(now)
+        return 100.0 * with_faces / frames if frames else 0.0
+
+    def detections_per_minute(self, now):
+        _, _, detections, span = self._recent(now)
+        return 60.0 * detections / span
+
+    def timeline(self, now):
+        """Mean emotion index per timeline bin, oldest first; None for bins without detections."""
+        series = self._timeline.series(now)
+        return [float(s / c) if c else None for c, s in series]
+
+    def dwell_share(self):
+        total = self.dwell_s.sum()
+        return self.dwell_s / total if total else self.dwell_s
+
+    def top_transitions(self, k=3):
+        """The `k` most frequent label changes as (from, to, count), most frequent first."""
+        flat = np.argsort(self.transitions, axis=None)[::-1][:k]
+        return [(EMOTIONS[i // _N], EMOTIONS[i % _N], int(self.transitions.flat[i]))
+                for i in flat if self.transitions.flat[i]]
+
+    def summary(self, now):
+        """Headline numbers for the dashboard's summary panel."""
+        share = self.dwell_share()
+        return {
+            "elapsed_s": round(now - self.first_ts, 1) if self.first_ts is not None else 0.0,
+            "detections": self.detections,
+            "per_minute": round(self.detections_per_minute(now), 1),
+            "presence": round(self.presence(now), 1),
+            "tracks": len(self.tracks),
+            "dominant": EMOTIONS[int(np.argmax(self.dwell_s))] if self.dwell_s.any() else None,
+            "dwell": sorted(((e, round(float(s), 1), round(float(p) * 100, 1))
+                             for e, s, p in zip(EMOTIONS, self.dwell_s, share) if s),
+                            key=lambda row: -row[1]),
+            "transitions": self.top_transitions(),
+            "switches": int(self.transitions.sum()),
+        }
+
+    def track_summaries(self):
+        return [t.as_dict() for t in sorted(self.tracks.values(), key=lambda s: s.first_ts)]
@@ -0,0 +1,108 @@
+"""
+audio_cache.py — Content-addressed cache for synthesized speech.
+Each clip is stored as <sha256(engine, voice, text)>.mp3 under
+AUDIO_CACHE_DIR. Hot clips are also kept in memory, and the directory is
+trimmed least-recently-used first once it grows past AUDIO_CACHE_MAX_MB.
+
+Pre-fill it for every VOICE_RESPONSES phrase (needs network once):
+    python -m src.audio_cache
+"""
+import os
+import hashlib
+import argparse
+import threading
+from src.config import AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_MB
+
+
+class AudioCache:
+
+    def __init__(self, root=AUDIO_CACHE_DIR, max_bytes=int(AUDIO_CACHE_MAX_MB * 1e6)):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._mem = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(engine, voice, text):
+        return hashlib.sha256(f"{engine}\x00{voice}\x00{text}".encode("utf-8")).hexdigest()
+
+    def path(self, engine, voice, text):
+        return os.path.join(self.root, self.key(engine, voice, text) + ".mp3")
+
+    def get(self, engine, voice, text):
+        """Cached bytes or None. A hit refreshes the entry's LRU position."""
+        k = self.key(engine, voice, text)
+        path = os.path.join(self.root, k + ".mp3")
+        with self._lock:
+            data = self._mem.get(k)
+        if data is not None:
+            # evict() orders by mtime, so memory hits must touch the file too
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return data
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        with self._lock:
+            self._mem[k] = data
+        return data
+
+    def put(self, engine, voice, text, data):
+        """Store `data` atomically and trim the cache. Returns the file path."""
+        os.makedirs(self.root, exist_ok=True)
+        k = self.key(engine, voice, text)
+        path = os.path.join(self.root, k + ".mp3")
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._mem[k] = data
+        self.evict()
+        return path
+
+    def evict(self):
+        """Delete least-recently-used clips until the cache fits `max_bytes`."""
+        try:
+            entries = [e for e in os.scandir(self.root) if e.name.endswith(".mp3")]
+        except FileNotFoundError:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        total = sum(e.stat().st_size for e in entries)
+        for e in entries:
+            if total <= self.max_bytes:
+                break
+            total -= e.stat().st_size
+            try:
+                os.remove(e.path)
+            except OSError:
+                pass
+            with self._lock:
+                self._mem.pop(e.name[:-4], None)
+
+    def size_bytes(self):
+        try:
+            return sum(e.stat().st_size for e in os.scandir(self.root) if e.name.endswith(".mp3"))
+        except FileNotFoundError:
+            return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-synthesize VOICE_RESPONSES into the audio cache.")
+    parser.add_argument("--engine", choices=["auto", "elevenlabs", "gtts"], default="auto",
+                        help="auto = every available network engine")
+    args = parser.parse_args()
+
+    from src.voice import warm_cache
+    for engine, emotion, ok in warm_cache(None if args.engine == "auto" else args.engine):
+        print(f"[{'SUCCESS' if ok else 'ERROR'}] {engine:<10} {emotion}")
+    print(f"Cache size: {AudioCache().size_bytes() / 1e6:.2f} MB at {AUDIO_CACHE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
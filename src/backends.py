@@ -0,0 +1,166 @@
+"""
+backends.py — Interchangeable inference backends.
+Every backend exposes `predict(batch) -> (N, 7) float32 probs` for a
+(N, IMG_SIZE, IMG_SIZE, 1) float32 batch scaled to [0, 1].
+"""
+import os
+import numpy as np
+from src.config import (
+    MODEL_PATH, IMG_SIZE, EMOTIONS, BATCH_BUCKETS, INFERENCE_BACKEND,
+    TFLITE_FP16_PATH, TFLITE_INT8_PATH, ONNX_PATH
+)
+
+
+class InferenceEngine:
+    """
+    Low-overhead replacement for `model.predict`.
+    Each batch bucket gets its own traced, fixed-signature concrete function,
+    so a call is a single graph execution with no data adapter or tf.data
+    pipeline, and no shape ever triggers a re-trace.
+    """
+
+    name = "keras"
+
+    def __init__(self, model, buckets=BATCH_BUCKETS):
+        import tensorflow as tf
+        self._tf = tf
+        self.model = model
+        self.buckets = tuple(sorted(buckets))
+        self._fns = {}
+        for b in self.buckets:
+            spec = tf.TensorSpec((b, IMG_SIZE, IMG_SIZE, 1), tf.float32)
+            fn = tf.function(lambda x: self.model(x, training=False))
+            self._fns[b] = fn.get_concrete_function(spec)
+
+    def _bucket(self, n):
+        for b in self.buckets:
+            if n <= b:
+                return b
+        return self.buckets[-1]
+
+    def warmup(self):
+        """Run every bucket once so the first real frame pays no setup cost."""
+        for b, fn in self._fns.items():
+            fn(self._tf.zeros((b, IMG_SIZE, IMG_SIZE, 1), self._tf.float32))
+
+    def predict(self, batch):
+        """Run a (N, IMG_SIZE, IMG_SIZE, 1) float32 batch. Returns (N, 7) probs."""
+        n = len(batch)
+        out = np.empty((n, len(EMOTIONS)), dtype="float32")
+        largest = self.buckets[-1]
+        for start in range(0, n, largest):
+            chunk = batch[start:start + largest]
+            size = len(chunk)
+            bucket = self._bucket(size)
+            if size < bucket:
+                padded = np.zeros((bucket, IMG_SIZE, IMG_SIZE, 1), dtype="float32")
+                padded[:size] = chunk
+                chunk = padded
+            out[start:start + size] = self._fns[bucket](self._tf.constant(chunk)).numpy()[:size]
+        return out
+
+
+def _tflite_interpreter(path):
+    """Prefer the standalone LiteRT / tflite-runtime wheels over full TensorFlow."""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            # `from tensorflow.lite import Interpreter` fails on current TF; go through the attribute
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=path, num_threads=os.cpu_count())
+
+
+class TFLiteBackend:
+    """
+    TFLite interpreter for the float16 / int8 exports.
+    int8 models get their input quantized and output dequantized here, so
+    callers always deal in float probabilities.
+    """
+
+    def __init__(self, path, name="tflite"):
+        self.name = name
+        self.path = path
+        self._interp = _tflite_interpreter(path)
+        self._in = self._interp.get_input_details()[0]
+        self._out = self._interp.get_output_details()[0]
+        self._batch = None
+        self._resize(1)
+
+    def _resize(self, n):
+        if n != self._batch:
+            self._interp.resize_tensor_input(self._in["index"], (n, IMG_SIZE, IMG_SIZE, 1))
+            self._interp.allocate_tensors()
+            self._in = self._interp.get_input_details()[0]
+            self._out = self._interp.get_output_details()[0]
+            self._batch = n
+
+    def warmup(self):
+        self.predict(np.zeros((1, IMG_SIZE, IMG_SIZE, 1), dtype="float32"))
+
+    def predict(self, batch):
+        self._resize(len(batch))
+        x = batch
+        if self._in["dtype"] != np.float32:
+            scale, zero = self._in["quantization"]
+            info = np.iinfo(self._in["dtype"])
+            x = np.clip(np.round(batch / scale + zero), info.min, info.max)
+        self._interp.set_tensor(self._in["index"], x.astype(self._in["dtype"]))
+        self._interp.invoke()
+        y = self._interp.get_tensor(self._out["index"])
+        if self._out["dtype"] != np.float32:
+            scale, zero = self._out["quantization"]
+            y = (y.astype("float32") - zero) * scale
+        return y.astype("float32")
+
+
+class ONNXBackend:
+    """ONNX Runtime CPU session for the tf2onnx export."""
+
+    name = "onnx"
+
+    def __init__(self, path):
+        import onnxruntime as ort
+        self.path = path
+        self._session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+        self._input = self._session.get_inputs()[0].name
+
+    def warmup(self):
+        self.predict(np.zeros((1, IMG_SIZE, IMG_SIZE, 1), dtype="float32"))
+
+    def predict(self, batch):
+        return self._session.run(None, {self._input: batch.astype("float32")})[0]
+
+
+BACKEND_PATHS = {
+    "keras":       MODEL_PATH,
+    "tflite-fp16": TFLITE_FP16_PATH,
+    "tflite-int8": TFLITE_INT8_PATH,
+    "onnx":        ONNX_PATH,
+}
+
+
+def load_backend(name=INFERENCE_BACKEND):
+    """
+    Build and warm up the backend called `name`.
+    Raises FileNotFoundError if its model file is missing and ValueError
+    for an unknown name.
+    """
+    if name not in BACKEND_PATHS:
+        raise ValueError(f"Unknown inference backend '{name}'. Choose from {list(BACKEND_PATHS)}.")
+    path = BACKEND_PATHS[name]
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+
+    if name == "keras":
+        from tensorflow.keras.models import load_model
+        backend = InferenceEngine(load_model(path))
+    elif name == "onnx":
+        backend = ONNXBackend(path)
+    else:
+        backend = TFLiteBackend(path, name=name)
+    backend.warmup()
+    return backend
@@ -0,0 +1,311 @@
+"""
+batch_analyze.py — Offline emotion analysis for large photo archives.
+
+    python -m src.batch_analyze photos/ --out results.csv
+    python -m src.batch_analyze photos/ --out results.parquet --format parquet --workers 8
+    python -m src.batch_analyze --file-list paths.txt --out results.csv --resume
+
+A process pool decodes images (straight to grayscale) and runs face
+detection; each worker ships back 48x48 uint8 crops. The main process packs
+crops from many images into large inference batches and streams one row per
+face (box, label, 7-way probabilities) to the output. Images without a face
+get a single row with face = -1, unreadable ones a row whose status says so.
+
+Resume: CSV output keeps a `<out>.progress` sidecar holding the byte offset
+of the last fully written batch; Parquet output is a directory of part
+files, each written atomically. Either way a rerun with --resume skips the
+images already recorded.
+"""
+import os
+import sys
+import csv
+import time
+import argparse
+import multiprocessing as mp
+import cv2
+import numpy as np
+from src.config import EMOTIONS, IMG_SIZE
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp", ".tif", ".tiff")
+COLUMNS = (["path", "face", "x", "y", "w", "h", "width", "height", "emotion", "confidence"]
+           + [f"prob_{e.lower()}" for e in EMOTIONS] + ["status"])
+
+
+# ── inputs ──────────────────────────────────────────────────
+def iter_inputs(paths, file_list=None):
+    """Yield image paths from files, directories (recursively) and an optional list file."""
+    for p in paths:
+        if os.path.isdir(p):
+            for dirpath, dirnames, files in os.walk(p):
+                dirnames.sort()
+                for f in sorted(files):
+                    if f.lower().endswith(IMAGE_EXTENSIONS):
+                        yield os.path.join(dirpath, f)
+        else:
+            yield p
+    if file_list:
+        with open(file_list, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield line
+
+
+# ── workers ─────────────────────────────────────────────────
+def _init_worker():
+    cv2.setNumThreads(1)     # one image per process; avoid oversubscribing cores
+
+
+def analyze_file(path):
+    """
+    Decode + detect + crop one image (runs in a worker; no TensorFlow here).
+    Returns (path, (H, W) or None, boxes (N, 4), crops (N, 48, 48) uint8, status, seconds).
+    """
+    from src.webcam import detect_faces
+    from src.predictor import crop_faces
+    t0 = time.perf_counter()
+    empty = np.zeros((0, 4), dtype="int32"), np.zeros((0, IMG_SIZE, IMG_SIZE), dtype="uint8")
+    try:
+        gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            return path, None, *empty, "unreadable", time.perf_counter() - t0
+        boxes = np.asarray(detect_faces(gray), dtype="int32").reshape(-1, 4)
+        crops = crop_faces(gray, boxes)
+        status = "ok" if len(boxes) else "no_face"
+        return path, gray.shape[:2], boxes, crops, status, time.perf_counter() - t0
+    except Exception as e:
+        return path, None, *empty, f"error: {e}", time.perf_counter() - t0
+
+
+# ── writers ─────────────────────────────────────────────────
+class CsvSink:
+    """Append-only CSV with a byte-offset sidecar marking the last complete batch."""
+
+    def __init__(self, path, resume):
+        self.path = path
+        self.progress_path = path + ".progress"
+        self.done = set()
+        if resume and os.path.exists(path):
+            committed = 0
+            if os.path.exists(self.progress_path):
+                with open(self.progress_path) as f:
+                    committed = int(f.read().strip() or 0)
+            with open(path, "r+b") as f:
+                f.truncate(committed)          # drop a torn, uncommitted tail
+            with open(path, newline="", encoding="utf-8") as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                self.done = {row[0] for row in reader if row}
+        self._f = open(path, "a" if resume else "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._f)
+        if self._f.tell() == 0:
+            self._writer.writerow(COLUMNS)
+            self._commit()
+
+    def _commit(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        with open(self.progress_path + ".tmp", "w") as f:
+            f.write(str(self._f.tell()))
+        os.replace(self.progress_path + ".tmp", self.progress_path)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+        self._commit()
+
+    def close(self):
+        self._f.close()
+
+
+class ParquetSink:
+    """Directory of part-NNNNNN.parquet files, each written to a temp name then renamed."""
+
+    def __init__(self, path, resume, rows_per_part=20_000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output needs pyarrow: pip install pyarrow") from e
+        self._pa, self._pq = pa, pq
+        # One fixed schema, so parts with only no-face rows (all nulls) still match the rest
+        types = {"path": pa.string(), "emotion": pa.string(), "status": pa.string()}
+        floats = {"confidence"} | {c for c in COLUMNS if c.startswith("prob_")}
+        self.schema = pa.schema([(c, types.get(c, pa.float32() if c in floats else pa.int32())) for c in COLUMNS])
+        self.path = path
+        self.rows_per_part = rows_per_part
+        self.done = set()
+        self._rows = []
+        os.makedirs(path, exist_ok=True)
+        parts = sorted(f for f in os.listdir(path) if f.startswith("part-") and f.endswith(".parquet"))
+        if parts and not resume:
+            for f in parts:
+                os.remove(os.path.join(path, f))
+            parts = []
+        for f in parts:
+            self.done.update(pq.read_table(os.path.join(path, f), columns=["path"]).column("path").to_pylist())
+        self._seq = len(parts)
+
+    def write(self, rows):
+        self._rows.extend(rows)
+        if len(self._rows) >= self.rows_per_part:
+            self._flush()
+
+    def _flush(self):
+        if not self._rows:
+            return
+        cols = list(zip(*self._rows))
+        table = self._pa.table({name: list(col) for name, col in zip(COLUMNS, cols)}, schema=self.schema)
+        final = os.path.join(self.path, f"part-{self._seq:06d}.parquet")
+        self._pq.write_table(table, final + ".tmp")
+        os.replace(final + ".tmp", final)
+        self._seq += 1
+        self._rows = []
+
+    def close(self):
+        self._flush()
+
+
+# ── driver ──────────────────────────────────────────────────
+def _rows(path, shape, boxes, probs, status):
+    if not len(boxes):
+        h, w = shape if shape else (None, None)
+        return [[path, -1, None, None, None, None, w, h, None, None] + [None] * len(EMOTIONS) + [status]]
+    rows = []
+    for i, ((x, y, bw, bh), p) in enumerate(zip(boxes.tolist(), probs)):
+        k = int(np.argmax(p))
+        rows.append([path, i, x, y, bw, bh, shape[1], shape[0], EMOTIONS[k], round(float(p[k]), 5)]
+                    + [round(float(v), 5) for v in p] + [status])
+    return rows
+
+
+class Throughput:
+    """Running counters plus a progress line every `every` seconds."""
+
+    def __init__(self, total, every=2.0):
+        self.total = total
+        self.every = every
+        self.t0 = time.perf_counter()
+        self._last_print = self.t0
+        self.images = self.faces = self.failed = 0
+        self.worker_s = self.infer_s = 0.0
+
+    def line(self):
+        dt = time.perf_counter() - self.t0
+        rate = self.images / dt if dt else 0.0
+        eta = (self.total - self.images) / rate if rate else float("inf")
+        return (f"{self.images:,}/{self.total:,} images  {self.faces:,} faces  "
+                f"{rate:,.1f} img/s  {self.faces / dt if dt else 0:,.1f} faces/s  ETA {eta:,.0f}s")
+
+    def tick(self):
+        now = time.perf_counter()
+        if now - self._last_print >= self.every:
+            self._last_print = now
+            print("[batch] " + self.line(), file=sys.stderr, flush=True)
+
+    def summary(self):
+        dt = time.perf_counter() - self.t0
+        return {
+            "images": self.images,
+            "faces": self.faces,
+            "failed": self.failed,
+            "wall_s": dt,
+            "images_per_s": self.images / dt if dt else 0.0,
+            "faces_per_s": self.faces / dt if dt else 0.0,
+            "decode_detect_ms_per_image": self.worker_s / max(1, self.images) * 1000,
+            "inference_ms_per_face": self.infer_s / max(1, self.faces) * 1000,
+        }
+
+
+def run(inputs, sink, engine, workers, batch_size=256, chunksize=8):
+    """Analyze every path in `inputs` not already in `sink.done`. Returns the Throughput stats."""
+    todo = [p for p in inputs if p not in sink.done]
+    stats = Throughput(len(todo))
+    pending, n_crops = [], 0
+
+    def flush():
+        nonlocal pending, n_crops
+        if not pending:
+            return
+        probs = np.zeros((0, len(EMOTIONS)), dtype="float32")
+        if n_crops:
+            batch = np.concatenate([r[3] for r in pending])[..., None].astype("float32")
+            batch /= 255.0
+            t0 = time.perf_counter()
+            probs = engine.predict(batch)
+            stats.infer_s += time.perf_counter() - t0
+        rows, start = [], 0
+        for path, shape, boxes, crops, status, _ in pending:
+            rows.extend(_rows(path, shape, boxes, probs[start:start + len(boxes)], status))
+            start += len(boxes)
+        sink.write(rows)
+        stats.images += len(pending)
+        stats.faces += n_crops
+        pending, n_crops = [], 0
+        stats.tick()
+
+    def consume(results):
+        nonlocal n_crops
+        for res in results:
+            pending.append(res)
+            n_crops += len(res[2])
+            stats.worker_s += res[5]
+            stats.failed += res[4] not in ("ok", "no_face")
+            if n_crops >= batch_size or len(pending) >= batch_size:
+                flush()
+        flush()
+
+    if workers <= 0:
+        consume(map(analyze_file, todo))
+    else:
+        with mp.get_context("spawn").Pool(workers, initializer=_init_worker) as pool:
+            consume(pool.imap_unordered(analyze_file, todo, chunksize=chunksize))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch emotion analysis of image files.")
+    parser.add_argument("inputs", nargs="*", help="Image files and/or directories (searched recursively)")
+    parser.add_argument("--file-list", help="Text file with one image path per line")
+    parser.add_argument("--out", required=True, help="CSV file, or Parquet directory with --format parquet")
+    parser.add_argument("--format", choices=["csv", "parquet"], default=None,
+                        help="Default: parquet if --out ends in .parquet, else csv")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help="Decode/detect processes (0 = run in this process)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Face crops per inference call")
+    parser.add_argument("--resume", action="store_true", help="Skip images already in --out")
+    parser.add_argument("--overwrite", action="store_true", help="Replace an existing --out")
+    args = parser.parse_args()
+
+    if not args.inputs and not args.file_list:
+        parser.error("give at least one input path or --file-list")
+    fmt = args.format or ("parquet" if args.out.endswith(".parquet") else "csv")
+    if os.path.exists(args.out) and not (args.resume or args.overwrite):
+        parser.error(f"{args.out} exists; pass --resume to continue it or --overwrite to replace it")
+
+    sink = CsvSink(args.out, args.resume) if fmt == "csv" else ParquetSink(args.out, args.resume)
+    inputs = list(iter_inputs(args.inputs, args.file_list))
+    if sink.done:
+        print(f"Resuming: {len(sink.done):,} of {len(inputs):,} images already done.")
+
+    from src.predictor import get_engine
+    engine = get_engine()
+    if engine is None:
+        sink.close()
+        sys.exit("Model unavailable — see the message above.")
+
+    try:
+        stats = run(inputs, sink, engine, args.workers, args.batch_size)
+    except KeyboardInterrupt:
+        sink.close()
+        sys.exit(f"Interrupted. Rerun with --resume to continue {args.out}.")
+    sink.close()
+
+    s = stats.summary()
+    print(f"Done: {s['images']:,} images, {s['faces']:,} faces, {s['failed']:,} failed "
+          f"in {s['wall_s']:.1f}s — {s['images_per_s']:,.1f} img/s, {s['faces_per_s']:,.1f} faces/s")
+    print(f"      decode+detect {s['decode_detect_ms_per_image']:.2f} ms/image (per worker), "
+          f"inference {s['inference_ms_per_face']:.3f} ms/face")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+batching.py — Dynamic micro-batching for concurrent inference requests.
+Callers submit face crops from any thread and get a Future back. One worker
+thread waits for the first request, keeps collecting for up to
+`max_wait_ms` (or until `max_batch` crops are queued), then runs a single
+forward pass and hands each caller its own slice of the result.
+The wait adapts to load: collection stops as soon as as many requests are
+queued as the previous pass served, and if that pass served a single
+request the next one is dispatched at once, so a lone client pays no
+batching delay.
+"""
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+import numpy as np
+from src.config import EMOTIONS, SERVER_MAX_BATCH, SERVER_MAX_WAIT_MS
+
+
+class MicroBatcher:
+
+    def __init__(self, predict, max_batch=SERVER_MAX_BATCH, max_wait_ms=SERVER_MAX_WAIT_MS):
+        """`predict` maps a float32 (N, 48, 48, 1) batch to (N, 7) probabilities."""
+        self.predict = predict
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = deque()              # (batch, future, submitted_at)
+        self._queued = 0                   # crops waiting in _queue
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+        self._last_requests = 0            # requests in the previous pass
+        self.batches = 0
+        self.requests = 0
+        self.items = 0
+        self.full_batches = 0
+        self.wait_s_total = 0.0
+        self.predict_s_total = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name="cortex-batcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def submit(self, batch):
+        """Queue a (k, 48, 48, 1) float32 batch. The Future resolves to its (k, 7) probs."""
+        fut = Future()
+        if len(batch) == 0:
+            fut.set_result(np.zeros((0, len(EMOTIONS)), dtype="float32"))
+            return fut
+        with self._cond:
+            if self._stop:
+                raise RuntimeError("MicroBatcher is stopped")
+            self._queue.append((batch, fut, time.perf_counter()))
+            self._queued += len(batch)
+            self._cond.notify()
+        return fut
+
+    def _take(self):
+        """Block for the next batch of requests. Returns [] when stopping."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._queue or self._stop)
+            if self._stop:
+                while self._queue:
+                    self._queue.popleft()[1].set_exception(RuntimeError("MicroBatcher stopped"))
+                self._queued = 0
+                return []
+            deadline = self._queue[0][2] + self.max_wait
+            # Expect about as many concurrent callers as last time
+            expect = max(self._last_requests, 1)
+            while (len(self._queue) < expect and self._queued < self.max_batch
+                   and not self._stop):
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            taken, n = [], 0
+            # Always take at least one request, even if it alone exceeds max_batch
+            while self._queue and (not taken or n + len(self._queue[0][0]) <= self.max_batch):
+                req = self._queue.popleft()
+                taken.append(req)
+                n += len(req[0])
+            self._queued -= n
+            self._last_requests = len(taken)
+            return taken
+
+    def _run(self):
+        while True:
+            taken = self._take()
+            if not taken:
+                return
+            t0 = time.perf_counter()
+            batch = taken[0][0] if len(taken) == 1 else np.concatenate([r[0] for r in taken])
+            try:
+                probs = self.predict(batch)
+            except Exception as e:
+                for _, fut, _ in taken:
+                    fut.set_exception(e)
+                continue
+            t1 = time.perf_counter()
+            start = 0
+            for req, fut, submitted in taken:
+                fut.set_result(probs[start:start + len(req)])
+                start += len(req)
+                self.wait_s_total += t0 - submitted
+            self.batches += 1
+            self.requests += len(taken)
+            self.items += len(batch)
+            self.full_batches += len(batch) >= self.max_batch
+            self.predict_s_total += t1 - t0
+
+    def stats(self):
+        b, r = max(1, self.batches), max(1, self.requests)
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "requests": self.requests,
+            "items": self.items,
+            "mean_batch": self.items / b,
+            "full_batches": self.full_batches,
+            "queue_wait_ms": self.wait_s_total / r * 1000,
+            "predict_ms": self.predict_s_total / b * 1000,
+            "queued": self._queued,
+        }
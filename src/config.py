@@ -29,10 +29,15 @@ ELEVENLABS_API_KEY = ""        # Paste key from https://elevenlabs.io
 USE_ELEVENLABS     = False     # Set True once key is added
 DEFAULT_VOICE_ID   = "EXAVITQu4vr4xnSDxMaL"  # Bella (default)
 
+# ── TTS Audio Cache ──────────────────────────────────────────
+AUDIO_CACHE_DIR    = os.path.join(BASE_DIR, "../.cache/tts")
+AUDIO_CACHE_MAX_MB = 50
+
 # ── Offline Acoustic Engine (pyttsx3) ────────────────────────
 VOICE_RATE   = 175
 VOICE_VOLUME = 1.0
 VOICE_GENDER = 'female'
+VOICE_COOLDOWN_S = 8.0   # never repeat the same emotion sooner than this
 
 # ── Hindi Voice Responses (gTTS-optimised, natural Hinglish) ─
 VOICE_RESPONSES = {
@@ -48,3 +53,120 @@ VOICE_RESPONSES = {
 # ── Model Hyperparameters ────────────────────────────────────
 IMG_SIZE      = 48
 SMOOTH_WINDOW = 8
+
+# ── Temporal Smoothing ───────────────────────────────────────
+SMOOTH_MODE        = "ema"   # "ema" | "window" | "vote" (legacy label vote)
+SMOOTH_HYSTERESIS  = 0.05    # challenger must beat current label by this margin
+SMOOTH_CAPACITY    = 64      # simultaneous tracks held in the NumPy state
+TRACK_IDLE_TIMEOUT = 2.0     # seconds before an unseen track is evicted
+
+# ── Inference Engine ─────────────────────────────────────────
+# Batches are zero-padded up to the next bucket so the traced graph
+# is never re-traced for a new batch size.
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32)
+
+# ── Inference Backend ────────────────────────────────────────
+# "keras" | "tflite-fp16" | "tflite-int8" | "onnx"
+# Non-Keras backends need `python -m src.export` to have been run first.
+# Optional packages (not in requirements.txt): `ai-edge-litert` runs the TFLite
+# exports without full TensorFlow (else tf.lite is used); `onnxruntime` runs
+# "onnx", and `tf2onnx` is needed to export it.
+INFERENCE_BACKEND = "keras"
+TFLITE_FP16_PATH  = os.path.join(BASE_DIR, "../models/emotion_model_fp16.tflite")
+TFLITE_INT8_PATH  = os.path.join(BASE_DIR, "../models/emotion_model_int8.tflite")
+ONNX_PATH         = os.path.join(BASE_DIR, "../models/emotion_model.onnx")
+
+# ── Face Detection ───────────────────────────────────────────
+DETECT_SCALE_FACTOR  = 1.3
+DETECT_MIN_NEIGHBORS = 5
+DETECT_WIDTH         = 640    # cascade runs on a copy downscaled to this width
+MIN_FACE_PX          = 30     # absolute floor, full-resolution pixels
+MIN_FACE_FRAC        = 0.05   # live tracker only: min face side as a fraction of frame height
+MAX_FACE_FRAC        = 0.9    # max face side as a fraction of frame height
+
+# ── Face Tracking ────────────────────────────────────────────
+DETECT_EVERY     = 5      # full-frame Haar pass every N frames
+TRACK_MAX_MISSES = 3      # drop a track after N failed re-detections
+TRACK_IOU_MATCH  = 0.3    # min IoU to associate a detection with a track
+TRACK_ROI_MARGIN = 0.5    # ROI re-detect window = box dilated by this fraction
+
+# ── Live Camera ──────────────────────────────────────────────
+CAMERA_INDEX        = 0
+CAMERA_RESOLUTIONS  = {           # sidebar label → requested capture size
+    "1080p HD": (1920, 1080),
+    "720p SD":  (1280, 720),
+    "4k Ultra": (3840, 2160),
+}
+LIVE_IDLE_TIMEOUT_S = 10.0        # release the camera when no UI loop has read a frame for this long
+PIPELINE_MODE       = "threads"   # "threads" | "processes" (capture and inference in their own processes)
+FRAME_RING_SLOTS    = 8           # shared-memory frames between the capture and inference processes
+
+# ── Session Recording ────────────────────────────────────────
+RECORD_DIR          = os.path.join(BASE_DIR, "../recordings")
+RECORD_CHUNK_FRAMES = 300       # frames per compressed chunk (the seek granularity)
+RECORD_CHUNK_S      = 10.0      # ...or this many seconds, whichever comes first
+
+# ── Video File Analysis ──────────────────────────────────────
+VIDEO_SAMPLE_FPS    = 5.0    # frames analysed per second of video (None = use VIDEO_STRIDE)
+VIDEO_STRIDE        = 1      # analyse every Nth frame when VIDEO_SAMPLE_FPS is None
+VIDEO_DETECT_EVERY  = 1      # full Haar pass every N *sampled* frames
+VIDEO_BATCH_SIZE    = 64     # face crops per inference call
+VIDEO_SEEK_MIN_GAP  = 15     # skip by seeking when >= N frames apart, else grab()
+
+# ── Emotion History ──────────────────────────────────────────
+HISTORY_CAPACITY    = 36_000   # detections kept in memory (~10 min at 60/s)
+HISTORY_WINDOW_S    = 300      # "Last 5 mins" card
+STABILITY_WINDOW    = 10       # detections behind the stability score
+HISTORY_SPILL_PATH  = None     # CSV path to keep per-second averages of evicted data
+HISTORY_SPILL_BIN_S = 1.0
+
+# ── Session Analytics ────────────────────────────────────────
+ANALYTICS_MAX_GAP_S     = 1.0    # longer gaps between a track's predictions add no dwell time
+ANALYTICS_RATE_WINDOW_S = 60     # "Session Frequency" gauge and detections/min look back this far
+ANALYTICS_TIMELINE_BINS = 100    # points on the history card (HISTORY_WINDOW_S / bins seconds each)
+ANALYTICS_MAX_TRACKS    = 256    # per-track summaries kept; the longest-idle is dropped first
+
+# ── Frame Transport ──────────────────────────────────────────
+DISPLAY_WIDTH  = 960       # frames are downscaled to this before annotation
+DISPLAY_FPS    = 15        # display rate cap, independent of inference
+FRAME_FORMAT   = "jpeg"    # "jpeg" | "webp"
+FRAME_QUALITY  = 80
+TRANSPORT_MODE = "image"   # "image" (st.image) | "mjpeg" (local stream, kiosk browser on the same host)
+MJPEG_HOST     = "127.0.0.1"
+MJPEG_PORT     = 8765
+
+# ── Inference Server ─────────────────────────────────────────
+SERVER_HOST        = "127.0.0.1"
+SERVER_PORT        = 8600
+SERVER_MAX_BATCH   = 32      # crops per forward pass (largest BATCH_BUCKETS entry)
+SERVER_MAX_WAIT_MS = 5.0     # how long the first request waits for company
+SERVER_MAX_BODY_MB = 20
+
+# ── Shared Inference Daemon ──────────────────────────────────
+# True: src.predictor sends crops to `python -m src.inference_daemon` instead
+# of loading its own model, so all sessions on the host share one copy.
+INFERENCE_DAEMON_SOCKET    = False
+INFERENCE_DAEMON_PATH      = "/tmp/cortex-infer.sock"
+INFERENCE_DAEMON_TIMEOUT_S = 10.0
+INFERENCE_DAEMON_RETRY_MAX_S = 10.0   # reconnect backoff doubles from 0.5s up to this while the daemon is down
+
+# ── Instrumentation ──────────────────────────────────────────
+METRICS_ENABLED      = True
+METRICS_WINDOW       = 512           # recent samples per stage behind the percentiles
+METRICS_HOST         = "127.0.0.1"
+METRICS_PORT         = 9108          # /metrics (Prometheus) and /metrics.json; None = off
+METRICS_FILE         = None          # e.g. "/var/log/cortex/metrics.json"; rewritten periodically
+METRICS_FILE_EVERY_S = 10.0
+METRICS_SCOPE_IDLE_S = 300.0         # a session's metrics are dropped after this long without activity
+
+# ── Dashboard Refresh Rates (Hz) ─────────────────────────────
+RENDER_RATES = {
+    "bars":      10,
+    "stability": 4,
+    "insight":   2,
+    "history":   2,
+    "freq":      1,
+    "transport": 1,
+    "hud":       2,
+    "summary":   1,
+}
@@ -0,0 +1,153 @@
+"""
+dataset_pack.py — Packed, memory-mapped copies of the FER dataset.
+Each split (a class-per-folder tree of small PNG/JPGs) is decoded once into
+
+    <out>/<split>/images.npy     uint8   (N, IMG, IMG)
+    <out>/<split>/labels.npy     uint8   (N,)
+    <out>/<split>/manifest.json  class names, image size, per-class counts
+
+and later opened with np.load(mmap_mode="r"): no decoding, no per-file
+syscalls, and every process reading the shard shares the same page cache.
+
+    python -m src.dataset_pack                       # dataset/{train,test} -> dataset/packed/
+
+Imports nothing from src.config so train.py (run as a script) can use it.
+"""
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+
+BASE_DIR    = os.path.dirname(os.path.abspath(__file__))
+DATASET_DIR = os.path.normpath(os.path.join(BASE_DIR, "../dataset"))
+PACKED_DIR  = os.path.join(DATASET_DIR, "packed")
+
+# Same extensions flow_from_directory accepts
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".ppm", ".tif", ".tiff")
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+
+
+def list_images(root):
+    """
+    Walk a class-per-folder tree. Returns (paths, labels, class_names) with
+    classes in alphabetical order and files sorted within each class, i.e.
+    the same class_indices and `.classes` order as flow_from_directory.
+    """
+    class_names = sorted(d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d)))
+    paths, labels = [], []
+    for label, name in enumerate(class_names):
+        for dirpath, _, files in sorted(os.walk(os.path.join(root, name))):
+            for f in sorted(files):
+                if f.lower().endswith(IMAGE_EXTENSIONS):
+                    paths.append(os.path.join(dirpath, f))
+                    labels.append(label)
+    return paths, np.asarray(labels, dtype="int32"), class_names
+
+
+def is_packed(path):
+    return os.path.isfile(os.path.join(path, MANIFEST))
+
+
+def pack(src_root, out_dir, img_size=48, workers=8):
+    """
+    Decode every image under `src_root` into a packed shard at `out_dir`.
+    Arrays are written to temp names and renamed last, so a half-written
+    shard is never mistaken for a complete one. Returns the manifest.
+    """
+    paths, labels, class_names = list_images(src_root)
+    if not paths:
+        raise FileNotFoundError(f"No images found under {src_root}")
+    if len(class_names) > 255:
+        raise ValueError("labels.npy is uint8; more than 255 classes is not supported")
+    os.makedirs(out_dir, exist_ok=True)
+    img_tmp = os.path.join(out_dir, "images.tmp.npy")
+    images = np.lib.format.open_memmap(img_tmp, mode="w+", dtype="uint8",
+                                       shape=(len(paths), img_size, img_size))
+
+    def load(i):
+        img = cv2.imread(paths[i], cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            raise ValueError(f"Could not decode {paths[i]}")
+        if img.shape != (img_size, img_size):
+            img = cv2.resize(img, (img_size, img_size), interpolation=cv2.INTER_NEAREST)
+        images[i] = img
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:     # cv2 releases the GIL
+        list(pool.map(load, range(len(paths))))
+    images.flush()
+    del images
+
+    manifest = {
+        "version": FORMAT_VERSION,
+        "source": os.path.abspath(src_root),
+        "img_size": img_size,
+        "count": len(paths),
+        "class_names": class_names,
+        "class_counts": np.bincount(labels, minlength=len(class_names)).tolist(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    np.save(os.path.join(out_dir, "labels.tmp.npy"), labels.astype("uint8"))
+    os.replace(img_tmp, os.path.join(out_dir, "images.npy"))
+    os.replace(os.path.join(out_dir, "labels.tmp.npy"), os.path.join(out_dir, "labels.npy"))
+    with open(os.path.join(out_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+class PackedDataset:
+    """
+    A packed shard opened read-only and zero-copy.
+    `images` (N, IMG, IMG) uint8 and `labels` (N,) are np.memmap views.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported packed dataset version in {path}")
+        self.path = path
+        self.images = np.load(os.path.join(path, "images.npy"), mmap_mode="r")
+        self.labels = np.load(os.path.join(path, "labels.npy"), mmap_mode="r")
+        self.class_names = self.manifest["class_names"]
+        self.img_size = self.manifest["img_size"]
+        if len(self.images) != self.manifest["count"] or len(self.labels) != len(self.images):
+            raise ValueError(f"Packed dataset at {path} is inconsistent with its manifest")
+
+    def __len__(self):
+        return len(self.labels)
+
+    def batch(self, idx):
+        """(x float32 (n, IMG, IMG, 1) in [0, 1], y int64) for indices `idx`."""
+        idx = np.sort(np.asarray(idx))             # sequential reads through the mapping
+        x = self.images[idx].astype("float32")[..., None]
+        x /= 255.0
+        return x, self.labels[idx].astype("int64")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack dataset splits into memory-mapped arrays.")
+    parser.add_argument("--src", default=DATASET_DIR, help="Directory holding the split folders")
+    parser.add_argument("--out", default=PACKED_DIR)
+    parser.add_argument("--splits", nargs="+", default=["train", "test"])
+    parser.add_argument("--img-size", type=int, default=48)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    args = parser.parse_args()
+
+    for split in args.splits:
+        src = os.path.join(args.src, split)
+        if not os.path.isdir(src):
+            print(f"[SKIP] {split}: {src} not found")
+            continue
+        t0 = time.perf_counter()
+        m = pack(src, os.path.join(args.out, split), args.img_size, args.workers)
+        dt = time.perf_counter() - t0
+        print(f"[SUCCESS] {split}: {m['count']} images, {len(m['class_names'])} classes "
+              f"in {dt:.1f}s -> {os.path.join(args.out, split)}")
+
+
+if __name__ == "__main__":
+    main()
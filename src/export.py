@@ -0,0 +1,196 @@
+"""
+export.py — Convert models/emotion_model.h5 into lighter inference backends.
+
+    python -m src.export                      # fp16 + int8 TFLite
+    python -m src.export --variants fp16 int8 onnx --calib-samples 500
+
+int8 is full-integer post-training quantization calibrated on a random
+sample of dataset/train. After exporting, every variant is scored against
+the Keras model on dataset/test and the accuracy deltas are written to
+models/export_report.json.
+"""
+import os
+import json
+import time
+import argparse
+import cv2
+import numpy as np
+from src.config import (
+    MODEL_PATH, IMG_SIZE, EMOTIONS,
+    TFLITE_FP16_PATH, TFLITE_INT8_PATH, ONNX_PATH
+)
+from src.backends import BACKEND_PATHS, load_backend
+from src.dataset_pack import is_packed, PackedDataset
+
+BASE_DIR    = os.path.dirname(os.path.abspath(__file__))
+TRAIN_DIR   = os.path.normpath(os.path.join(BASE_DIR, "../dataset/train"))
+TEST_DIR    = os.path.normpath(os.path.join(BASE_DIR, "../dataset/test"))
+REPORT_PATH = os.path.normpath(os.path.join(BASE_DIR, "../models/export_report.json"))
+
+
+def load_samples(root, n, seed=0):
+    """
+    Randomly sample `n` images from a class-per-folder tree (the layout used
+    by train.py). Returns (x, y) with x shaped (n, IMG_SIZE, IMG_SIZE, 1).
+    Class order is alphabetical, matching flow_from_directory. A packed
+    shard (src/dataset_pack.py) is sampled straight from its memmap.
+    """
+    if is_packed(root):
+        packed = PackedDataset(root)
+        picks = np.random.default_rng(seed).permutation(len(packed))[:n]
+        return packed.batch(picks)
+    classes = sorted(d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d)))
+    files = [
+        (os.path.join(root, c, f), label)
+        for label, c in enumerate(classes)
+        for f in sorted(os.listdir(os.path.join(root, c)))
+    ]
+    rng = np.random.default_rng(seed)
+    picks = rng.permutation(len(files))[:n]
+
+    x = np.empty((len(picks), IMG_SIZE, IMG_SIZE, 1), dtype="float32")
+    y = np.empty(len(picks), dtype="int64")
+    for i, j in enumerate(picks):
+        path, label = files[j]
+        img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        x[i, :, :, 0] = cv2.resize(img, (IMG_SIZE, IMG_SIZE))
+        y[i] = label
+    x /= 255.0
+    return x, y
+
+
+def _converter(model):
+    import tensorflow as tf
+    return tf.lite.TFLiteConverter.from_keras_model(model)
+
+
+def export_fp16(model, path=TFLITE_FP16_PATH):
+    import tensorflow as tf
+    conv = _converter(model)
+    conv.optimizations = [tf.lite.Optimize.DEFAULT]
+    conv.target_spec.supported_types = [tf.float16]
+    with open(path, "wb") as f:
+        f.write(conv.convert())
+
+
+def export_int8(model, calib, path=TFLITE_INT8_PATH):
+    import tensorflow as tf
+    conv = _converter(model)
+    conv.optimizations = [tf.lite.Optimize.DEFAULT]
+    conv.representative_dataset = lambda: ([calib[i:i+1]] for i in range(len(calib)))
+    conv.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    conv.inference_input_type = tf.int8
+    conv.inference_output_type = tf.int8
+    with open(path, "wb") as f:
+        f.write(conv.convert())
+
+
+def export_onnx(model, path=ONNX_PATH):
+    import tensorflow as tf
+    import tf2onnx
+    spec = (tf.TensorSpec((None, IMG_SIZE, IMG_SIZE, 1), tf.float32, name="input"),)
+
+    @tf.function
+    def forward(x):
+        return model(x, training=False)
+
+    tf2onnx.convert.from_function(forward, input_signature=spec, opset=13, output_path=path)
+
+
+def _latency_ms(backend, iterations=200):
+    face = np.zeros((1, IMG_SIZE, IMG_SIZE, 1), dtype="float32")
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        backend.predict(face)
+        samples.append(time.perf_counter() - t0)
+    return float(np.percentile(samples, 50) * 1000)
+
+
+def build_report(names, x=None, y=None):
+    """
+    Score each backend in `names` (the first is the reference) on (x, y).
+    Returns a list of dicts with size, per-face latency, accuracy and the
+    accuracy / top-1 agreement / probability deltas against the reference.
+    """
+    rows, ref_probs, ref_acc = [], None, None
+    for name in names:
+        backend = load_backend(name)
+        row = {
+            "backend": name,
+            "size_mb": round(os.path.getsize(BACKEND_PATHS[name]) / 1e6, 3),
+            "p50_ms_per_face": round(_latency_ms(backend), 3),
+        }
+        if x is not None:
+            probs = np.concatenate([backend.predict(x[i:i+64]) for i in range(0, len(x), 64)])
+            acc = float((probs.argmax(1) == y).mean())
+            row["accuracy"] = round(acc, 4)
+            if ref_probs is None:
+                ref_probs, ref_acc = probs, acc
+            else:
+                row["accuracy_delta"] = round(acc - ref_acc, 4)
+                row["top1_agreement"] = round(float((probs.argmax(1) == ref_probs.argmax(1)).mean()), 4)
+                row["mean_abs_prob_delta"] = round(float(np.abs(probs - ref_probs).mean()), 5)
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the emotion CNN to TFLite / ONNX.")
+    parser.add_argument("--variants", nargs="+", default=["fp16", "int8"], choices=["fp16", "int8", "onnx"])
+    parser.add_argument("--calib-samples", type=int, default=300)
+    parser.add_argument("--eval-samples", type=int, default=2000)
+    parser.add_argument("--train-dir", default=TRAIN_DIR)
+    parser.add_argument("--test-dir", default=TEST_DIR)
+    args = parser.parse_args()
+
+    if not os.path.exists(MODEL_PATH):
+        raise FileNotFoundError(f"Model not found at {MODEL_PATH}. Run `python src/train.py` first.")
+
+    from tensorflow.keras.models import load_model
+    model = load_model(MODEL_PATH)
+    names = ["keras"]
+
+    if "fp16" in args.variants:
+        export_fp16(model)
+        names.append("tflite-fp16")
+        print(f"[SUCCESS] float16 TFLite -> {TFLITE_FP16_PATH}")
+
+    if "int8" in args.variants:
+        if not os.path.exists(args.train_dir):
+            raise FileNotFoundError(f"int8 calibration needs training images at {args.train_dir}.")
+        calib, _ = load_samples(args.train_dir, args.calib_samples)
+        export_int8(model, calib)
+        names.append("tflite-int8")
+        print(f"[SUCCESS] int8 TFLite ({len(calib)} calibration images) -> {TFLITE_INT8_PATH}")
+
+    if "onnx" in args.variants:
+        try:
+            export_onnx(model)
+            names.append("onnx")
+            print(f"[SUCCESS] ONNX -> {ONNX_PATH}")
+        except ImportError:
+            print("[WARNING] ONNX export skipped — `pip install tf2onnx onnxruntime` to enable it.")
+        except Exception as e:
+            print(f"[ERROR] ONNX export failed: {e}")
+
+    x = y = None
+    if os.path.exists(args.test_dir):
+        x, y = load_samples(args.test_dir, args.eval_samples, seed=1)
+    else:
+        print(f"[WARNING] No test set at {args.test_dir} — accuracy columns skipped.")
+
+    rows = build_report(names, x, y)
+    with open(REPORT_PATH, "w") as f:
+        json.dump({"eval_samples": 0 if x is None else len(x), "classes": EMOTIONS, "variants": rows}, f, indent=2)
+
+    print(f"\n{'backend':<12} {'size MB':>8} {'ms/face':>8} {'acc':>7} {'Δacc':>7} {'agree':>7}")
+    for r in rows:
+        print(f"{r['backend']:<12} {r['size_mb']:>8.2f} {r['p50_ms_per_face']:>8.3f} "
+              f"{r.get('accuracy', float('nan')):>7.4f} {r.get('accuracy_delta', 0.0):>+7.4f} "
+              f"{r.get('top1_agreement', 1.0):>7.4f}")
+    print(f"\nReport written to {REPORT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+frame_ring.py — Single-writer frame ring in shared memory.
+The capture process decodes straight into the next slot (cv2 `read(image=...)`
+fills the array in place). Readers in other processes get numpy views on the
+same memory, with no pickling or pipe copy. Every slot carries the sequence
+number of the frame in it. A reader takes a view, works on it, then calls
+`valid(seq)` to learn whether the writer lapped it in the meantime, in
+which case the result is discarded (a seqlock, minus the spinning).
+
+Layout: int64 header [magic, slots, h, w, c, head, writer_closed, 0],
+int64 slot sequence numbers, float64 capture timestamps, then 64-byte
+aligned uint8 frames of shape (slots, h, w, c).
+"""
+import time
+import numpy as np
+from multiprocessing.shared_memory import SharedMemory
+from src.config import FRAME_RING_SLOTS
+
+_MAGIC = 0x43585652          # "CXVR"
+_HEAD, _CLOSED = 5, 6
+
+
+def _layout(slots, shape):
+    seq_off = 64
+    stamp_off = seq_off + 8 * slots
+    frame_off = -(-(stamp_off + 8 * slots) // 64) * 64
+    return seq_off, stamp_off, frame_off, frame_off + slots * int(np.prod(shape))
+
+
+class FrameRing:
+
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+        self._hdr = np.ndarray((8,), np.int64, shm.buf, 0)
+        if self._hdr[0] != _MAGIC:
+            raise ValueError(f"Shared memory '{shm.name}' is not a frame ring")
+        self.slots = int(self._hdr[1])
+        self.shape = tuple(int(v) for v in self._hdr[2:5])
+        seq_off, stamp_off, frame_off, _ = _layout(self.slots, self.shape)
+        self._seq = np.ndarray((self.slots,), np.int64, shm.buf, seq_off)
+        self._stamps = np.ndarray((self.slots,), np.float64, shm.buf, stamp_off)
+        self._frames = np.ndarray((self.slots, *self.shape), np.uint8, shm.buf, frame_off)
+
+    @classmethod
+    def create(cls, shape, slots=FRAME_RING_SLOTS):
+        """Allocate a ring for frames of `shape` (h, w, c). The creator unlinks it on close()."""
+        if len(shape) == 2:
+            shape = (*shape, 1)
+        shm = SharedMemory(create=True, size=_layout(slots, shape)[3])
+        hdr = np.ndarray((8,), np.int64, shm.buf, 0)
+        hdr[:] = (_MAGIC, slots, *shape, 0, 0, 0)
+        del hdr
+        ring = cls(shm, owner=True)
+        ring._seq[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name):
+        return cls(SharedMemory(name=name))
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def head(self):
+        """Sequence number of the newest committed frame (0 = none yet)."""
+        return int(self._hdr[_HEAD])
+
+    @property
+    def writer_closed(self):
+        return bool(self._hdr[_CLOSED])
+
+    # ── writer ──────────────────────────────────────────────
+    def begin_write(self):
+        """Claim the next slot. Returns (seq, view); fill the view, then `commit(seq, stamp)`."""
+        seq = self.head + 1
+        i = seq % self.slots
+        self._seq[i] = 0                 # the frame being replaced is no longer valid
+        return seq, self._frames[i].reshape(self.shape if self.shape[2] > 1 else self.shape[:2])
+
+    def commit(self, seq, stamp):
+        i = seq % self.slots
+        self._stamps[i] = stamp
+        self._seq[i] = seq
+        self._hdr[_HEAD] = seq
+
+    def close_writer(self):
+        self._hdr[_CLOSED] = 1
+
+    # ── readers ─────────────────────────────────────────────
+    def wait(self, after, timeout=None, poll=0.0005):
+        """Newest seq greater than `after`, or None on timeout or once the writer has closed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            head = self.head
+            if head > after:
+                return head
+            if self.writer_closed or (deadline is not None and time.monotonic() >= deadline):
+                return None
+            time.sleep(poll)
+
+    def valid(self, seq):
+        return seq > 0 and int(self._seq[seq % self.slots]) == seq
+
+    def view(self, seq):
+        """Zero-copy (frame, stamp) for `seq`, or (None, None) if it was overwritten. Re-check `valid(seq)` after use."""
+        i = seq % self.slots
+        if int(self._seq[i]) != seq:
+            return None, None
+        frame = self._frames[i]
+        return (frame if self.shape[2] > 1 else frame[..., 0]), float(self._stamps[i])
+
+    def read(self, seq):
+        """Private copy of frame `seq`, or None if it was overwritten before or during the copy."""
+        frame, _ = self.view(seq)
+        if frame is None:
+            return None
+        frame = frame.copy()
+        return frame if self.valid(seq) else None
+
+    def close(self):
+        self._hdr = self._seq = self._stamps = self._frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass                         # a caller still holds a view; the mapping goes with the process
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
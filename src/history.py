@@ -0,0 +1,126 @@
+"""
+history.py — Fixed-capacity emotion history.
+Timestamps, emotion indices and 7-way probabilities live in preallocated
+NumPy rings, so memory stays flat however long a kiosk session runs.
+Rolling mean / std over the last `stability_window` detections are kept
+incrementally (O(1) per append). Optionally, the oldest block is averaged
+into per-second bins and appended to a CSV just before it is overwritten.
+"""
+import os
+import numpy as np
+from src.config import (
+    EMOTIONS, HISTORY_CAPACITY, STABILITY_WINDOW,
+    HISTORY_SPILL_PATH, HISTORY_SPILL_BIN_S
+)
+
+_SPILL_BLOCK = 1024
+
+
+class EmotionHistory:
+
+    def __init__(self, capacity=HISTORY_CAPACITY, stability_window=STABILITY_WINDOW,
+                 spill_path=HISTORY_SPILL_PATH, spill_bin_s=HISTORY_SPILL_BIN_S):
+        self.block = min(_SPILL_BLOCK, capacity)
+        self.capacity = -(-capacity // self.block) * self.block     # round up to whole blocks
+        self.stability_window = stability_window
+        self.spill_path = spill_path
+        self.spill_bin_s = spill_bin_s
+
+        self.ts = np.zeros(self.capacity, dtype="float64")
+        self.idx = np.zeros(self.capacity, dtype="int8")
+        self.probs = np.zeros((self.capacity, len(EMOTIONS)), dtype="float32")
+        self._head = 0          # next write position
+        self._size = 0
+        self.total = 0          # appends over the whole session
+        self._sum = 0           # over the last `stability_window` indices
+        self._sumsq = 0
+
+    def __len__(self):
+        return self._size
+
+    # ── writes ──────────────────────────────────────────────
+    def append(self, ts, emo_idx, probs=None):
+        k = self.stability_window
+        if self._size >= k:
+            leaving = int(self.idx[(self._head - k) % self.capacity])
+            self._sum -= leaving
+            self._sumsq -= leaving * leaving
+        self._sum += emo_idx
+        self._sumsq += emo_idx * emo_idx
+
+        if self._size == self.capacity and self._head % self.block == 0 and self.spill_path:
+            self._spill(self._head, self._head + self.block)
+
+        h = self._head
+        self.ts[h] = ts
+        self.idx[h] = emo_idx
+        if probs is not None:
+            self.probs[h] = probs
+        self._head = (h + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self.total += 1
+
+    def clear(self):
+        self._head = self._size = self.total = 0
+        self._sum = self._sumsq = 0
+
+    # ── rolling statistics ──────────────────────────────────
+    def rolling_mean(self):
+        n = min(self._size, self.stability_window)
+        return self._sum / n if n else 0.0
+
+    def rolling_std(self):
+        n = min(self._size, self.stability_window)
+        if not n:
+            return 0.0
+        mean = self._sum / n
+        return float(np.sqrt(max(0.0, self._sumsq / n - mean * mean)))
+
+    def stability(self, default=None):
+        """0-100 score from the spread of recent emotion indices (needs > window samples)."""
+        if self._size <= self.stability_window:
+            return default
+        return max(0.0, min(100.0, 100 - self.rolling_std() * 20))
+
+    # ── queries ─────────────────────────────────────────────
+    def _order(self, n=None):
+        """Ring positions of the newest `n` entries, oldest first."""
+        n = self._size if n is None else min(n, self._size)
+        return (np.arange(self._head - n, self._head)) % self.capacity
+
+    def last(self, n):
+        """Emotion indices of the newest `n` entries, oldest first."""
+        return self.idx[self._order(n)]
+
+    def since(self, t0):
+        """(ts, idx, probs) for every entry with timestamp >= t0, oldest first."""
+        order = self._order()
+        start = int(np.searchsorted(self.ts[order], t0, side="left"))
+        sel = order[start:]
+        return self.ts[sel], self.idx[sel], self.probs[sel]
+
+    def window(self, seconds, now, max_points=None):
+        """Emotion indices from the last `seconds`, evenly thinned to `max_points`."""
+        _, idx, _ = self.since(now - seconds)
+        if max_points and len(idx) > max_points:
+            idx = idx[np.linspace(0, len(idx) - 1, max_points).astype(int)]
+        return idx
+
+    # ── disk spill ──────────────────────────────────────────
+    def _spill(self, lo, hi):
+        """Average rows [lo, hi) into `spill_bin_s` bins and append them to the CSV."""
+        ts, idx, probs = self.ts[lo:hi], self.idx[lo:hi], self.probs[lo:hi]
+        bins, inverse = np.unique(np.floor(ts / self.spill_bin_s), return_inverse=True)
+        counts = np.bincount(inverse)
+        mean_probs = np.zeros((len(bins), probs.shape[1]), dtype="float64")
+        np.add.at(mean_probs, inverse, probs)
+        mean_probs /= counts[:, None]
+        votes = np.zeros((len(bins), len(EMOTIONS)), dtype="int64")
+        np.add.at(votes, (inverse, idx), 1)
+
+        new_file = not os.path.exists(self.spill_path)
+        with open(self.spill_path, "a") as f:
+            if new_file:
+                f.write("bin_start,count,dominant," + ",".join(EMOTIONS) + "\n")
+            for b, c, v, p in zip(bins, counts, votes.argmax(1), mean_probs):
+                f.write(f"{b * self.spill_bin_s:.3f},{c},{EMOTIONS[v]}," + ",".join(f"{x:.4f}" for x in p) + "\n")
@@ -0,0 +1,284 @@
+"""
+inference_daemon.py — One resident model shared by every dashboard session.
+
+    python -m src.inference_daemon [--socket /tmp/cortex-infer.sock] [--max-batch 32] [--max-wait-ms 5]
+
+Each Streamlit session or worker process normally loads its own copy of the
+CNN. With INFERENCE_DAEMON_SOCKET = True in src/config.py, `src.predictor` instead
+talks to this daemon over a Unix socket through `DaemonClient`, and never
+imports TensorFlow. Every connection is served on its own thread, and all
+crops go through one MicroBatcher, so faces from concurrent sessions share a
+forward pass.
+
+Wire format (little-endian):
+    request   <BI  op, n        op 0 = predict, followed by n * 48 * 48 uint8 crops
+                                op 1 = stats (n = 0)
+    response  <BI  status, size status 0 = ok, followed by `size` bytes:
+                                (n, 7) float32 probs for predict, JSON for stats;
+                                status 1 = error, followed by a UTF-8 message
+"""
+import os
+import json
+import time
+import struct
+import socket
+import argparse
+import threading
+import socketserver
+import numpy as np
+from src.config import (
+    IMG_SIZE, EMOTIONS, INFERENCE_BACKEND, INFERENCE_DAEMON_PATH,
+    INFERENCE_DAEMON_TIMEOUT_S, INFERENCE_DAEMON_RETRY_MAX_S, SERVER_MAX_BATCH, SERVER_MAX_WAIT_MS
+)
+from src.batching import MicroBatcher
+from src.backends import load_backend
+
+_HEADER = struct.Struct("<BI")
+OP_PREDICT, OP_STATS = 0, 1
+OK, ERROR = 0, 1
+_CROP_BYTES = IMG_SIZE * IMG_SIZE
+_MAX_CROPS = 4096
+
+
+def _recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:], n - got)
+        if not k:
+            raise ConnectionError("connection closed")
+        got += k
+    return buf
+
+
+class DaemonClient:
+    """
+    Backend-shaped client: `predict(batch) -> (N, 7)` like the local engines.
+    Each calling thread keeps its own persistent connection, so the capture
+    pipeline, video analysis and the UI of one process never serialise on
+    a socket. Crops travel as uint8, a quarter the size of the float batch.
+    While the daemon is unreachable, calls fail fast with ConnectionError and
+    a reconnect is attempted after an exponential backoff (0.5s doubling up to
+    `retry_max_s`), so a session recovers on its own once the daemon is back.
+    """
+
+    name = "daemon"
+
+    def __init__(self, path=INFERENCE_DAEMON_PATH, timeout=INFERENCE_DAEMON_TIMEOUT_S,
+                 retry_max_s=INFERENCE_DAEMON_RETRY_MAX_S):
+        self.path = path
+        self.timeout = timeout
+        self.retry_max_s = retry_max_s
+        self._local = threading.local()
+        self._retry_lock = threading.Lock()
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self.reconnects = 0
+
+    @property
+    def available(self):
+        """False while in reconnect backoff after a failed connect."""
+        return self._backoff == 0.0
+
+    def _conn(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            with self._retry_lock:
+                wait = self._retry_at - time.monotonic()
+            if wait > 0:
+                raise ConnectionError(f"inference daemon at {self.path} is down; reconnecting with backoff")
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                with self._retry_lock:
+                    self._backoff = min(self.retry_max_s, max(0.5, self._backoff * 2))
+                    self._retry_at = time.monotonic() + self._backoff
+                raise
+            with self._retry_lock:
+                if self._backoff:
+                    self.reconnects += 1
+                self._backoff = self._retry_at = 0.0
+            self._local.sock = sock
+        return sock
+
+    def _drop(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _call(self, op, n=0, payload=b""):
+        # One retry on a fresh connection covers a daemon restart between calls
+        for attempt in (0, 1):
+            try:
+                sock = self._conn()
+                sock.sendall(_HEADER.pack(op, n) + payload)
+                status, size = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+                body = _recv_exact(sock, size)
+                break
+            except OSError as e:
+                self._drop()           # a timeout leaves a half-read reply on the socket
+                if attempt or not isinstance(e, ConnectionError):
+                    raise
+        if status != OK:
+            raise RuntimeError(f"Inference daemon: {bytes(body).decode(errors='replace')}")
+        return body
+
+    def predict_crops(self, crops):
+        """(N, 48, 48) uint8 crops → (N, 7) float32 probs."""
+        n = len(crops)
+        if n == 0:
+            return np.zeros((0, len(EMOTIONS)), dtype="float32")
+        body = self._call(OP_PREDICT, n, np.ascontiguousarray(crops, dtype=np.uint8).tobytes())
+        return np.frombuffer(body, dtype="float32").reshape(n, len(EMOTIONS))
+
+    def predict(self, batch):
+        """(N, 48, 48, 1) float32 in [0, 1] → (N, 7). Inputs come from uint8 crops, so this is lossless."""
+        crops = np.rint(np.asarray(batch).reshape(len(batch), IMG_SIZE, IMG_SIZE) * 255.0)
+        return self.predict_crops(crops.astype(np.uint8))
+
+    def warmup(self):
+        self.predict_crops(np.zeros((1, IMG_SIZE, IMG_SIZE), dtype=np.uint8))
+
+    def stats(self):
+        return json.loads(bytes(self._call(OP_STATS)))
+
+    def close(self):
+        self._drop()
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class InferenceDaemon:
+
+    def __init__(self, path=INFERENCE_DAEMON_PATH, batcher=None, timeout=10.0):
+        self.path = path
+        self.batcher = batcher
+        self.timeout = timeout
+        self.backend = None
+        self._server = None
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.active = 0
+        self.errors = 0
+
+    def _handle(self, op, n, sock):
+        if op == OP_STATS:
+            with self._lock:
+                conns = {"total": self.connections, "active": self.active, "errors": self.errors}
+            return json.dumps({"backend": self.backend, "batcher": self.batcher.stats(),
+                               "connections": conns}).encode()
+        if op != OP_PREDICT:
+            raise ValueError(f"unknown op {op}")
+        if not 0 < n <= _MAX_CROPS:
+            raise ValueError(f"crop count {n} out of range")
+        crops = np.frombuffer(_recv_exact(sock, n * _CROP_BYTES), dtype=np.uint8)
+        batch = crops.reshape(n, IMG_SIZE, IMG_SIZE, 1).astype("float32")
+        batch /= 255.0
+        probs = self.batcher.submit(batch).result(self.timeout)
+        return np.ascontiguousarray(probs, dtype="float32").tobytes()
+
+    def start(self):
+        """Load the model, start the batcher and listen on the socket in a background thread."""
+        if self._server is not None:
+            return self
+        self._claim_socket()
+        if self.batcher is None:
+            engine = load_backend(INFERENCE_BACKEND)
+            self.backend = engine.name
+            self.batcher = MicroBatcher(engine.predict)
+        self.batcher.start()
+        daemon = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                sock = self.request
+                with daemon._lock:
+                    daemon.connections += 1
+                    daemon.active += 1
+                try:
+                    while True:
+                        try:
+                            op, n = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+                        except ConnectionError:
+                            return
+                        try:
+                            body, status = daemon._handle(op, n, sock), OK
+                        except ConnectionError:
+                            return
+                        except Exception as e:
+                            with daemon._lock:
+                                daemon.errors += 1
+                            body, status = str(e).encode(), ERROR
+                        sock.sendall(_HEADER.pack(status, len(body)) + body)
+                        if status == ERROR and op == OP_PREDICT:
+                            return       # the crop payload may not have been read; resync by reconnecting
+                finally:
+                    with daemon._lock:
+                        daemon.active -= 1
+
+        self._server = _UnixServer(self.path, Handler)
+        os.chmod(self.path, 0o660)
+        threading.Thread(target=self._server.serve_forever, name="cortex-daemon", daemon=True).start()
+        return self
+
+    def _claim_socket(self):
+        """Remove a stale socket file, but refuse to steal one a live daemon is listening on."""
+        if not os.path.exists(self.path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except OSError:
+            os.unlink(self.path)
+        else:
+            raise RuntimeError(f"Another inference daemon is already listening on {self.path}")
+        finally:
+            probe.close()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+        if self.batcher is not None:
+            self.batcher.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cortex-V shared inference daemon (Unix socket).")
+    parser.add_argument("--socket", default=INFERENCE_DAEMON_PATH)
+    parser.add_argument("--backend", default=INFERENCE_BACKEND)
+    parser.add_argument("--max-batch", type=int, default=SERVER_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=SERVER_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    # The daemon always loads the model itself, whatever INFERENCE_DAEMON_SOCKET says
+    try:
+        engine = load_backend(args.backend)
+    except FileNotFoundError as e:
+        raise SystemExit(f"Model not found at: {e}")
+    daemon = InferenceDaemon(args.socket, MicroBatcher(engine.predict, args.max_batch, args.max_wait_ms))
+    daemon.backend = engine.name
+    daemon.start()
+    print(f"[SUCCESS] Serving {engine.name} on {args.socket} "
+          f"(max batch {args.max_batch}, max wait {args.max_wait_ms} ms)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+input_pipeline.py — tf.data input pipeline for train.py.
+Replaces ImageDataGenerator.flow_from_directory: files are decoded in
+parallel, the decoded uint8 images are cached in memory after the first
+epoch, and augmentation runs on whole batches as one projective-transform
+op (rotation, shift, shear, zoom and horizontal flip folded into a single
+matrix per image), with batches prefetched while the model trains.
+
+`root` may also be a packed shard from src/dataset_pack.py, in which case
+batches are gathered straight out of the memory-mapped array (no decode,
+no cache needed).
+
+Imports nothing from src.config so it works both from `python src/train.py`
+(imported as `input_pipeline`) and from the benchmarks (`src.input_pipeline`).
+"""
+import os
+import math
+import cv2
+import numpy as np
+import tensorflow as tf
+
+try:
+    from src.dataset_pack import list_images, is_packed, PackedDataset
+except ImportError:          # run as `python src/train.py`
+    from dataset_pack import list_images, is_packed, PackedDataset
+
+AUTOTUNE = tf.data.AUTOTUNE
+# tf.io.decode_image handles these; anything else list_images accepts (.ppm, .tif…) goes through OpenCV
+_TF_DECODABLE = r"(?i).*\.(png|jpe?g|bmp|gif)"
+
+# Mirrors the ImageDataGenerator settings train.py used
+DEFAULT_AUGMENT = {
+    "rotation_range": 20,        # degrees
+    "width_shift_range": 0.1,    # fraction of width
+    "height_shift_range": 0.1,   # fraction of height
+    "shear_range": 0.1,          # degrees, as in Keras
+    "zoom_range": 0.1,           # zoom factor drawn from [1 - z, 1 + z] per axis
+    "horizontal_flip": True,
+}
+
+
+def _cv2_gray(path):
+    img = cv2.imread(path.decode(), cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        raise ValueError(f"Could not decode {path.decode()}")
+    return img[..., None]
+
+
+def _decode(img_size):
+    def native(path):
+        return tf.io.decode_image(tf.io.read_file(path), channels=1, expand_animations=False)
+
+    def fallback(path):
+        img = tf.numpy_function(_cv2_gray, [path], tf.uint8)
+        img.set_shape((None, None, 1))
+        return img
+
+    def decode(path, label):
+        img = tf.cond(tf.strings.regex_full_match(path, _TF_DECODABLE),
+                      lambda: native(path), lambda: fallback(path))
+        img = tf.image.resize(img, (img_size, img_size), method="nearest")
+        return tf.cast(img, tf.uint8), label
+    return decode
+
+
+def _augment_matrices(n, height, width, cfg):
+    """(n, 8) projective transforms mapping output pixels to input pixels."""
+    def uniform(r):
+        return tf.random.uniform((n,), -r, r) if r else tf.zeros((n,))
+
+    theta = uniform(cfg["rotation_range"]) * (math.pi / 180)
+    shear = uniform(cfg["shear_range"]) * (math.pi / 180)
+    tx = uniform(cfg["width_shift_range"]) * width
+    ty = uniform(cfg["height_shift_range"]) * height
+    z = cfg["zoom_range"]
+    zx = 1 + uniform(z)
+    zy = 1 + uniform(z)
+    flip = (tf.random.uniform((n,)) < 0.5) if cfg["horizontal_flip"] else tf.zeros((n,), bool)
+    fx = tf.where(flip, -1.0, 1.0)
+
+    cos, sin = tf.cos(theta), tf.sin(theta)
+    cx, cy = (width - 1) / 2, (height - 1) / 2
+    # A = rotation @ shear @ zoom @ flip (the flip is about the centre)
+    a00 = cos * zx * fx
+    a01 = (-cos * tf.sin(shear) - sin * tf.cos(shear)) * zy
+    a10 = sin * zx * fx
+    a11 = (-sin * tf.sin(shear) + cos * tf.cos(shear)) * zy
+    # Translation so A acts about the image centre, then shift by (tx, ty)
+    b0 = cx - a00 * cx - a01 * cy + tx
+    b1 = cy - a10 * cx - a11 * cy + ty
+    zeros = tf.zeros((n,))
+    return tf.stack([a00, a01, b0, a10, a11, b1, zeros, zeros], axis=1)
+
+
+def augment_batch(images, cfg=None):
+    """Randomly transform a float (N, H, W, C) batch; one op for the whole batch."""
+    cfg = DEFAULT_AUGMENT if cfg is None else cfg
+    shape = tf.shape(images)
+    transforms = _augment_matrices(shape[0], tf.cast(shape[1], tf.float32),
+                                   tf.cast(shape[2], tf.float32), cfg)
+    return tf.raw_ops.ImageProjectiveTransformV3(
+        images=images, transforms=transforms, output_shape=shape[1:3],
+        fill_value=0.0, interpolation="BILINEAR", fill_mode="NEAREST",
+    )
+
+
+def make_dataset(root, img_size=48, batch_size=64, training=True, augment=None,
+                 cache=True, repeat=None, seed=None):
+    """
+    Build the input pipeline for one split.
+    Returns (dataset, labels, class_names); `labels` is the per-file class
+    index (flow_from_directory's `.classes`) for class weights. Batches are
+    (float32 images scaled to [0, 1], one-hot labels). Training data is
+    shuffled, augmented and repeated forever (as the generator was), so
+    pass steps_per_epoch to fit().
+    """
+    if is_packed(root):
+        return _packed_dataset(PackedDataset(root), batch_size, training, augment, repeat, seed)
+    paths, labels, class_names = list_images(root)
+    if not paths:
+        raise FileNotFoundError(f"No images found under {root}")
+    repeat = training if repeat is None else repeat
+
+    ds = tf.data.Dataset.from_tensor_slices((paths, labels))
+    ds = ds.map(_decode(img_size), num_parallel_calls=AUTOTUNE, deterministic=not training)
+    if cache:
+        ds = ds.cache()          # uint8, ~2.3 KB per 48x48 face
+    if training:
+        ds = ds.shuffle(len(paths), seed=seed, reshuffle_each_iteration=True)
+    if repeat:
+        ds = ds.repeat()
+    ds = ds.batch(batch_size)
+    return _finish(ds, len(class_names), training, augment), labels, class_names
+
+
+def _packed_dataset(packed, batch_size, training, augment, repeat, seed):
+    """Shuffle indices, then gather each batch from the memmap in one read."""
+    repeat = training if repeat is None else repeat
+    size = packed.img_size
+    ds = tf.data.Dataset.range(len(packed))
+    if training:
+        ds = ds.shuffle(len(packed), seed=seed, reshuffle_each_iteration=True)
+    if repeat:
+        ds = ds.repeat()
+    ds = ds.batch(batch_size)
+
+    def gather(idx):
+        idx = np.sort(idx)
+        return packed.images[idx][..., None], packed.labels[idx].astype("int32")
+
+    def load(idx):
+        x, y = tf.numpy_function(gather, [idx], (tf.uint8, tf.int32))
+        x.set_shape((None, size, size, 1))
+        y.set_shape((None,))
+        return x, y
+
+    ds = ds.map(load, num_parallel_calls=AUTOTUNE, deterministic=not training)
+    labels = np.asarray(packed.labels, dtype="int32")
+    return _finish(ds, len(packed.class_names), training, augment), labels, packed.class_names
+
+
+def _finish(ds, num_classes, training, augment):
+    def to_float(x, y):
+        return tf.cast(x, tf.float32) / 255.0, tf.one_hot(y, num_classes)
+
+    ds = ds.map(to_float, num_parallel_calls=AUTOTUNE)
+    if training and augment is not False:
+        cfg = augment if isinstance(augment, dict) else None
+        ds = ds.map(lambda x, y: (augment_batch(x, cfg), y), num_parallel_calls=AUTOTUNE)
+    return ds.prefetch(AUTOTUNE)
@@ -0,0 +1,205 @@
+"""
+live_engine.py — Live-scan state that survives Streamlit reruns.
+Streamlit re-executes app.py on every widget interaction, which used to
+reopen the camera and rebuild the smoother each time. A LiveEngine is
+kept in st.session_state and owns the camera, the capture/inference
+pipeline (with its tracker and detector), the model handle, the track
+smoother, the frame encoder and the voice worker. A rerun only re-attaches
+the UI loop. `configure()` applies sidebar settings in place: it resizes
+the smoother window, switches the capture resolution on the running
+camera and toggles voice. With PIPELINE_MODE = "processes", the engine
+runs a ProcessPipeline instead. Its capture ring is sized for the first
+frame, so there a resolution change restarts the pipeline. With recording
+on, every frame the UI consumes is appended to a SessionRecorder file.
+
+A watchdog releases the camera once no UI loop has read a frame for
+LIVE_IDLE_TIMEOUT_S, for example after the browser tab is closed mid-scan.
+Metrics go to the `session` scope of the shared registry, so concurrent
+sessions (and replays) never reset or replace each other's timings and
+providers; an idle stop drops the scope.
+"""
+import time
+import threading
+import cv2
+from src.config import (
+    CAMERA_INDEX, LIVE_IDLE_TIMEOUT_S, PIPELINE_MODE, TRANSPORT_MODE, MJPEG_HOST, MJPEG_PORT, INFERENCE_BACKEND
+)
+from src.pipeline import Pipeline
+from src.process_pipeline import ProcessPipeline
+from src.predictor import get_engine, model_status
+from src.smoothing import TrackSmoother
+from src.transport import FrameEncoder, get_mjpeg_server
+from src.voice import get_voice_worker, reset_last_emotion
+from src.metrics import metrics
+from src.recording import SessionRecorder, new_recording_path
+
+
+class LiveEngine:
+
+    def __init__(self, camera_index=CAMERA_INDEX, idle_timeout=LIVE_IDLE_TIMEOUT_S, mode=PIPELINE_MODE,
+                 session=None):
+        self.camera_index = camera_index
+        self.session = session
+        self.metrics = metrics.scope(session) if session else metrics
+        self.idle_timeout = idle_timeout
+        self.mode = mode
+        self.smoother = TrackSmoother()
+        self.encoder = FrameEncoder(fmt="jpeg") if TRANSPORT_MODE == "mjpeg" else FrameEncoder()
+        self.mjpeg = None
+        self.model = None
+        self.voice = None
+        self.voice_on = True
+        self.record = False
+        self.recorder = None
+        self.resolution = None
+        self.cap = None
+        self.pipeline = None
+        self._lock = threading.RLock()
+        self._last_read = time.monotonic()
+        self.starts = 0
+        self.resizes = 0
+        self.idle_stops = 0
+
+    # ── settings ────────────────────────────────────────────
+    def configure(self, sensitivity=None, resolution=None, voice=None, record=None):
+        """Apply sidebar settings without touching the camera or the model."""
+        with self._lock:
+            if sensitivity is not None:
+                self.smoother.set_window(sensitivity)
+            if voice is not None:
+                self.voice_on = bool(voice)
+            if record is not None:
+                self.record = bool(record)
+                if not self.record:
+                    self._close_recorder()
+            if resolution is not None and tuple(resolution) != self.resolution:
+                self.resolution = tuple(resolution)
+                if self.pipeline is not None:
+                    self.resizes += 1
+                    if not self.pipeline.set_capture_size(*self.resolution):
+                        self._release()
+                        self.start()
+
+    # ── lifecycle ───────────────────────────────────────────
+    @property
+    def running(self):
+        return self.pipeline is not None and self.pipeline.alive
+
+    def start(self):
+        """Open the camera and start the pipeline unless already running. False if the camera is unavailable."""
+        with self._lock:
+            if self.running:
+                return True
+            self._release()
+            if self.session:
+                self.metrics = metrics.scope(self.session)
+            if self.mode == "processes":
+                try:
+                    pipeline = ProcessPipeline(self.camera_index, self.resolution).start()
+                except IOError:
+                    return False
+            else:
+                self.model = get_engine()
+                cap = cv2.VideoCapture(self.camera_index)
+                if not cap.isOpened():
+                    cap.release()
+                    return False
+                if self.resolution:
+                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
+                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
+                self.cap = cap
+                pipeline = Pipeline(cap).start()
+            if TRANSPORT_MODE == "mjpeg":
+                self.mjpeg = get_mjpeg_server(MJPEG_HOST, MJPEG_PORT)
+            self.voice = get_voice_worker()
+            self.smoother.reset()
+            reset_last_emotion()
+            self.metrics.reset()
+            self.pipeline = pipeline
+            self._last_read = time.monotonic()
+            self.starts += 1
+            self.metrics.register_provider("pipeline", self.pipeline.stats)
+            self.metrics.register_provider("transport", self.encoder.stats)
+            self.metrics.register_provider("voice", self.voice.stats)
+            self.metrics.register_provider("live", self.stats)
+            threading.Thread(target=self._watch, args=(self.pipeline,), name="cortex-live-watchdog",
+                             daemon=True).start()
+            return True
+
+    def model_status(self):
+        """Readiness of the model behind the live scan; in "processes" mode, the inference process's."""
+        if self.mode == "processes":
+            pipeline = self.pipeline
+            return pipeline.model_status if pipeline is not None else "idle"
+        return model_status()
+
+    def stop(self):
+        """Stop the pipeline and release the camera. Settings and smoother state are kept."""
+        with self._lock:
+            self._release()
+
+    def _release(self):
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            self.pipeline = None
+            for name in ("pipeline", "transport", "voice", "live"):
+                self.metrics.unregister_provider(name)
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        self._close_recorder()
+
+    def _close_recorder(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def _watch(self, pipeline):
+        # One watchdog per start; it exits as soon as its pipeline is gone
+        while pipeline is self.pipeline and pipeline.alive:
+            time.sleep(1.0)
+            if getattr(pipeline, "model_status", "ready") == "loading":
+                # The UI is waiting for the inference process's model, not reading frames yet
+                self._last_read = time.monotonic()
+                continue
+            if time.monotonic() - self._last_read > self.idle_timeout:
+                with self._lock:
+                    if pipeline is self.pipeline:
+                        self.idle_stops += 1
+                        self._release()
+                        if self.session:
+                            metrics.drop_scope(self.session)
+                return
+
+    # ── per frame ───────────────────────────────────────────
+    def get(self, timeout=None):
+        """Next FrameResult, or None if nothing arrived within `timeout` (or the engine is stopped)."""
+        self._last_read = time.monotonic()
+        pipeline = self.pipeline
+        return pipeline.get(timeout) if pipeline is not None else None
+
+    def record_frame(self, result):
+        """Append the frame's raw predictions to the session recording, if recording is on."""
+        if not self.record:
+            return
+        if self.recorder is None:
+            self.recorder = SessionRecorder(new_recording_path(), {
+                "frame_size": list(result.frame.shape[:2]),
+                "source": str(self.camera_index),
+                "backend": getattr(self.model, "name", None) or INFERENCE_BACKEND,
+            })
+        self.recorder.add(result.captured_at, [t.id for t in result.tracks], result.boxes, result.probs)
+
+    def speak(self, emotion):
+        if self.voice_on and self.voice is not None:
+            self.voice.submit(emotion)
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "starts": self.starts,
+            "resizes": self.resizes,
+            "idle_stops": self.idle_stops,
+            "smooth_window": self.smoother.window,
+            "recording": self.recorder.path if self.recorder is not None else None,
+        }
@@ -0,0 +1,354 @@
+"""
+metrics.py — Lightweight per-stage latency instrumentation.
+Every stage of the live path (capture, gray, detect, preprocess, inference,
+smooth, annotate, encode, render) records its duration into a rolling
+window of recent samples plus cumulative histogram buckets. The UI reads
+`hud()` for the scanner overlay; `MetricsExporter` serves the same data on
+a local port (Prometheus text at /metrics, JSON at /metrics.json) and/or
+rewrites a JSON file periodically, for watching unattended kiosks.
+
+    from src.metrics import metrics
+    with metrics.time("detect"):
+        ...
+
+Streamlit serves every browser session from one process, so each session
+gets its own child registry: `metrics.bind(metrics.scope(session_id))` on a
+thread routes that thread's `metrics.*` calls to the session's histograms,
+frame times, gauges and providers. Pipeline threads bind to the scope of
+the thread that built them. Unbound threads (the server, the daemon) use the
+root registry. The exporter shows the root plus every scope under
+"sessions", and labels histograms with `session`. A scope untouched (no
+rerun, no frame) for METRICS_SCOPE_IDLE_S is evicted, so closed tabs,
+replay-only and stopped sessions do not pile up.
+"""
+import os
+import json
+import time
+import threading
+import functools
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from src.config import (
+    METRICS_ENABLED, METRICS_WINDOW, METRICS_HOST, METRICS_PORT,
+    METRICS_FILE, METRICS_FILE_EVERY_S, METRICS_SCOPE_IDLE_S
+)
+
+STAGES = ("capture", "gray", "detect", "preprocess", "inference",
+          "smooth", "annotate", "encode", "render", "latency")
+BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, float("inf"))
+
+
+class RollingHistogram:
+    """Last `window` samples (ms) for percentiles, plus all-time bucket counts."""
+
+    def __init__(self, window=METRICS_WINDOW):
+        self._buf = np.zeros(window, dtype="float64")
+        self._n = 0
+        self.count = 0
+        self.sum_ms = 0.0
+        self.last_ms = 0.0
+        self.buckets = np.zeros(len(BUCKETS_MS), dtype="int64")
+
+    def add(self, ms):
+        self._buf[self._n % len(self._buf)] = ms
+        self._n += 1
+        self.count += 1
+        self.sum_ms += ms
+        self.last_ms = ms
+        self.buckets[np.searchsorted(BUCKETS_MS, ms)] += 1
+
+    def summary(self):
+        recent = self._buf[:min(self._n, len(self._buf))]
+        if not len(recent):
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(recent, (50, 95, 99))
+        return {"count": self.count, "last_ms": self.last_ms, "mean_ms": float(recent.mean()),
+                "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99),
+                "max_ms": float(recent.max())}
+
+
+def _routed(method):
+    """Forward the call to the scope bound on the calling thread, if any."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        target = self.current()
+        if target is not self:
+            return getattr(target, method.__name__)(*args, **kwargs)
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+class Metrics:
+    """Thread-safe registry of stage histograms, gauges and stats providers."""
+
+    def __init__(self, enabled=METRICS_ENABLED, window=METRICS_WINDOW, name=None,
+                 scope_idle_s=METRICS_SCOPE_IDLE_S):
+        self.enabled = enabled
+        self.window = window
+        self.name = name
+        self.scope_idle_s = scope_idle_s
+        self.last_touched = time.monotonic()
+        self._lock = threading.Lock()
+        self._hist = {}
+        self._gauges = {}
+        self._providers = {}
+        self._scopes = {}
+        self._local = threading.local()
+        self._frame_times = np.zeros(64, dtype="float64")
+        self._frames = 0
+        self.started_at = time.time()
+
+    # ── per-session scopes ──────────────────────────────────
+    def scope(self, name):
+        """Child registry for one session, created on first use (and refreshed as in use)."""
+        self._evict_idle()
+        with self._lock:
+            child = self._scopes.get(name)
+            if child is None:
+                child = self._scopes[name] = Metrics(self.enabled, self.window, name=name)
+            child.last_touched = time.monotonic()
+            return child
+
+    def _evict_idle(self):
+        if not self.scope_idle_s:
+            return
+        cutoff = time.monotonic() - self.scope_idle_s
+        with self._lock:
+            for name in [n for n, child in self._scopes.items() if child.last_touched < cutoff]:
+                del self._scopes[name]
+
+    def drop_scope(self, name):
+        with self._lock:
+            self._scopes.pop(name, None)
+
+    def bind(self, scope):
+        """Route this thread's calls on this registry to `scope` (None = back to this registry)."""
+        self._local.scope = scope
+
+    def current(self):
+        """The registry this thread's calls land in."""
+        return getattr(self._local, "scope", None) or self
+
+    # ── writes ──────────────────────────────────────────────
+    @_routed
+    def observe(self, stage, ms):
+        if not self.enabled:
+            return
+        with self._lock:
+            h = self._hist.get(stage)
+            if h is None:
+                h = self._hist[stage] = RollingHistogram(self.window)
+            h.add(ms)
+        self.last_touched = time.monotonic()
+
+    @contextmanager
+    def time(self, stage):
+        if not self.enabled:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter() - t0) * 1000)
+
+    @_routed
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    @_routed
+    def frame_done(self, captured_at=None):
+        """Mark one frame displayed. With `captured_at` (time.time()) also records end-to-end latency."""
+        now = time.time()
+        with self._lock:
+            self._frame_times[self._frames % len(self._frame_times)] = now
+            self._frames += 1
+        self.last_touched = time.monotonic()
+        if captured_at is not None:
+            self.observe("latency", (now - captured_at) * 1000)
+
+    @_routed
+    def fps(self):
+        with self._lock:
+            n = min(self._frames, len(self._frame_times))
+            if n < 2:
+                return 0.0
+            ts = self._frame_times[:n]
+            span = ts.max() - ts.min()
+            return float((n - 1) / span) if span > 0 else 0.0
+
+    @_routed
+    def register_provider(self, name, fn):
+        """`fn()` returns a (nested) dict included in snapshots, e.g. pipeline.stats."""
+        with self._lock:
+            self._providers[name] = fn
+
+    @_routed
+    def unregister_provider(self, name):
+        with self._lock:
+            self._providers.pop(name, None)
+
+    @_routed
+    def reset(self):
+        """Clear this registry's (or the bound scope's) timings and gauges; other scopes are untouched."""
+        with self._lock:
+            self._hist.clear()
+            self._gauges.clear()
+            self._frames = 0
+
+    # ── reads ───────────────────────────────────────────────
+    @_routed
+    def stage(self, name):
+        with self._lock:
+            h = self._hist.get(name)
+            return h.summary() if h else {"count": 0}
+
+    @_routed
+    def hud(self):
+        """Values for the scanner overlay: fps, resolution label and p50 end-to-end latency."""
+        lat = self.stage("latency")
+        with self._lock:
+            res = self._gauges.get("resolution", "—")
+        return {"fps": self.fps(), "res": res, "latency_ms": lat.get("p50_ms")}
+
+    @_routed
+    def snapshot(self):
+        self._evict_idle()
+        with self._lock:
+            stages = {k: h.summary() for k, h in self._hist.items()}
+            gauges = dict(self._gauges)
+            providers = dict(self._providers)
+            scopes = list(self._scopes.values())
+        extra = {}
+        for name, fn in providers.items():
+            try:
+                extra[name] = fn()
+            except Exception as e:
+                extra[name] = {"error": str(e)}
+        snap = {"time": time.time(), "uptime_s": time.time() - self.started_at, "fps": self.fps(),
+                "stages": stages, "gauges": gauges, **extra}
+        if scopes:
+            snap["sessions"] = {child.name: child.snapshot() for child in scopes}
+        return snap
+
+    def prometheus(self):
+        """Prometheus text exposition: stage histograms plus every numeric leaf of the snapshot."""
+        lines = ["# TYPE cortex_stage_ms histogram"]
+        self._evict_idle()
+        with self._lock:
+            registries = [self] + list(self._scopes.values())
+        for reg in registries:
+            with reg._lock:
+                hists = {k: (h.buckets.copy(), h.sum_ms, h.count) for k, h in reg._hist.items()}
+            session = f'session="{reg.name}",' if reg.name else ""
+            for stage, (buckets, total, count) in hists.items():
+                cum = np.cumsum(buckets)
+                for le, c in zip(BUCKETS_MS, cum):
+                    le_s = "+Inf" if le == float("inf") else f"{le:g}"
+                    lines.append(f'cortex_stage_ms_bucket{{{session}stage="{stage}",le="{le_s}"}} {int(c)}')
+                lines.append(f'cortex_stage_ms_sum{{{session}stage="{stage}"}} {total:.3f}')
+                lines.append(f'cortex_stage_ms_count{{{session}stage="{stage}"}} {count}')
+
+        def flatten(prefix, obj):
+            if isinstance(obj, dict):
+                for k, v in obj.items():
+                    yield from flatten(f"{prefix}_{k}", v)
+            elif isinstance(obj, (bool, int, float, np.integer, np.floating)):
+                yield prefix, float(obj)
+
+        snap = self.snapshot()
+        snap.pop("stages")
+        for child in snap.get("sessions", {}).values():
+            child.pop("stages")
+        for name, value in flatten("cortex", snap):
+            name = "".join(c if c.isalnum() or c == "_" else "_" for c in name)
+            lines.append(f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class MetricsExporter:
+    """Serves /metrics and /metrics.json, and/or rewrites a JSON file every few seconds."""
+
+    def __init__(self, registry=metrics, host=METRICS_HOST, port=METRICS_PORT,
+                 path=METRICS_FILE, every_s=METRICS_FILE_EVERY_S):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.path = path
+        self.every_s = every_s
+        self._httpd = None
+        self._stop = threading.Event()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/metrics" if self.port else None
+
+    def start(self):
+        if self.port and self._httpd is None:
+            registry = self.registry
+
+            class Handler(BaseHTTPRequestHandler):
+                def log_message(self, *args):
+                    pass
+
+                def do_GET(self):
+                    route = self.path.split("?")[0]
+                    if route == "/metrics":
+                        body, ctype = registry.prometheus().encode(), "text/plain; version=0.0.4"
+                    elif route == "/metrics.json":
+                        body, ctype = json.dumps(registry.snapshot(), default=float).encode(), "application/json"
+                    else:
+                        self.send_error(404)
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Type", ctype)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+            self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+            self._httpd.daemon_threads = True
+            threading.Thread(target=self._httpd.serve_forever, name="cortex-metrics", daemon=True).start()
+        if self.path:
+            threading.Thread(target=self._write_loop, name="cortex-metrics-file", daemon=True).start()
+        return self
+
+    def _write_loop(self):
+        while not self._stop.wait(self.every_s):
+            self.write_file()
+
+    def write_file(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.registry.snapshot(), f, indent=2, default=float)
+        os.replace(tmp, self.path)
+
+    def stop(self):
+        self._stop.set()
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_metrics_exporter():
+    """Process-wide MetricsExporter per config, started on first use (None if both outputs are off)."""
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None and (METRICS_PORT or METRICS_FILE):
+            try:
+                _exporter = MetricsExporter().start()
+            except OSError as e:
+                print(f"[WARNING] Metrics exporter not started: {e}")
+                return None
+        return _exporter
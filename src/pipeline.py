@@ -0,0 +1,228 @@
+"""
+pipeline.py — Threaded capture → detect/infer → UI pipeline.
+Each stage runs on its own thread and hands work to the next through a
+bounded DropOldestQueue, so a slow stage sheds stale frames instead of
+stalling the camera. OpenCV and the inference backends release the GIL
+in their hot loops, so capture, detection and the UI genuinely overlap.
+"""
+import time
+import threading
+from collections import deque
+import cv2
+import numpy as np
+from src.config import EMOTIONS
+from src.tracking import FaceTracker
+from src.predictor import predict_faces
+from src.metrics import metrics
+
+
+class DropOldestQueue:
+    """Bounded FIFO whose `put` never blocks: when full, the oldest item is evicted."""
+
+    def __init__(self, maxsize=1):
+        self.maxsize = maxsize
+        self._items = deque()
+        self._cond = threading.Condition()
+        self.puts = 0
+        self.drops = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.drops += 1
+            self._items.append(item)
+            self.puts += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Pop the oldest item, or return None after `timeout` seconds."""
+        with self._cond:
+            if not self._items and not self._cond.wait_for(lambda: self._items, timeout):
+                return None
+            return self._items.popleft()
+
+    def clear(self):
+        with self._cond:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self):
+        return {"depth": len(self._items), "maxsize": self.maxsize, "puts": self.puts, "drops": self.drops}
+
+
+class FrameResult:
+    """Everything the UI needs for one processed frame."""
+
+    __slots__ = ("frame_id", "captured_at", "frame", "gray", "tracks", "emotions", "probs")
+
+    def __init__(self, frame_id, captured_at, frame, gray, tracks, emotions, probs):
+        self.frame_id = frame_id
+        self.captured_at = captured_at
+        self.frame = frame
+        self.gray = gray
+        self.tracks = tracks
+        self.emotions = emotions
+        self.probs = probs
+
+    @property
+    def boxes(self):
+        return [t.box for t in self.tracks]
+
+
+class _Stage(threading.Thread):
+    def __init__(self, name, stop_event):
+        super().__init__(name=name, daemon=True)
+        self._stop_event = stop_event
+        self.processed = 0
+        self.busy_s = 0.0
+        # Timings land in the metrics scope of whoever built the pipeline (its browser session)
+        self.metrics_scope = metrics.current()
+
+
+class CaptureStage(_Stage):
+    """Reads the camera as fast as it delivers; the output queue keeps only the latest frame."""
+
+    def __init__(self, cap, out_q, stop_event):
+        super().__init__("cortex-capture", stop_event)
+        self.cap = cap
+        self.out_q = out_q
+        self.failed = False
+        self._pending_size = None
+
+    def request_size(self, width, height):
+        """Switch the camera resolution between two reads, on the capture thread."""
+        self._pending_size = (int(width), int(height))
+
+    def run(self):
+        metrics.bind(self.metrics_scope)
+        frame_id = 0
+        while not self._stop_event.is_set():
+            size, self._pending_size = self._pending_size, None
+            if size:
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, size[0])
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
+            t0 = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                self.failed = True
+                break
+            dt = time.perf_counter() - t0
+            self.busy_s += dt
+            metrics.observe("capture", dt * 1000)
+            self.out_q.put((frame_id, time.time(), frame))
+            self.processed += 1
+            frame_id += 1
+
+
+class InferenceStage(_Stage):
+    """Tracks faces and runs one batched forward pass per frame."""
+
+    def __init__(self, upstream, in_q, out_q, stop_event, tracker):
+        super().__init__("cortex-inference", stop_event)
+        self.upstream = upstream
+        self.in_q = in_q
+        self.out_q = out_q
+        self.tracker = tracker
+        self.errors = 0
+        self.last_error = None
+
+    def _report(self, e):
+        # Log the first failure and every change of error, not every frame of an outage
+        msg = f"{type(e).__name__}: {e}"
+        if msg != self.last_error:
+            print(f"[ERROR] Inference stage: {msg} (frames keep flowing without predictions)")
+        self.errors += 1
+        self.last_error = msg
+
+    def run(self):
+        metrics.bind(self.metrics_scope)
+        while not self._stop_event.is_set():
+            item = self.in_q.get(timeout=0.1)
+            if item is None:
+                if not self.upstream.is_alive():
+                    break   # source exhausted and queue drained
+                continue
+            frame_id, captured_at, frame = item
+            t0 = time.perf_counter()
+            try:
+                gray, tracks = self.tracker.update(frame)
+                emotions, probs = predict_faces(gray, [t.box for t in tracks])
+            except Exception as e:
+                # e.g. the inference daemon went away; keep the stage (and the video) alive
+                self._report(e)
+                gray, tracks, emotions, probs = None, [], [], np.zeros((0, len(EMOTIONS)), dtype="float32")
+            else:
+                if self.last_error is not None:
+                    print("[SUCCESS] Inference stage recovered.")
+                    self.last_error = None
+            self.busy_s += time.perf_counter() - t0
+            self.out_q.put(FrameResult(frame_id, captured_at, frame, gray, tracks, emotions, probs))
+            self.processed += 1
+
+
+class Pipeline:
+    """
+    Owns the capture and inference threads for one video source.
+
+        pipeline = Pipeline(cv2.VideoCapture(0)).start()
+        while ...:
+            result = pipeline.get(timeout=1.0)   # FrameResult or None
+
+    The caller keeps ownership of `cap` and releases it after `stop()`.
+    """
+
+    def __init__(self, cap, tracker=None, capture_depth=1, result_depth=2):
+        self._stop_event = threading.Event()
+        self.frames = DropOldestQueue(capture_depth)
+        self.results = DropOldestQueue(result_depth)
+        self.capture = CaptureStage(cap, self.frames, self._stop_event)
+        self.inference = InferenceStage(self.capture, self.frames, self.results, self._stop_event, tracker or FaceTracker())
+        self.consumed = 0
+
+    def start(self):
+        self.capture.start()
+        self.inference.start()
+        return self
+
+    def set_capture_size(self, width, height):
+        """Change the camera resolution without reopening it; the tracker restarts on the new size."""
+        self.capture.request_size(width, height)
+        return True
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        for stage in (self.capture, self.inference):
+            if stage.is_alive():
+                stage.join(timeout)
+
+    @property
+    def alive(self):
+        """False once stopped, or once the source is exhausted and every result consumed."""
+        if self._stop_event.is_set():
+            return False
+        return self.inference.is_alive() or len(self.results) > 0
+
+    @property
+    def camera_failed(self):
+        return self.capture.failed
+
+    def get(self, timeout=None):
+        """Next processed frame for the UI, or None if nothing arrived within `timeout`."""
+        result = self.results.get(timeout)
+        if result is not None:
+            self.consumed += 1
+        return result
+
+    def stats(self):
+        """Per-stage queue depth, drop counters and throughput."""
+        return {
+            "capture":   {"frames": self.capture.processed, "busy_s": round(self.capture.busy_s, 3)},
+            "frames_q":  self.frames.stats(),
+            "inference": {"frames": self.inference.processed, "busy_s": round(self.inference.busy_s, 3),
+                          "errors": self.inference.errors, "last_error": self.inference.last_error},
+            "results_q": self.results.stats(),
+            "ui":        {"frames": self.consumed},
+        }
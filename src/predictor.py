@@ -1,34 +1,155 @@
+"""
+predictor.py — Emotion inference front-end.
+Importing this module is cheap: the backend (and TensorFlow with it) is only
+loaded by `load_model()`, `load_model_async()` or the first prediction.
+With INFERENCE_DAEMON_SOCKET the "backend" is a DaemonClient for the shared
+inference daemon, and this process never loads a model at all. The client
+is kept even when the daemon is not up yet: it reconnects with backoff,
+and the status follows the outcome of the latest call.
+"""
+import threading
 import cv2
 import numpy as np
-import os
-from tensorflow.keras.models import load_model
-from src.config import MODEL_PATH, IMG_SIZE, EMOTIONS
+from src.config import IMG_SIZE, EMOTIONS, INFERENCE_BACKEND, INFERENCE_DAEMON_SOCKET, INFERENCE_DAEMON_PATH
+from src.backends import InferenceEngine, load_backend
+from src.metrics import metrics
 
-model = None
+engine = None
+model = None          # raw Keras model, only present on the "keras" backend
 
-if os.path.exists(MODEL_PATH):
+# idle -> loading -> ready | missing | error
+_status = "idle"
+_load_lock = threading.Lock()
+_loaded = threading.Event()
+
+
+def load_model():
+    """Load and warm up the configured backend (once). Returns the engine or None."""
+    global engine, model, _status
+    with _load_lock:
+        if _loaded.is_set():
+            return engine
+        _status = "loading"
+        if INFERENCE_DAEMON_SOCKET:
+            engine = _connect_daemon()
+            _loaded.set()
+            return engine
+        try:
+            engine = load_backend(INFERENCE_BACKEND)
+            model = getattr(engine, "model", None)
+            _status = "ready"
+            print(f"[SUCCESS] Model loaded successfully ({engine.name}).")
+        except FileNotFoundError as e:
+            _status = "missing"
+            print(f"[WARNING] Model not found at: {e}")
+            if INFERENCE_BACKEND == "keras":
+                print("   Run `python src/train.py` to train the model first.")
+            else:
+                print("   Run `python -m src.export` to export the model first.")
+        except Exception as e:
+            _status = "error"
+            print(f"[ERROR] Model load error: {e}")
+        _loaded.set()
+        return engine
+
+
+def _connect_daemon():
+    global _status
+    from src.inference_daemon import DaemonClient
+    client = DaemonClient(INFERENCE_DAEMON_PATH)
+    try:
+        client.warmup()
+    except (OSError, RuntimeError) as e:
+        _status = "error"
+        print(f"[ERROR] Inference daemon unavailable at {INFERENCE_DAEMON_PATH}: {e}")
+        print("   Start it with `python -m src.inference_daemon`; this session reconnects automatically.")
+        return client
+    _status = "ready"
+    print(f"[SUCCESS] Connected to the inference daemon at {INFERENCE_DAEMON_PATH}.")
+    return client
+
+
+def _daemon_predict(batch):
+    """engine.predict for the daemon client, keeping `_status` in step with reachability."""
+    global _status
     try:
-        model = load_model(MODEL_PATH)
-        print("[SUCCESS] Model loaded successfully.")
-    except Exception as e:
-        print(f"[ERROR] Model load error: {e}")
-else:
-    print(f"[WARNING] Model not found at: {MODEL_PATH}")
-    print("   Run `python src/train.py` to train the model first.")
+        probs = engine.predict(batch)
+    except (OSError, RuntimeError):
+        _status = "error"
+        raise
+    _status = "ready"
+    return probs
+
+
+def load_model_async():
+    """Start loading the model in a daemon thread. Safe to call on every rerun."""
+    global _status
+    with _load_lock:
+        if _status != "idle":
+            return
+        _status = "loading"
+    threading.Thread(target=load_model, daemon=True).start()
+
+
+def model_status():
+    """One of 'idle', 'loading', 'ready', 'missing' or 'error'."""
+    return _status
+
+
+def get_engine():
+    """Return the loaded engine, blocking until a background load finishes."""
+    if not _loaded.is_set():
+        load_model()
+    return engine
+
+
+def crop_faces(gray, boxes):
+    """
+    Crop and resize every (x, y, w, h) box of a grayscale frame.
+    Returns a uint8 array of shape (N, IMG_SIZE, IMG_SIZE) — compact enough
+    to ship between processes before normalising.
+    """
+    crops = np.empty((len(boxes), IMG_SIZE, IMG_SIZE), dtype="uint8")
+    for i, (x, y, w, h) in enumerate(boxes):
+        crops[i] = cv2.resize(gray[y:y+h, x:x+w], (IMG_SIZE, IMG_SIZE))
+    return crops
+
+
+def preprocess_faces(gray, boxes):
+    """
+    Crop, resize and normalise every (x, y, w, h) box of a grayscale frame.
+    Returns a float32 batch of shape (N, IMG_SIZE, IMG_SIZE, 1).
+    """
+    batch = crop_faces(gray, boxes)[..., None].astype("float32")
+    batch /= 255.0
+    return batch
+
+def predict_faces(gray, boxes):
+    """
+    Predict emotions for all face boxes of a grayscale frame in one forward pass.
+    Returns (emotions, probs) where emotions is a list of N labels and
+    probs is an (N, 7) array, row i belonging to boxes[i].
+    """
+    n = len(boxes)
+    if n == 0:
+        return [], np.zeros((0, len(EMOTIONS)), dtype="float32")
+    if get_engine() is None:
+        return ["Model Missing"] * n, np.zeros((n, len(EMOTIONS)), dtype="float32")
+
+    with metrics.time("preprocess"):
+        batch = preprocess_faces(gray, boxes)
+    with metrics.time("inference"):
+        probs = _daemon_predict(batch) if INFERENCE_DAEMON_SOCKET else engine.predict(batch)   # shape: (N, 7)
+    emotions = [EMOTIONS[i] for i in np.argmax(probs, axis=1)]
+
+    return emotions, probs
 
 def predict_face(gray_face):
     """
     Predict emotion from a grayscale face crop.
     Returns (emotion_str, prob_2d_array) where prob_2d_array has shape (1, 7).
     """
-    if model is None:
-        return "Model Missing", np.zeros((1, len(EMOTIONS)))
-
-    face = cv2.resize(gray_face, (IMG_SIZE, IMG_SIZE))
-    face = face.astype("float32") / 255.0
-    face = face.reshape(1, IMG_SIZE, IMG_SIZE, 1)
-
-    pred = model.predict(face, verbose=0)   # shape: (1, 7)
-    emotion = EMOTIONS[np.argmax(pred[0])]
+    h, w = gray_face.shape[:2]
+    emotions, probs = predict_faces(gray_face, [(0, 0, w, h)])
 
-    return emotion, pred   # pred is (1,7) — consistent for all callers
+    return emotions[0], probs   # probs is (1,7) — consistent for all callers
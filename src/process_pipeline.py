@@ -0,0 +1,270 @@
+"""
+process_pipeline.py — Capture → detect/infer → UI across three processes.
+The threaded Pipeline shares one GIL between OpenCV decode, Haar detection,
+inference glue and the dashboard. ProcessPipeline moves capture and
+detection/inference into their own spawned processes:
+
+    capture process     decodes straight into a shared-memory FrameRing
+    inference process   tracks faces and classifies them on ring views (no copy)
+    UI process          receives only (seq, boxes, track ids, probs) and reads
+                        the frame it is about to display from the ring
+
+It exposes the same get/stop/alive/stats interface as Pipeline, so
+LiveEngine selects it with PIPELINE_MODE = "processes". The UI process never
+needs the model loaded; `model_status` reports the inference process's own.
+"""
+import time
+import queue
+import multiprocessing as mp
+import cv2
+import numpy as np
+from src.config import FRAME_RING_SLOTS, DETECT_EVERY, EMOTIONS
+from src.frame_ring import FrameRing
+from src.pipeline import FrameResult
+from src.metrics import metrics
+
+MODEL_STATUSES = ("loading", "ready", "missing", "error", "idle")
+
+
+def _read_into(cap, view):
+    try:
+        return cap.read(view)            # cv2.VideoCapture fills `view` in place
+    except TypeError:
+        return cap.read()                # capture stand-ins without an output argument
+
+
+def _capture_main(source, size, slots, info_q, stop):
+    if callable(source):
+        cap = source()
+    else:
+        cap = cv2.VideoCapture(source)
+        if size:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, size[0])
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
+    ok, frame = cap.read() if cap.isOpened() else (False, None)
+    if not ok:
+        cap.release()
+        info_q.put(("error", f"Could not read from video source {source!r}"))
+        return
+    ring = FrameRing.create(frame.shape, slots)
+    ring.owner = False                   # ProcessPipeline unlinks it in stop(), after every reader is done
+    info_q.put(("ok", ring.name))
+    try:
+        seq, view = ring.begin_write()
+        np.copyto(view, frame)
+        ring.commit(seq, time.time())
+        while not stop.is_set():
+            seq, view = ring.begin_write()
+            ok, frame = _read_into(cap, view)
+            if not ok:
+                break
+            if frame is not view:
+                if frame.shape != view.shape:
+                    print(f"[WARNING] Capture size changed to {frame.shape}; restart the pipeline.")
+                    break
+                np.copyto(view, frame)
+            ring.commit(seq, time.time())
+    finally:
+        ring.close_writer()
+        cap.release()
+        ring.close()
+
+
+def _inference_main(ring_name, result_q, stop, detect_every, status):
+    from src.tracking import FaceTracker
+    from src.predictor import predict_faces, get_engine, model_status
+    ring = FrameRing.attach(ring_name)
+    get_engine()                         # load before the first frame, not on it
+    status.value = MODEL_STATUSES.index(model_status())
+    tracker = FaceTracker(detect_every=detect_every)
+    last, processed, torn, busy_s = 0, 0, 0, 0.0
+    last_error = None
+    try:
+        while not stop.is_set():
+            seq = ring.wait(last, timeout=0.1)
+            if seq is None:
+                if ring.writer_closed and ring.head == last:
+                    break
+                continue
+            last = seq
+            frame, captured_at = ring.view(seq)
+            if frame is None:
+                torn += 1
+                continue
+            t0 = time.perf_counter()
+            gray, tracks = tracker.update(frame)
+            t1 = time.perf_counter()
+            if not ring.valid(seq):      # lapped by the writer while converting
+                torn += 1
+                continue
+            try:
+                emotions, probs = predict_faces(gray, [t.box for t in tracks])
+            except Exception as e:
+                # e.g. the inference daemon went away; keep the process (and the video) alive
+                msg = f"{type(e).__name__}: {e}"
+                if msg != last_error:
+                    print(f"[ERROR] Inference process: {msg} (frames keep flowing without predictions)")
+                last_error = msg
+                tracks, emotions, probs = [], [], np.zeros((0, len(EMOTIONS)), dtype="float32")
+            else:
+                last_error = None
+            t2 = time.perf_counter()
+            busy_s += t2 - t0
+            processed += 1
+            result_q.put((seq, captured_at, tracks, emotions, probs,
+                          ((t1 - t0) * 1000, (t2 - t1) * 1000), (processed, torn, busy_s)))
+    finally:
+        result_q.put(None)
+        ring.close()
+
+
+class ProcessPipeline:
+    """
+    Owns the capture and inference processes for one video source.
+
+        pipeline = ProcessPipeline(0, size=(1920, 1080)).start()
+        while ...:
+            result = pipeline.get(timeout=1.0)   # FrameResult (gray=None) or None
+
+    `source` is a camera index, a path/URL, or a picklable zero-argument
+    callable returning a capture object. Raises IOError from `start()` if
+    the source yields no frame.
+    """
+
+    def __init__(self, source, size=None, slots=FRAME_RING_SLOTS, detect_every=DETECT_EVERY,
+                 copy_frames=True, start_timeout=60.0):
+        self.source = source
+        self.size = size
+        self.slots = slots
+        self.detect_every = detect_every
+        self.copy_frames = copy_frames
+        self.start_timeout = start_timeout
+        self.ring = None
+        self.capture = self.inference = None
+        self._stop = None
+        self._ended = False
+        self._stopped = False
+        self._remote = (0, 0, 0.0)        # processed, torn, busy_s from the inference process
+        self._model_status = None
+        self.consumed = 0
+        self.dropped = 0
+        self.stale = 0
+
+    def start(self):
+        ctx = mp.get_context("spawn")
+        self._stop = ctx.Event()
+        self._results = ctx.Queue()
+        info_q = ctx.Queue()
+        self.capture = ctx.Process(target=_capture_main, name="cortex-capture", daemon=True,
+                                   args=(self.source, self.size, self.slots, info_q, self._stop))
+        self.capture.start()
+        status, detail = "error", "capture process did not report in time"
+        deadline = time.monotonic() + self.start_timeout
+        while time.monotonic() < deadline:
+            try:
+                status, detail = info_q.get(timeout=0.2)
+                break
+            except queue.Empty:
+                if not self.capture.is_alive():
+                    detail = f"capture process exited with code {self.capture.exitcode}"
+                    break
+        if status != "ok":
+            self.stop()
+            raise IOError(detail)
+        self.ring = FrameRing.attach(detail)
+        self.ring.owner = True
+        self._model_status = ctx.Value("b", MODEL_STATUSES.index("loading"), lock=False)
+        self.inference = ctx.Process(target=_inference_main, name="cortex-inference", daemon=True,
+                                     args=(detail, self._results, self._stop, self.detect_every,
+                                           self._model_status))
+        self.inference.start()
+        return self
+
+    def set_capture_size(self, width, height):
+        """The ring is sized for the first frame, so a new resolution needs a restart. Returns False."""
+        return False
+
+    def stop(self, timeout=2.0):
+        self._stopped = True
+        if self._stop is not None:
+            self._stop.set()
+        for proc in (self.inference, self.capture):
+            if proc is None:
+                continue
+            # Keep draining results so the worker's queue feeder can flush and exit
+            deadline = time.monotonic() + timeout
+            while proc.is_alive() and time.monotonic() < deadline:
+                try:
+                    while True:
+                        self._results.get_nowait()
+                except queue.Empty:
+                    pass
+                proc.join(0.05)
+            if proc.is_alive():
+                proc.terminate()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    @property
+    def alive(self):
+        """False once stopped, or once the source is exhausted and every result consumed."""
+        if self._stopped or self._ended:
+            return False
+        return self.inference is not None and self.inference.is_alive()
+
+    @property
+    def camera_failed(self):
+        return not self._stopped and self.capture is not None and not self.capture.is_alive()
+
+    @property
+    def model_status(self):
+        """The inference process's model: 'loading' until it reports, then 'ready', 'missing' or 'error'."""
+        if self._model_status is None:
+            return "idle"
+        status = MODEL_STATUSES[self._model_status.value]
+        if status == "loading" and not (self.inference is not None and self.inference.is_alive()):
+            return "error"                # died while loading
+        return status
+
+    def get(self, timeout=None):
+        """Newest processed frame for the UI (older ones are dropped), or None."""
+        if self._ended:
+            return None
+        try:
+            item = self._results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        while item is not None:
+            try:
+                newer = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if newer is None:
+                self._ended = True
+                break
+            item = newer
+            self.dropped += 1
+        if item is None:
+            self._ended = True
+            return None
+        seq, captured_at, tracks, emotions, probs, (detect_ms, infer_ms), self._remote = item
+        frame = self.ring.read(seq) if self.copy_frames else self.ring.view(seq)[0]
+        if frame is None:
+            self.stale += 1              # overwritten before the UI got to it
+            return None
+        metrics.observe("detect", detect_ms)
+        metrics.observe("inference", infer_ms)
+        self.consumed += 1
+        return FrameResult(seq, captured_at, frame, None, tracks, emotions, probs)
+
+    def stats(self):
+        """Same shape as Pipeline.stats, plus ring-specific counters."""
+        processed, torn, busy_s = self._remote
+        return {
+            "capture":   {"frames": self.ring.head if self.ring is not None else 0},
+            "ring":      {"slots": self.slots, "torn": torn, "stale": self.stale},
+            "inference": {"frames": processed, "busy_s": round(busy_s, 3)},
+            "results_q": {"drops": self.dropped},
+            "ui":        {"frames": self.consumed},
+        }
@@ -0,0 +1,255 @@
+"""
+recording.py — Compact per-frame session recordings, with time seeks.
+
+    python -m src.recording recordings/session-20260101-120000.cxr            # summary
+    python -m src.recording recordings/session-....cxr --csv faces.csv        # one row per face
+
+A live session is saved as the raw model output for every displayed frame:
+the capture timestamp, and per face the track id, the box and the 7-way
+probabilities in float16. Smoothing is not baked in, so a replay can apply
+any sensitivity. Frames are buffered into column-wise chunks, and each chunk
+is zlib-compressed:
+
+    header   b"CXVSES1\\0", <I json length, JSON metadata
+    chunk    <4sIIIdd  b"CHNK", frames, faces, payload bytes, first ts, last ts
+             payload:  ts f8[F] | faces-per-frame u2[F] | track ids u4[N] |
+                       boxes i2[N, 4] | probs f2[N, 7]
+    index    b"INDX", <I chunks, then <QddII per chunk (offset, first ts, last ts, frames, faces)
+    footer   <Q index offset, b"CXVEND\\0\\0"
+
+A seek binary-searches the index and decodes a single chunk. If a file has
+no footer, for example after a crash, the reader rebuilds the index by
+walking the chunk headers, and any torn final chunk is dropped.
+"""
+import os
+import csv
+import json
+import zlib
+import time
+import struct
+import bisect
+import argparse
+import itertools
+import numpy as np
+from src.config import EMOTIONS, RECORD_DIR, RECORD_CHUNK_FRAMES, RECORD_CHUNK_S
+
+MAGIC = b"CXVSES1\0"
+_END = b"CXVEND\0\0"
+_CHUNK = struct.Struct("<4sIIIdd")
+_ENTRY = struct.Struct("<QddII")
+_FOOTER = struct.Struct("<Q8s")
+EXTENSION = ".cxr"
+_N = len(EMOTIONS)
+_seq = itertools.count(1)
+
+
+class RecordedFrame:
+    """One replayed frame: timestamp plus per-face track ids, boxes and float32 probs."""
+
+    __slots__ = ("ts", "track_ids", "boxes", "probs")
+
+    def __init__(self, ts, track_ids, boxes, probs):
+        self.ts = ts
+        self.track_ids = track_ids
+        self.boxes = boxes
+        self.probs = probs
+
+
+class SessionRecorder:
+
+    def __init__(self, path, meta=None, chunk_frames=RECORD_CHUNK_FRAMES, chunk_s=RECORD_CHUNK_S):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.chunk_s = chunk_s
+        self._f = open(path, "xb")          # never clobber another session's file
+        meta = {"version": 1, "emotions": list(EMOTIONS), "created": time.time(), **(meta or {})}
+        blob = json.dumps(meta).encode()
+        self._f.write(MAGIC + struct.pack("<I", len(blob)) + blob)
+        self._index = []
+        self._reset()
+        self.frames = 0
+        self.faces = 0
+
+    def _reset(self):
+        self._ts, self._counts, self._ids, self._boxes, self._probs = [], [], [], [], []
+
+    def add(self, ts, track_ids, boxes, probs):
+        """Append one frame. `boxes` is (N, 4) (x, y, w, h); `probs` is (N, 7)."""
+        n = len(track_ids)
+        self._ts.append(ts)
+        self._counts.append(n)
+        if n:
+            self._ids.append(np.asarray(track_ids, dtype="<u4"))
+            self._boxes.append(np.asarray(boxes, dtype="<i2").reshape(n, 4))
+            self._probs.append(np.asarray(probs, dtype="<f2").reshape(n, _N))
+        self.frames += 1
+        self.faces += n
+        if len(self._ts) >= self.chunk_frames or ts - self._ts[0] >= self.chunk_s:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered frames as one chunk."""
+        if not self._ts:
+            return
+        ids = np.concatenate(self._ids) if self._ids else np.zeros(0, "<u4")
+        boxes = np.concatenate(self._boxes) if self._boxes else np.zeros((0, 4), "<i2")
+        probs = np.concatenate(self._probs) if self._probs else np.zeros((0, _N), "<f2")
+        raw = b"".join((np.asarray(self._ts, "<f8").tobytes(), np.asarray(self._counts, "<u2").tobytes(),
+                        ids.tobytes(), boxes.tobytes(), probs.tobytes()))
+        payload = zlib.compress(raw, 1)
+        offset = self._f.tell()
+        self._f.write(_CHUNK.pack(b"CHNK", len(self._ts), len(ids), len(payload), self._ts[0], self._ts[-1]))
+        self._f.write(payload)
+        self._f.flush()
+        self._index.append((offset, self._ts[0], self._ts[-1], len(self._ts), len(ids)))
+        self._reset()
+
+    def close(self):
+        if self._f is None:
+            return
+        self.flush()
+        index_at = self._f.tell()
+        self._f.write(b"INDX" + struct.pack("<I", len(self._index)))
+        for entry in self._index:
+            self._f.write(_ENTRY.pack(*entry))
+        self._f.write(_FOOTER.pack(index_at, _END))
+        self._f.close()
+        self._f = None
+
+
+def new_recording_path(directory=RECORD_DIR):
+    """Unique per call: sessions starting in the same second get different pid/sequence suffixes."""
+    name = f"{time.strftime('session-%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_seq)}"
+    return os.path.join(directory, name + EXTENSION)
+
+
+def list_recordings(directory=RECORD_DIR):
+    """Recording files in `directory`, newest first."""
+    if not os.path.isdir(directory):
+        return []
+    paths = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(EXTENSION)]
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+class SessionRecording:
+    """
+    Read-only view of a recording: `meta`, `duration_s`, `frames(start_s, end_s)`.
+    Raises ValueError for files that are not (or no longer) readable recordings.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._f = open(path, "rb")
+        try:
+            if self._f.read(len(MAGIC)) != MAGIC:
+                raise ValueError("bad magic")
+            (n,) = struct.unpack("<I", self._f.read(4))
+            self.meta = json.loads(self._f.read(n))
+            self._data_start = self._f.tell()
+            self.index = self._read_index() or self._scan()
+        except (ValueError, struct.error) as e:
+            self._f.close()
+            raise ValueError(f"{path} is not a readable session recording ({e})") from e
+        self._starts = [e[1] for e in self.index]
+        self.frame_count = sum(e[3] for e in self.index)
+        self.face_count = sum(e[4] for e in self.index)
+
+    def _read_index(self):
+        size = os.fstat(self._f.fileno()).st_size
+        if size < self._data_start + _FOOTER.size:
+            return None
+        self._f.seek(size - _FOOTER.size)
+        index_at, end = _FOOTER.unpack(self._f.read(_FOOTER.size))
+        if end != _END:
+            return None
+        self._f.seek(index_at)
+        if self._f.read(4) != b"INDX":
+            return None
+        (n,) = struct.unpack("<I", self._f.read(4))
+        return [_ENTRY.unpack(self._f.read(_ENTRY.size)) for _ in range(n)]
+
+    def _scan(self):
+        index, offset = [], self._data_start
+        size = os.fstat(self._f.fileno()).st_size
+        while offset + _CHUNK.size <= size:
+            self._f.seek(offset)
+            tag, frames, faces, length, t0, t1 = _CHUNK.unpack(self._f.read(_CHUNK.size))
+            if tag != b"CHNK" or offset + _CHUNK.size + length > size:
+                break
+            index.append((offset, t0, t1, frames, faces))
+            offset += _CHUNK.size + length
+        return index
+
+    @property
+    def start_ts(self):
+        return self.index[0][1] if self.index else 0.0
+
+    @property
+    def duration_s(self):
+        return self.index[-1][2] - self.index[0][1] if self.index else 0.0
+
+    def read_chunk(self, i):
+        """Decode chunk `i` into column arrays (ts, counts, ids, boxes, probs)."""
+        offset, _, _, frames, faces = self.index[i]
+        self._f.seek(offset)
+        _, _, _, length, _, _ = _CHUNK.unpack(self._f.read(_CHUNK.size))
+        try:
+            raw = zlib.decompress(self._f.read(length))
+        except zlib.error as e:
+            raise ValueError(f"{self.path}: chunk {i} is corrupt ({e})") from e
+        cols, pos = [], 0
+        for dtype, shape in (("<f8", (frames,)), ("<u2", (frames,)), ("<u4", (faces,)),
+                             ("<i2", (faces, 4)), ("<f2", (faces, _N))):
+            count = int(np.prod(shape))
+            cols.append(np.frombuffer(raw, dtype, count, pos).reshape(shape))
+            pos += count * np.dtype(dtype).itemsize
+        return cols
+
+    def frames(self, start_s=0.0, end_s=None):
+        """Yield RecordedFrame objects from `start_s` seconds into the session (decodes one chunk at a time)."""
+        t_start = self.start_ts + start_s
+        t_end = None if end_s is None else self.start_ts + end_s
+        first = max(0, bisect.bisect_right(self._starts, t_start) - 1)
+        for i in range(first, len(self.index)):
+            if t_end is not None and self.index[i][1] > t_end:
+                return
+            ts, counts, ids, boxes, probs = self.read_chunk(i)
+            ends = np.cumsum(counts)
+            for k, t in enumerate(ts):
+                if t < t_start:
+                    continue
+                if t_end is not None and t > t_end:
+                    return
+                lo, hi = ends[k] - counts[k], ends[k]
+                yield RecordedFrame(float(t), ids[lo:hi].tolist(), boxes[lo:hi].astype("int32"),
+                                    probs[lo:hi].astype("float32"))
+
+    def close(self):
+        self._f.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or export a Cortex-V session recording.")
+    parser.add_argument("recording")
+    parser.add_argument("--csv", help="Write one row per face: time_s, track_id, box, probabilities")
+    args = parser.parse_args()
+
+    rec = SessionRecording(args.recording)
+    size = os.path.getsize(args.recording)
+    print(f"{args.recording}: {rec.duration_s:.1f}s, {rec.frame_count:,} frames, {rec.face_count:,} faces, "
+          f"{len(rec.index)} chunks, {size / 1024:.1f} KB ({size / max(1, rec.frame_count):.1f} B/frame)")
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time_s", "track_id", "x", "y", "w", "h"] + [f"prob_{e.lower()}" for e in EMOTIONS])
+            for fr in rec.frames():
+                for tid, box, p in zip(fr.track_ids, fr.boxes, fr.probs):
+                    writer.writerow([round(fr.ts - rec.start_ts, 3), tid, *box.tolist()]
+                                    + [round(float(v), 4) for v in p])
+        print(f"[SUCCESS] {args.csv}")
+    rec.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+render_scheduler.py — Rate-limited, change-detecting dashboard refresh.
+The UI loop calls `update(name, ...)` as often as it likes; that only
+records the latest arguments. `tick()` then pushes a widget at most at
+its own rate, and skips the push when the widget's change key is the
+same as last time, so Plotly figures and HTML blobs are not re-serialised
+over the websocket for every frame.
+"""
+import time
+
+
+class _Widget:
+    __slots__ = ("name", "render", "interval", "key", "pending", "has_pending",
+                 "last_push", "last_key", "renders", "skipped_rate", "skipped_same")
+
+    def __init__(self, name, render, hz, key):
+        self.name = name
+        self.render = render
+        self.interval = 1.0 / hz if hz else 0.0
+        self.key = key
+        self.pending = ()
+        self.has_pending = False
+        self.last_push = float("-inf")
+        self.last_key = object()
+        self.renders = 0
+        self.skipped_rate = 0
+        self.skipped_same = 0
+
+
+class RenderScheduler:
+    """
+    Per-widget refresh scheduler.
+
+        sched.register("bars", render_emotion_bars, hz=10, key=lambda p: tuple(np.round(p, 2)))
+        sched.update("bars", probs)   # cheap, any number of times per frame
+        sched.tick()                  # once per loop iteration
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._widgets = {}
+
+    def register(self, name, render, hz, key=None):
+        """`key(*args)` returns a hashable summary; equal keys mean "nothing changed"."""
+        self._widgets[name] = _Widget(name, render, hz, key)
+
+    def set_rate(self, name, hz):
+        self._widgets[name].interval = 1.0 / hz if hz else 0.0
+
+    def update(self, name, *args):
+        w = self._widgets[name]
+        if w.has_pending:
+            w.skipped_rate += 1          # superseded before it was pushed
+        w.pending = args
+        w.has_pending = True
+
+    def tick(self, force=False):
+        """Push every widget that has new data and is due. Returns the names pushed."""
+        now = self._clock()
+        pushed = []
+        for w in self._widgets.values():
+            if not w.has_pending or (not force and now - w.last_push < w.interval):
+                continue
+            args, w.pending, w.has_pending = w.pending, (), False
+            key = w.key(*args) if w.key else args
+            # An unchanged check also counts as a push, so the key runs at most once per interval
+            w.last_push = now
+            if key == w.last_key:
+                w.skipped_same += 1
+                continue
+            w.render(*args)
+            w.last_key = key
+            w.renders += 1
+            pushed.append(w.name)
+        return pushed
+
+    def invalidate(self):
+        """Forget change keys so the next tick redraws everything (e.g. after a rerun)."""
+        for w in self._widgets.values():
+            w.last_key = object()
+            w.last_push = float("-inf")
+
+    def stats(self):
+        return {
+            w.name: {"renders": w.renders, "skipped_rate": w.skipped_rate, "skipped_same": w.skipped_same}
+            for w in self._widgets.values()
+        }
@@ -0,0 +1,239 @@
+"""
+server.py — Standalone HTTP inference service.
+
+    python -m src.server [--host 127.0.0.1] [--port 8600] [--max-batch 32] [--max-wait-ms 5]
+
+Endpoints (JSON responses):
+    POST /v1/image   body = encoded image (JPEG/PNG/...). Detects faces and
+                     classifies each one.
+    POST /v1/faces   body = encoded image of one face crop, or with
+                     Content-Type: application/x-npy an (N, H, W) uint8 array
+                     of grayscale crops (resized to 48x48 if needed).
+    GET  /healthz    model status and backend
+    GET  /stats      micro-batcher and request counters
+
+Requests are served on a thread per connection (ThreadingHTTPServer, like
+the MJPEG stream); every crop goes through one shared MicroBatcher, so
+concurrent callers are folded into a single forward pass.
+"""
+import io
+import json
+import time
+import socket
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+import numpy as np
+from src.config import (
+    EMOTIONS, IMG_SIZE, SERVER_HOST, SERVER_PORT,
+    SERVER_MAX_BATCH, SERVER_MAX_WAIT_MS, SERVER_MAX_BODY_MB
+)
+from src.batching import MicroBatcher
+from src.webcam import detect_faces
+from src.predictor import crop_faces, get_engine, model_status
+
+
+class BadRequest(ValueError):
+    pass
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256      # default backlog of 5 drops connections under load
+
+
+def _decode_gray(body):
+    img = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        raise BadRequest("Body is not a decodable image")
+    return img
+
+
+def _normalise(crops):
+    batch = crops[..., None].astype("float32")
+    batch /= 255.0
+    return batch
+
+
+def _faces_json(probs, boxes=None):
+    faces = []
+    for i, p in enumerate(probs):
+        k = int(np.argmax(p))
+        face = {"emotion": EMOTIONS[k], "confidence": round(float(p[k]), 5),
+                "probs": {e: round(float(v), 5) for e, v in zip(EMOTIONS, p)}}
+        if boxes is not None:
+            face["box"] = [int(v) for v in boxes[i]]
+        faces.append(face)
+    return faces
+
+
+class InferenceServer:
+
+    def __init__(self, host=SERVER_HOST, port=SERVER_PORT, batcher=None, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.batcher = batcher
+        self._httpd = None
+        self._lock = threading.Lock()
+        self.counts = {"image": 0, "faces": 0, "errors": 0}
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    # ── handlers ────────────────────────────────────────────
+    def handle_image(self, body, content_type):
+        gray = _decode_gray(body)
+        t0 = time.perf_counter()
+        boxes = np.asarray(detect_faces(gray), dtype="int32").reshape(-1, 4)
+        detect_ms = (time.perf_counter() - t0) * 1000
+        probs = self.batcher.submit(_normalise(crop_faces(gray, boxes))).result(self.timeout)
+        self._count("image")
+        return {"faces": _faces_json(probs, boxes), "width": gray.shape[1], "height": gray.shape[0],
+                "detect_ms": round(detect_ms, 3)}
+
+    def handle_faces(self, body, content_type):
+        if content_type == "application/x-npy":
+            try:
+                crops = np.load(io.BytesIO(body), allow_pickle=False)
+            except ValueError as e:
+                raise BadRequest(f"Bad .npy body: {e}")
+            if crops.ndim == 4 and crops.shape[-1] == 1:
+                crops = crops[..., 0]
+            if crops.ndim != 3 or crops.dtype != np.uint8:
+                raise BadRequest("Expected a uint8 array shaped (N, H, W)")
+            if 0 in crops.shape:
+                raise BadRequest(f"Expected at least one non-empty crop, got shape {crops.shape}")
+        else:
+            crops = _decode_gray(body)[None]
+        if crops.shape[1:] != (IMG_SIZE, IMG_SIZE):
+            crops = np.stack([cv2.resize(c, (IMG_SIZE, IMG_SIZE)) for c in crops])
+        probs = self.batcher.submit(_normalise(crops)).result(self.timeout)
+        self._count("faces")
+        return {"faces": _faces_json(probs)}
+
+    def stats(self):
+        return {"batcher": self.batcher.stats(), "requests": dict(self.counts)}
+
+    # ── lifecycle ───────────────────────────────────────────
+    def start(self):
+        """Load the model, start the batcher and serve in a background thread."""
+        if self._httpd is not None:
+            return self
+        if self.batcher is None:
+            engine = get_engine()
+            if engine is None:
+                raise RuntimeError("Emotion model unavailable — train or export it first.")
+            self.batcher = MicroBatcher(engine.predict)
+        self.batcher.start()
+        server = self
+        max_body = int(SERVER_MAX_BODY_MB * 1e6)
+        routes = {"/v1/image": self.handle_image, "/v1/faces": self.handle_faces}
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"        # keep-alive for load generators
+
+            def setup(self):
+                super().setup()
+                # Headers and body are separate writes; don't let Nagle hold the body back
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, code, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path == "/healthz":
+                    engine = get_engine() if model_status() == "ready" else None
+                    self._send(200, {"status": model_status(),
+                                     "backend": getattr(engine, "name", None)})
+                elif path == "/stats":
+                    self._send(200, server.stats())
+                else:
+                    self._send(404, {"error": "not found"})
+
+            def do_POST(self):
+                handler = routes.get(self.path.split("?")[0])
+                length = int(self.headers.get("Content-Length") or 0)
+                error = None
+                if length > max_body:
+                    error = (413, "body too large")
+                    self.close_connection = True     # don't read it
+                elif handler is None:
+                    error = (404, "not found")
+                elif length <= 0:
+                    error = (400, "empty body")
+                if error:
+                    if not self.close_connection and length > 0:
+                        self.rfile.read(length)      # keep the connection usable
+                    server._count("errors")
+                    self._send(error[0], {"error": error[1]})
+                    return
+                body = self.rfile.read(length)
+                t0 = time.perf_counter()
+                try:
+                    payload = handler(body, self.headers.get("Content-Type", "").split(";")[0].strip())
+                except BadRequest as e:
+                    server._count("errors")
+                    self._send(400, {"error": str(e)})
+                    return
+                except Exception as e:
+                    server._count("errors")
+                    self._send(500, {"error": str(e)})
+                    return
+                payload["latency_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+                self._send(200, payload)
+
+        self._httpd = _HTTPServer((self.host, self.port), Handler)
+        self.port = self._httpd.server_address[1]          # resolves port 0
+        threading.Thread(target=self._httpd.serve_forever, name="cortex-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        if self.batcher is not None:
+            self.batcher.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cortex-V HTTP inference server.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--max-batch", type=int, default=SERVER_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=SERVER_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    engine = get_engine()
+    if engine is None:
+        raise SystemExit("Emotion model unavailable — see the message above.")
+    server = InferenceServer(args.host, args.port,
+                             MicroBatcher(engine.predict, args.max_batch, args.max_wait_ms)).start()
+    print(f"[SUCCESS] Serving {engine.name} on {server.url} "
+          f"(max batch {args.max_batch}, max wait {args.max_wait_ms} ms)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,10 @@
+import time
 from collections import deque, Counter
+import numpy as np
+from src.config import (
+    EMOTIONS, SMOOTH_WINDOW, SMOOTH_MODE, SMOOTH_HYSTERESIS,
+    SMOOTH_CAPACITY, TRACK_IDLE_TIMEOUT
+)
 
 
 class EmotionSmoother:
@@ -9,3 +15,158 @@ class EmotionSmoother:
     def update(self, emotion):
         self.buffer.append(emotion)
         return Counter(self.buffer).most_common(1)[0][0]
+
+
+class TrackSmoother:
+    """
+    Per-track smoothing of the full 7-way probability vector.
+
+    Each track id owns one row of preallocated NumPy state, so an update is
+    O(1) per face and a whole frame is updated with one vectorised call:
+
+    - "ema":    exponential moving average, alpha = 2 / (window + 1)
+    - "window": exact mean of the last `window` vectors (running sum + ring)
+    - "vote":   legacy label vote via one EmotionSmoother per track
+
+    Tracks not seen for `idle_timeout` seconds are evicted. With
+    `hysteresis` > 0 the reported label only changes when the challenger's
+    smoothed probability beats the current label's by that margin.
+    """
+
+    MODES = ("ema", "window", "vote")
+
+    def __init__(self, window=SMOOTH_WINDOW, mode=SMOOTH_MODE, hysteresis=SMOOTH_HYSTERESIS,
+                 capacity=SMOOTH_CAPACITY, idle_timeout=TRACK_IDLE_TIMEOUT):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown smoothing mode '{mode}'. Choose from {self.MODES}.")
+        self.mode = mode
+        self.hysteresis = hysteresis
+        self.capacity = capacity
+        self.idle_timeout = idle_timeout
+        self.window = max(1, int(window))
+        self._alloc()
+
+    def _alloc(self):
+        k, n = self.capacity, len(EMOTIONS)
+        self.alpha = 2.0 / (self.window + 1)
+        self._state = np.zeros((k, n), dtype="float32")        # EMA value or running sum
+        self._ring = np.zeros((k, self.window, n), dtype="float32") if self.mode == "window" else None
+        self._pos = np.zeros(k, dtype="int32")
+        self._count = np.zeros(k, dtype="int32")
+        self._label = np.full(k, -1, dtype="int32")
+        self._last_seen = np.zeros(k, dtype="float64")
+        self._slots = {}                                       # track id -> row
+        self._free = list(range(k - 1, -1, -1))
+        self._votes = {}                                       # track id -> EmotionSmoother
+
+    # ── configuration ───────────────────────────────────────
+    def set_window(self, window):
+        """Change the smoothing window in place (sensitivity slider)."""
+        window = max(1, int(window))
+        if window == self.window:
+            return
+        self.window = window
+        if self.mode == "window":
+            self._alloc()          # ring shape changes; start fresh
+        else:
+            self.alpha = 2.0 / (window + 1)
+            for sm in self._votes.values():
+                sm.buffer = deque(sm.buffer, maxlen=window)
+
+    def reset(self):
+        self._alloc()
+
+    # ── slots ───────────────────────────────────────────────
+    def _slot(self, track_id, now):
+        slot = self._slots.get(track_id)
+        if slot is not None:
+            self._last_seen[slot] = now
+            return slot, False
+        if not self._free:
+            # Full: recycle the least recently seen track
+            victim = min(self._slots, key=lambda t: self._last_seen[self._slots[t]])
+            self._release(victim)
+        slot = self._free.pop()
+        self._slots[track_id] = slot
+        self._state[slot] = 0
+        if self._ring is not None:
+            self._ring[slot] = 0
+        self._pos[slot] = self._count[slot] = 0
+        self._label[slot] = -1
+        self._last_seen[slot] = now
+        return slot, True
+
+    def _release(self, track_id):
+        slot = self._slots.pop(track_id)
+        self._free.append(slot)
+        self._votes.pop(track_id, None)
+
+    def evict_idle(self, now=None):
+        """Drop every track not updated within `idle_timeout` seconds. Returns their ids."""
+        now = time.time() if now is None else now
+        stale = [t for t, s in self._slots.items() if now - self._last_seen[s] > self.idle_timeout]
+        for t in stale:
+            self._release(t)
+        return stale
+
+    def __len__(self):
+        return len(self._slots)
+
+    # ── updates ─────────────────────────────────────────────
+    def update(self, track_id, probs, now=None):
+        """Smooth one face. Returns (emotion, smoothed_probs (7,))."""
+        emotions, smoothed = self.update_many([track_id], np.asarray(probs).reshape(1, -1), now)
+        return emotions[0], smoothed[0]
+
+    def update_many(self, track_ids, probs, now=None):
+        """
+        Smooth all faces of one frame. `track_ids` must be unique and `probs`
+        is (N, 7). Returns (emotions, smoothed (N, 7)).
+        """
+        now = time.time() if now is None else now
+        self.evict_idle(now)
+        n = len(track_ids)
+        if n == 0:
+            return [], np.zeros((0, len(EMOTIONS)), dtype="float32")
+        probs = np.asarray(probs, dtype="float32")
+
+        if self.mode == "vote":
+            for t in track_ids:
+                self._slot(t, now)
+            labels = []
+            for t, p in zip(track_ids, probs):
+                sm = self._votes.setdefault(t, EmotionSmoother(size=self.window))
+                labels.append(sm.update(EMOTIONS[int(np.argmax(p))]))
+                self._last_seen[self._slots[t]] = now
+            return labels, probs
+
+        slots, fresh = zip(*(self._slot(t, now) for t in track_ids))
+        slots = np.fromiter(slots, dtype="int64", count=n)
+        fresh = np.fromiter(fresh, dtype=bool, count=n)
+
+        if self.mode == "ema":
+            prev = self._state[slots]
+            self._state[slots] = np.where(fresh[:, None], probs, prev + self.alpha * (probs - prev))
+            smoothed = self._state[slots]
+        else:
+            pos = self._pos[slots]
+            self._state[slots] += probs - self._ring[slots, pos]
+            self._ring[slots, pos] = probs
+            self._pos[slots] = (pos + 1) % self.window
+            self._count[slots] = np.minimum(self._count[slots] + 1, self.window)
+            smoothed = self._state[slots] / self._count[slots][:, None]
+
+        self._last_seen[slots] = now
+        labels = self._apply_hysteresis(slots, smoothed)
+        return [EMOTIONS[i] for i in labels], smoothed
+
+    def _apply_hysteresis(self, slots, smoothed):
+        best = np.argmax(smoothed, axis=1)
+        current = self._label[slots]
+        if self.hysteresis > 0:
+            rows = np.arange(len(slots))
+            held = current >= 0
+            margin = smoothed[rows, best] - smoothed[rows, np.maximum(current, 0)]
+            best = np.where(held & (margin < self.hysteresis), current, best)
+        self._label[slots] = best
+        return best
@@ -0,0 +1,185 @@
+"""
+tracking.py — Detect-then-track face pipeline.
+A full-frame Haar pass runs only every DETECT_EVERY frames. In between,
+faces are carried forward with sparse Lucas-Kanade optical flow, and a
+track whose flow breaks down is re-detected inside a small window around
+its last box instead of across the whole frame.
+"""
+import itertools
+import cv2
+import numpy as np
+from src.webcam import FaceDetector, iou
+from src.metrics import metrics
+from src.config import DETECT_EVERY, TRACK_MAX_MISSES, TRACK_IOU_MATCH, TRACK_ROI_MARGIN, MIN_FACE_FRAC
+
+_MIN_FLOW_POINTS = 5
+_LK_PARAMS = dict(
+    winSize=(15, 15),
+    maxLevel=2,
+    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03)
+)
+
+
+def _clip(box, shape):
+    """Round a float box to ints and clamp it inside an image of `shape`."""
+    x, y, w, h = box
+    H, W = shape[:2]
+    x0 = int(round(min(max(x, 0), W - 1)))
+    y0 = int(round(min(max(y, 0), H - 1)))
+    x1 = int(round(min(max(x + w, x0 + 1), W)))
+    y1 = int(round(min(max(y + h, y0 + 1), H)))
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+class Track:
+    """One followed face: a stable id, its current box and flow seed points."""
+
+    __slots__ = ("id", "box", "points", "misses", "age")
+
+    def __init__(self, track_id, box):
+        self.id = track_id
+        self.box = tuple(int(v) for v in box)
+        self.points = None
+        self.misses = 0
+        self.age = 0
+
+    def snapshot(self):
+        """Frozen copy for consumers that hold on to a frame's tracks."""
+        t = Track(self.id, self.box)
+        t.misses, t.age = self.misses, self.age
+        return t
+
+
+class FaceTracker:
+    """
+    Stateful per-stream face tracker.
+    Call `update(frame)` once per BGR frame; it returns (gray, tracks) where
+    every track has a stable `.id` and an in-bounds `.box` (x, y, w, h).
+    """
+
+    def __init__(self, detect_every=DETECT_EVERY, max_misses=TRACK_MAX_MISSES,
+                 iou_match=TRACK_IOU_MATCH, roi_margin=TRACK_ROI_MARGIN, detector=None):
+        self.detect_every = max(1, detect_every)
+        self.max_misses = max_misses
+        self.iou_match = iou_match
+        # Live frames get a resolution-relative face floor, so 4K is not searched for 30px faces
+        self.detector = detector or FaceDetector(min_face_frac=MIN_FACE_FRAC, roi_margin=roi_margin)
+        self.tracks = []
+        self._ids = itertools.count(1)
+        self._prev_gray = None
+        self._frame_idx = 0
+        self.full_detections = 0
+        self.roi_detections = 0
+
+    # ── public ──────────────────────────────────────────────
+    def update(self, frame):
+        with metrics.time("gray"):
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self._prev_gray is not None and self._prev_gray.shape != gray.shape:
+            self.reset()             # source resolution changed; old boxes and flow are meaningless
+        with metrics.time("detect"):
+            if not self.tracks or self._frame_idx % self.detect_every == 0:
+                self._full_detect(gray)
+            else:
+                self._propagate(gray)
+        self._prev_gray = gray
+        self._frame_idx += 1
+        # Snapshots: the live Track objects keep moving on later frames
+        return gray, [t.snapshot() for t in self.tracks]
+
+    def reset(self):
+        self.tracks = []
+        self._prev_gray = None
+        self._frame_idx = 0
+
+    def stats(self):
+        """Detector usage so far: how often a full or ROI Haar pass actually ran."""
+        return {
+            "frames": self._frame_idx,
+            "full_detections": self.full_detections,
+            "roi_detections": self.roi_detections,
+            "tracks": len(self.tracks),
+        }
+
+    # ── internals ───────────────────────────────────────────
+    def _seed_points(self, gray, track):
+        x, y, w, h = track.box
+        pts = cv2.goodFeaturesToTrack(gray[y:y+h, x:x+w], maxCorners=40, qualityLevel=0.01, minDistance=3)
+        if pts is not None:
+            pts = pts.reshape(-1, 2) + np.array([x, y], dtype="float32")
+        track.points = pts
+
+    def _full_detect(self, gray):
+        self.full_detections += 1
+        boxes = [tuple(int(v) for v in b) for b in self.detector.detect(gray)]
+
+        # Greedy IoU association, best pairs first
+        pairs = sorted(
+            ((iou(t.box, b), ti, bi) for ti, t in enumerate(self.tracks) for bi, b in enumerate(boxes)),
+            reverse=True
+        )
+        used_t, used_b = set(), set()
+        for score, ti, bi in pairs:
+            if score < self.iou_match:
+                break
+            if ti in used_t or bi in used_b:
+                continue
+            used_t.add(ti)
+            used_b.add(bi)
+            track = self.tracks[ti]
+            track.box, track.misses = boxes[bi], 0
+
+        kept = []
+        for ti, track in enumerate(self.tracks):
+            if ti not in used_t:
+                track.misses += 1
+            if track.misses <= self.max_misses:
+                kept.append(track)
+        for bi, box in enumerate(boxes):
+            if bi not in used_b:
+                kept.append(Track(next(self._ids), box))
+
+        self.tracks = kept
+        for track in self.tracks:
+            track.age += 1
+            self._seed_points(gray, track)
+
+    def _propagate(self, gray):
+        seeded = [t for t in self.tracks if t.points is not None and len(t.points) >= _MIN_FLOW_POINTS]
+        lost = [t for t in self.tracks if t not in seeded]
+
+        if seeded:
+            # One LK call for every track's points
+            p0 = np.concatenate([t.points for t in seeded]).reshape(-1, 1, 2)
+            p1, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, p0, None, **_LK_PARAMS)
+            p0, p1, status = p0.reshape(-1, 2), p1.reshape(-1, 2), status.reshape(-1).astype(bool)
+            start = 0
+            for track in seeded:
+                end = start + len(track.points)
+                ok = status[start:end]
+                if ok.sum() < _MIN_FLOW_POINTS:
+                    lost.append(track)
+                else:
+                    dx, dy = np.median(p1[start:end][ok] - p0[start:end][ok], axis=0)
+                    x, y, w, h = track.box
+                    track.box = _clip((x + dx, y + dy, w, h), gray.shape)
+                    track.points = p1[start:end][ok]
+                    track.age += 1
+                start = end
+
+        # Flow confidence dropped — look again, but only around the old box
+        dropped = []
+        for track in lost:
+            self.roi_detections += 1
+            found = self.detector.detect(gray, rois=[track.box])
+            if len(found):
+                best = max(found, key=lambda b: iou(track.box, b))
+                track.box, track.misses = tuple(int(v) for v in best), 0
+                track.age += 1
+                self._seed_points(gray, track)
+            else:
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    dropped.append(track)
+        if dropped:
+            self.tracks = [t for t in self.tracks if t not in dropped]
@@ -1,4 +1,6 @@
 import os
+import math
+import argparse
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
@@ -6,11 +8,15 @@ from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, Dropout, BatchNormalization, GlobalAveragePooling2D
 from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping, ReduceLROnPlateau
 from sklearn.utils import class_weight
+from input_pipeline import make_dataset
+from dataset_pack import is_packed
 
 # Define paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TRAIN_DIR = os.path.normpath(os.path.join(BASE_DIR, "../dataset/train"))
 TEST_DIR = os.path.normpath(os.path.join(BASE_DIR, "../dataset/test"))
+PACKED_TRAIN_DIR = os.path.normpath(os.path.join(BASE_DIR, "../dataset/packed/train"))
+PACKED_TEST_DIR = os.path.normpath(os.path.join(BASE_DIR, "../dataset/packed/test"))
 MODEL_PATH = os.path.normpath(os.path.join(BASE_DIR, "../models/emotion_model.h5"))
 
 # Parameters
@@ -18,46 +24,71 @@ IMG_SIZE = 48
 BATCH_SIZE = 64
 EPOCHS = 50
 
+parser = argparse.ArgumentParser(description="Train the Cortex-V emotion CNN.")
+parser.add_argument("--pipeline", choices=["tfdata", "generator"], default="tfdata",
+                    help="tfdata = parallel decode + cache + batched augmentation; "
+                         "generator = legacy ImageDataGenerator")
+parser.add_argument("--no-packed", action="store_true",
+                    help="Read image files even if dataset/packed exists (see src/dataset_pack.py)")
+args = parser.parse_args()
+
+# Packed, memory-mapped shards skip per-file reads and decoding entirely
+if args.pipeline == "tfdata" and not args.no_packed and is_packed(PACKED_TRAIN_DIR) and is_packed(PACKED_TEST_DIR):
+    print(f"Using packed dataset at {os.path.dirname(PACKED_TRAIN_DIR)}")
+    TRAIN_DIR, TEST_DIR = PACKED_TRAIN_DIR, PACKED_TEST_DIR
+
 # Check if dataset exists
 if not os.path.exists(TRAIN_DIR) or not os.path.exists(TEST_DIR):
     raise FileNotFoundError(f"Dataset not found at {TRAIN_DIR} or {TEST_DIR}. Please ensure 'dataset/train' and 'dataset/test' exist.")
 
-# Advanced Data Generators
-train_datagen = ImageDataGenerator(
-    rescale=1./255,
-    rotation_range=20,
-    width_shift_range=0.1,
-    height_shift_range=0.1,
-    shear_range=0.1,
-    zoom_range=0.1,
-    horizontal_flip=True,
-    fill_mode='nearest'
-)
-
-test_datagen = ImageDataGenerator(rescale=1./255)
-
-print(f"Loading training data from {TRAIN_DIR}...")
-train_generator = train_datagen.flow_from_directory(
-    TRAIN_DIR,
-    target_size=(IMG_SIZE, IMG_SIZE),
-    batch_size=BATCH_SIZE,
-    color_mode='grayscale',
-    class_mode='categorical',
-    shuffle=True
-)
-
-print(f"Loading validation data from {TEST_DIR}...")
-validation_generator = test_datagen.flow_from_directory(
-    TEST_DIR,
-    target_size=(IMG_SIZE, IMG_SIZE),
-    batch_size=BATCH_SIZE,
-    color_mode='grayscale',
-    class_mode='categorical',
-    shuffle=False
-)
+if args.pipeline == "tfdata":
+    print(f"Loading training data from {TRAIN_DIR}...")
+    train_data, y_train, class_names = make_dataset(TRAIN_DIR, IMG_SIZE, BATCH_SIZE, training=True)
+    print(f"Found {len(y_train)} images belonging to {len(class_names)} classes.")
+    print(f"Loading validation data from {TEST_DIR}...")
+    validation_data, y_val, _ = make_dataset(TEST_DIR, IMG_SIZE, BATCH_SIZE, training=False)
+    print(f"Found {len(y_val)} images.")
+    class_indices = {name: i for i, name in enumerate(class_names)}
+    train_samples, validation_samples = len(y_train), len(y_val)
+else:
+    # Advanced Data Generators
+    train_datagen = ImageDataGenerator(
+        rescale=1./255,
+        rotation_range=20,
+        width_shift_range=0.1,
+        height_shift_range=0.1,
+        shear_range=0.1,
+        zoom_range=0.1,
+        horizontal_flip=True,
+        fill_mode='nearest'
+    )
+
+    test_datagen = ImageDataGenerator(rescale=1./255)
+
+    print(f"Loading training data from {TRAIN_DIR}...")
+    train_data = train_datagen.flow_from_directory(
+        TRAIN_DIR,
+        target_size=(IMG_SIZE, IMG_SIZE),
+        batch_size=BATCH_SIZE,
+        color_mode='grayscale',
+        class_mode='categorical',
+        shuffle=True
+    )
+
+    print(f"Loading validation data from {TEST_DIR}...")
+    validation_data = test_datagen.flow_from_directory(
+        TEST_DIR,
+        target_size=(IMG_SIZE, IMG_SIZE),
+        batch_size=BATCH_SIZE,
+        color_mode='grayscale',
+        class_mode='categorical',
+        shuffle=False
+    )
+    class_indices = train_data.class_indices
+    y_train = train_data.classes
+    train_samples, validation_samples = train_data.samples, validation_data.samples
 
 # Calculate Class Weights to handle imbalance (especially 'disgust')
-class_indices = train_generator.class_indices
 print(f"Class indices: {class_indices}")
 num_classes = len(class_indices)
 
@@ -66,9 +97,8 @@ import config
 config_emotions = [e.lower() for e in config.EMOTIONS]
 gen_emotions = [k.lower() for k in class_indices.keys()]
 if config_emotions != gen_emotions:
-    print(f"WARNING: Configuration emotions {config_emotions} do not match generator emotions {gen_emotions}")
+    print(f"WARNING: Configuration emotions {config_emotions} do not match dataset emotions {gen_emotions}")
 
-y_train = train_generator.classes
 weights = class_weight.compute_class_weight(
     class_weight='balanced',
     classes=np.unique(y_train),
@@ -144,14 +174,15 @@ reduce_lr = ReduceLROnPlateau(
 
 # Train
 print("Starting deep training cycle...")
-steps_per_epoch = max(1, train_generator.samples // BATCH_SIZE)
-validation_steps = max(1, validation_generator.samples // BATCH_SIZE)
+steps_per_epoch = max(1, train_samples // BATCH_SIZE)
+# Round up: the validation set is not repeated, so this reads it (and its .cache()) to the end
+validation_steps = max(1, math.ceil(validation_samples / BATCH_SIZE))
 
 history = model.fit(
-    train_generator,
+    train_data,
     steps_per_epoch=steps_per_epoch,
     epochs=EPOCHS,
-    validation_data=validation_generator,
+    validation_data=validation_data,
     validation_steps=validation_steps,
     class_weight=class_weights,
     callbacks=[checkpoint, early_stopping, reduce_lr]
@@ -0,0 +1,164 @@
+"""
+transport.py — Getting annotated frames to the browser cheaply.
+FrameEncoder downsizes each frame to the display width *before* annotation,
+compresses it with cv2.imencode (JPEG or WebP) and caps the display frame
+rate independently of inference. MJPEGServer is an optional streaming mode:
+the browser pulls a multipart/x-mixed-replace stream from a local port, so
+frames bypass Streamlit's rerender-based image updates entirely.
+"""
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+from src.config import DISPLAY_WIDTH, DISPLAY_FPS, FRAME_FORMAT, FRAME_QUALITY
+
+_ENCODE = {
+    "jpeg": (".jpg",  cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY),
+}
+
+
+class FrameEncoder:
+
+    def __init__(self, display_width=DISPLAY_WIDTH, fmt=FRAME_FORMAT, quality=FRAME_QUALITY, max_fps=DISPLAY_FPS):
+        if fmt not in _ENCODE:
+            raise ValueError(f"Unknown frame format '{fmt}'. Choose from {list(_ENCODE)}.")
+        self.display_width = display_width
+        self.fmt = fmt
+        self.quality = quality
+        self.max_fps = max_fps
+        self._last_shown = float("-inf")
+        self.frames = 0
+        self.bytes_total = 0
+        self.encode_s_total = 0.0
+        self.last_bytes = 0
+        self.last_encode_ms = 0.0
+
+    def due(self, now=None):
+        """True when the display rate cap allows another frame."""
+        now = time.monotonic() if now is None else now
+        if self.max_fps and now - self._last_shown < 1.0 / self.max_fps:
+            return False
+        self._last_shown = now
+        return True
+
+    def prepare(self, frame):
+        """Downscale to the display width. Returns (display_frame, scale) — multiply boxes by scale."""
+        w = frame.shape[1]
+        if not self.display_width or w <= self.display_width:
+            return frame, 1.0
+        scale = self.display_width / w
+        return cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA), scale
+
+    def encode(self, frame):
+        """Compress a BGR frame. Returns the encoded bytes."""
+        ext, flag = _ENCODE[self.fmt]
+        t0 = time.perf_counter()
+        ok, buf = cv2.imencode(ext, frame, [flag, int(self.quality)])
+        dt = time.perf_counter() - t0
+        if not ok:
+            raise RuntimeError(f"cv2.imencode failed for {self.fmt}")
+        data = buf.tobytes()
+        self.frames += 1
+        self.bytes_total += len(data)
+        self.encode_s_total += dt
+        self.last_bytes = len(data)
+        self.last_encode_ms = dt * 1000
+        return data
+
+    def stats(self):
+        n = max(1, self.frames)
+        return {
+            "format": self.fmt,
+            "quality": self.quality,
+            "frames": self.frames,
+            "bytes_per_frame": self.bytes_total / n,
+            "encode_ms": self.encode_s_total / n * 1000,
+            "last_bytes": self.last_bytes,
+            "last_encode_ms": self.last_encode_ms,
+        }
+
+
+class MJPEGServer:
+    """
+    Serves the latest published JPEG as an MJPEG stream at http://host:port/stream.
+    One server per process; it outlives Streamlit reruns.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765):
+        self.host = host
+        self.port = port
+        self._frame = None
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._httpd = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/stream"
+
+    def publish(self, jpeg_bytes):
+        with self._cond:
+            self._frame = jpeg_bytes
+            self._seq += 1
+            self._cond.notify_all()
+
+    def _next(self, seq, timeout=1.0):
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq != seq, timeout)
+            return self._seq, self._frame
+
+    def start(self):
+        if self._httpd is not None:
+            return self
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/stream":
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Cache-Control", "no-store")
+                self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+                self.end_headers()
+                seq = -1
+                try:
+                    while True:
+                        new_seq, frame = server._next(seq)
+                        if frame is None or new_seq == seq:
+                            continue
+                        seq = new_seq
+                        self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\n")
+                        self.wfile.write(f"Content-Length: {len(frame)}\r\n\r\n".encode())
+                        self.wfile.write(frame)
+                        self.wfile.write(b"\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, name="cortex-mjpeg", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+
+_mjpeg_server = None
+_mjpeg_lock = threading.Lock()
+
+
+def get_mjpeg_server(host="127.0.0.1", port=8765):
+    """Process-wide MJPEGServer, started on first use."""
+    global _mjpeg_server
+    with _mjpeg_lock:
+        if _mjpeg_server is None:
+            _mjpeg_server = MJPEGServer(host, port).start()
+        return _mjpeg_server
@@ -1,45 +1,99 @@
 """
 voice.py — Triple-Tier Hindi TTS Engine
-Priority: ElevenLabs -> gTTS (Google, real Hindi) -> pyttsx3 (offline)
+Priority: cached audio -> ElevenLabs -> gTTS (Google, real Hindi) -> pyttsx3 (offline)
+Network tiers write their MP3 into the audio cache, so each phrase is
+synthesized once and then played straight from cached bytes.
 """
+import io
 import os
+import time
 import threading
-import tempfile
+from src.audio_cache import AudioCache
 from src.config import (
     VOICE_RATE, VOICE_VOLUME, VOICE_GENDER,
-    VOICE_RESPONSES, ELEVENLABS_API_KEY, USE_ELEVENLABS, DEFAULT_VOICE_ID
+    VOICE_RESPONSES, ELEVENLABS_API_KEY, USE_ELEVENLABS, DEFAULT_VOICE_ID,
+    VOICE_COOLDOWN_S
 )
 
-# ── Tier 1: ElevenLabs ───────────────────────────────────────
-try:
-    from elevenlabs.client import ElevenLabs
-    from elevenlabs import play as el_play
-    _elevenlabs_client = ElevenLabs(api_key=ELEVENLABS_API_KEY) if (USE_ELEVENLABS and ELEVENLABS_API_KEY) else None
-except Exception:
-    _elevenlabs_client = None
-
-# ── Tier 2: gTTS (Google TTS, best Hindi pronunciation) ──────
-try:
-    from gtts import gTTS as _gTTS
-    _gtts_available = True
-except ImportError:
-    _gtts_available = False
-
-# ── Tier 2b: Audio playback for gTTS MP3 ─────────────────────
-def _play_mp3(path: str):
-    """Play an MP3 file. Tries pygame, then playsound, then os.startfile."""
+# Engines are initialised lazily on the first utterance so that importing
+# this module (on every Streamlit rerun) costs nothing.
+_elevenlabs_client = None
+_gTTS = None
+_gtts_available = False
+_pyttsx3_engine = None
+_pyttsx3_available = False
+_engines_ready = False
+_init_lock = threading.Lock()
+
+
+def _init_engines():
+    """Import and configure all three TTS tiers once."""
+    global _elevenlabs_client, _gTTS, _gtts_available
+    global _pyttsx3_engine, _pyttsx3_available, _engines_ready
+    with _init_lock:
+        if _engines_ready:
+            return
+
+        # ── Tier 1: ElevenLabs ───────────────────────────────
+        try:
+            from elevenlabs.client import ElevenLabs
+            _elevenlabs_client = ElevenLabs(api_key=ELEVENLABS_API_KEY) if (USE_ELEVENLABS and ELEVENLABS_API_KEY) else None
+        except Exception:
+            _elevenlabs_client = None
+
+        # ── Tier 2: gTTS (Google TTS, best Hindi pronunciation) ──
+        try:
+            from gtts import gTTS
+            _gTTS = gTTS
+            _gtts_available = True
+        except ImportError:
+            _gtts_available = False
+
+        # ── Tier 3: pyttsx3 (offline) ────────────────────────
+        try:
+            import pyttsx3
+            _pyttsx3_engine = pyttsx3.init()
+            _pyttsx3_engine.setProperty('rate', VOICE_RATE)
+            _pyttsx3_engine.setProperty('volume', VOICE_VOLUME)
+            _voices = _pyttsx3_engine.getProperty('voices')
+            for _v in _voices:
+                if VOICE_GENDER.lower() in _v.name.lower() or 'india' in _v.name.lower():
+                    _pyttsx3_engine.setProperty('voice', _v.id)
+                    break
+            _pyttsx3_available = True
+        except Exception:
+            _pyttsx3_available = False
+            _pyttsx3_engine = None
+
+        _engines_ready = True
+
+
+# ── Audio output (initialised once by the voice worker) ──────
+_pygame = None
+
+
+def _init_audio():
+    """Open the pygame mixer once; it stays open for the life of the worker."""
+    global _pygame
     try:
         import pygame
         pygame.mixer.init()
-        pygame.mixer.music.load(path)
-        pygame.mixer.music.play()
-        while pygame.mixer.music.get_busy():
-            pygame.time.Clock().tick(10)
-        pygame.mixer.music.stop()
-        pygame.mixer.quit()
-        return
+        _pygame = pygame
     except Exception:
-        pass
+        _pygame = None
+
+
+def _play_mp3(data: bytes, path: str):
+    """Play MP3 bytes. Tries the open pygame mixer (from memory), then playsound / os.startfile on `path`."""
+    if _pygame is not None:
+        try:
+            _pygame.mixer.music.load(io.BytesIO(data), "mp3")
+            _pygame.mixer.music.play()
+            while _pygame.mixer.music.get_busy():
+                time.sleep(0.02)
+            return
+        except Exception:
+            pass
     try:
         from playsound import playsound
         playsound(path)
@@ -52,87 +106,218 @@ def _play_mp3(path: str):
     except Exception:
         pass
 
-# ── Tier 3: pyttsx3 (offline) ────────────────────────────────
-try:
-    import pyttsx3
-    _pyttsx3_engine = pyttsx3.init()
-    _pyttsx3_engine.setProperty('rate', VOICE_RATE)
-    _pyttsx3_engine.setProperty('volume', VOICE_VOLUME)
-    _voices = _pyttsx3_engine.getProperty('voices')
-    for _v in _voices:
-        if VOICE_GENDER.lower() in _v.name.lower() or 'india' in _v.name.lower():
-            _pyttsx3_engine.setProperty('voice', _v.id)
-            break
-    _pyttsx3_available = True
-except Exception:
-    _pyttsx3_available = False
-    _pyttsx3_engine = None
-
-_speech_lock = threading.Lock()
-_last_emotion = ""
 
+# ── Audio cache ──────────────────────────────────────────────
+_cache = AudioCache()
 
-def _speak_task(text: str):
-    """Internal: runs TTS with fallback chain. Holds speech lock to avoid overlap."""
-    with _speech_lock:
-        # Tier 1 — ElevenLabs
-        if _elevenlabs_client:
-            try:
-                audio = _elevenlabs_client.generate(
-                    text=text,
-                    voice=DEFAULT_VOICE_ID,
-                    model="eleven_multilingual_v2"
-                )
-                el_play(audio)
-                return
-            except Exception as e:
-                print(f"[Voice] ElevenLabs failed: {e}")
 
-        # Tier 2 — gTTS (Google Hindi)
-        if _gtts_available:
-            try:
-                tts = _gTTS(text=text, lang='hi', slow=False)
-                with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp:
-                    tmp_path = tmp.name
-                tts.save(tmp_path)
-                _play_mp3(tmp_path)
-                try:
-                    os.remove(tmp_path)
-                except Exception:
-                    pass
-                return
-            except Exception as e:
-                print(f"[Voice] gTTS failed: {e}")
+def _voice_id(engine: str) -> str:
+    return DEFAULT_VOICE_ID if engine == "elevenlabs" else "hi"
+
 
-        # Tier 3 — pyttsx3 (offline)
-        if _pyttsx3_available and _pyttsx3_engine:
+def _synthesize(engine: str, text: str) -> bytes:
+    """Synthesize `text` to MP3 bytes with a network engine."""
+    if engine == "elevenlabs":
+        audio = _elevenlabs_client.generate(
+            text=text,
+            voice=DEFAULT_VOICE_ID,
+            model="eleven_multilingual_v2"
+        )
+        return audio if isinstance(audio, bytes) else b"".join(audio)
+    buf = io.BytesIO()
+    _gTTS(text=text, lang='hi', slow=False).write_to_fp(buf)
+    return buf.getvalue()
+
+
+def _network_engines():
+    engines = []
+    if _elevenlabs_client:
+        engines.append("elevenlabs")
+    if _gtts_available:
+        engines.append("gtts")
+    return engines
+
+
+def warm_cache(engine=None):
+    """
+    Synthesize every VOICE_RESPONSES phrase into the cache.
+    Yields (engine, emotion, ok) per phrase; already-cached phrases are skipped.
+    """
+    _init_engines()
+    for eng in ([engine] if engine else _network_engines()):
+        for emotion, text in VOICE_RESPONSES.items():
+            if _cache.get(eng, _voice_id(eng), text) is not None:
+                yield eng, emotion, True
+                continue
             try:
-                _pyttsx3_engine.say(text)
-                _pyttsx3_engine.runAndWait()
+                _cache.put(eng, _voice_id(eng), text, _synthesize(eng, text))
+                yield eng, emotion, True
             except Exception as e:
-                print(f"[Voice] pyttsx3 failed: {e}")
+                print(f"[Voice] {eng} failed: {e}")
+                yield eng, emotion, False
 
 
-def speak(emotion: str):
+def _speak_task(text: str):
     """
-    Trigger Hindi voice feedback for an emotion.
-    Non-blocking — fires in a daemon thread.
-    Only speaks when emotion changes (debounced).
+    Internal: runs TTS with the fallback chain on the calling thread.
+    Returns (tier, synthesis_s, playback_s); tier is None if every tier failed.
     """
-    global _last_emotion
-    if emotion == _last_emotion:
-        return
-    _last_emotion = emotion
+    _init_engines()
 
-    text = VOICE_RESPONSES.get(emotion, "")
-    if not text:
-        return
+    # Tier 0 — cached audio (no network, no synthesis latency)
+    for engine in (["elevenlabs"] if USE_ELEVENLABS else []) + ["gtts"]:
+        data = _cache.get(engine, _voice_id(engine), text)
+        if data is not None:
+            t0 = time.perf_counter()
+            _play_mp3(data, _cache.path(engine, _voice_id(engine), text))
+            return "cache", 0.0, time.perf_counter() - t0
+
+    # Tier 1 — ElevenLabs, Tier 2 — gTTS (Google Hindi); result is cached
+    for engine in _network_engines():
+        try:
+            t0 = time.perf_counter()
+            data = _synthesize(engine, text)
+            t1 = time.perf_counter()
+            path = _cache.put(engine, _voice_id(engine), text, data)
+            _play_mp3(data, path)
+            return engine, t1 - t0, time.perf_counter() - t1
+        except Exception as e:
+            print(f"[Voice] {engine} failed: {e}")
+
+    # Tier 3 — pyttsx3 (offline; synthesis and playback are one call)
+    if _pyttsx3_available and _pyttsx3_engine:
+        try:
+            t0 = time.perf_counter()
+            _pyttsx3_engine.say(text)
+            _pyttsx3_engine.runAndWait()
+            return "pyttsx3", 0.0, time.perf_counter() - t0
+        except Exception as e:
+            print(f"[Voice] pyttsx3 failed: {e}")
+    return None, 0.0, 0.0
+
+
+class VoiceWorker(threading.Thread):
+    """
+    The single long-lived speaker thread.
+    Requests land in a one-slot, latest-wins mailbox: while a phrase is
+    playing, newer emotions overwrite the pending one instead of queueing,
+    so a flickering face never builds a backlog of stale announcements.
+    An emotion is not repeated within `cooldown_s` seconds.
+    """
+
+    def __init__(self, cooldown_s=VOICE_COOLDOWN_S):
+        super().__init__(name="cortex-voice", daemon=True)
+        self.cooldown_s = cooldown_s
+        self._cond = threading.Condition()
+        self._pending = None              # (emotion, submitted_at)
+        self._busy = False
+        self._last_emotion = ""
+        self._last_spoken = {}            # emotion -> monotonic time
+        self.submitted = 0
+        self.coalesced = 0
+        self.cooled_down = 0
+        self.spoken = 0
+        self.failed = 0
+        self.last_tier = None
+        self._synth_s = 0.0
+        self._play_s = 0.0
+        self._wait_s = 0.0
+
+    def _cooling(self, emotion, now):
+        return now - self._last_spoken.get(emotion, float("-inf")) < self.cooldown_s
 
-    t = threading.Thread(target=_speak_task, args=(text,), daemon=True)
-    t.start()
+    def submit(self, emotion: str) -> bool:
+        """Offer an emotion. Returns False if it was debounced or is cooling down."""
+        if not VOICE_RESPONSES.get(emotion):
+            return False
+        now = time.monotonic()
+        with self._cond:
+            if emotion == self._last_emotion:
+                return False
+            self._last_emotion = emotion
+            if self._cooling(emotion, now):
+                self.cooled_down += 1
+                return False
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = (emotion, now)
+            self.submitted += 1
+            self._cond.notify()
+        return True
+
+    def reset(self):
+        """Forget the debounce state and any pending request (e.g. session restart)."""
+        with self._cond:
+            self._last_emotion = ""
+            self._pending = None
+
+    def run(self):
+        _init_engines()
+        _init_audio()
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None)
+                emotion, submitted_at = self._pending
+                self._pending = None
+                now = time.monotonic()
+                if self._cooling(emotion, now):
+                    self.cooled_down += 1
+                    continue
+                self._last_spoken[emotion] = now
+                self._busy = True
+            self._wait_s += now - submitted_at
+            tier, synth_s, play_s = _speak_task(VOICE_RESPONSES[emotion])
+            with self._cond:
+                self._busy = False
+                self.last_tier = tier
+                if tier is None:
+                    self.failed += 1
+                else:
+                    self.spoken += 1
+                    self._synth_s += synth_s
+                    self._play_s += play_s
+
+    def stats(self):
+        with self._cond:
+            n = max(1, self.spoken)
+            return {
+                "queue_len": int(self._pending is not None),
+                "speaking": self._busy,
+                "submitted": self.submitted,
+                "coalesced": self.coalesced,
+                "cooled_down": self.cooled_down,
+                "spoken": self.spoken,
+                "failed": self.failed,
+                "last_tier": self.last_tier,
+                "queue_wait_ms": self._wait_s / max(1, self.spoken + self.failed) * 1000,
+                "synthesis_ms": self._synth_s / n * 1000,
+                "playback_ms": self._play_s / n * 1000,
+            }
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_voice_worker():
+    """The process-wide VoiceWorker, started on first use."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = VoiceWorker()
+            _worker.start()
+        return _worker
+
+
+def speak(emotion: str):
+    """
+    Trigger Hindi voice feedback for an emotion.
+    Non-blocking — hands the emotion to the voice worker.
+    Only speaks when emotion changes (debounced) and not within the cooldown.
+    """
+    get_voice_worker().submit(emotion)
 
 
 def reset_last_emotion():
     """Call this to force voice to re-speak on next detection (e.g. session restart)."""
-    global _last_emotion
-    _last_emotion = ""
+    get_voice_worker().reset()
@@ -1,17 +1,130 @@
 import cv2
+import numpy as np
+from src.config import (
+    DETECT_SCALE_FACTOR, DETECT_MIN_NEIGHBORS, DETECT_WIDTH, MIN_FACE_PX, MAX_FACE_FRAC
+)
 
 # Load once at module level — prevents reloading on every frame (critical perf fix)
 _face_cascade = cv2.CascadeClassifier(
     cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
 )
+_CASCADE_WINDOW = 24   # native window of haarcascade_frontalface_default
+
+
+def iou(a, b):
+    """Intersection-over-union of two (x, y, w, h) boxes."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    ih = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = iw * ih
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def dilate_box(box, margin, shape):
+    """Grow an (x, y, w, h) box by `margin` of its size on every side, clipped to `shape`."""
+    x, y, w, h = box
+    H, W = shape[:2]
+    x0, y0 = max(0, int(x - w * margin)), max(0, int(y - h * margin))
+    x1, y1 = min(W, int(x + w * (1 + margin))), min(H, int(y + h * (1 + margin)))
+    return (x0, y0, max(0, x1 - x0), max(0, y1 - y0))
+
+
+class FaceDetector:
+    """
+    Configurable Haar detection engine.
+    The cascade runs on a copy downscaled to about `detect_width` pixels wide,
+    and boxes are mapped back to full resolution. The smallest face is
+    `min_face_px`, raised to `min_face_frac` of frame height when that is set
+    (the live tracker does this; stills keep the plain pixel floor), and
+    `max_face_frac=None` lifts the upper limit. The downscale never shrinks
+    the smallest allowed face below the cascade's 24px window.
+    `detect(gray, rois=...)` searches only inside the given boxes, dilated
+    by `roi_margin`.
+    """
+
+    def __init__(self, scale_factor=DETECT_SCALE_FACTOR, min_neighbors=DETECT_MIN_NEIGHBORS,
+                 detect_width=DETECT_WIDTH, min_face_px=MIN_FACE_PX,
+                 min_face_frac=0.0, max_face_frac=MAX_FACE_FRAC, roi_margin=0.5):
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.detect_width = detect_width
+        self.min_face_px = min_face_px
+        self.min_face_frac = min_face_frac
+        self.max_face_frac = max_face_frac
+        self.roi_margin = roi_margin
+
+    def face_size_budget(self, shape):
+        """(min_px, max_px) face side at full resolution for a frame of `shape`; max_px is None when unbounded."""
+        H = shape[0]
+        min_px = max(self.min_face_px, int(H * self.min_face_frac))
+        if not self.max_face_frac:
+            return min_px, None
+        max_px = max(min_px + 1, int(H * self.max_face_frac))
+        return min_px, max_px
+
+    def downscale(self, shape):
+        """Factor (<= 1) applied before running the cascade on a frame of `shape`."""
+        W = shape[1]
+        min_px, _ = self.face_size_budget(shape)
+        factor = self.detect_width / W if self.detect_width else 1.0
+        return min(1.0, max(factor, _CASCADE_WINDOW / min_px))
+
+    def _run(self, gray, factor, min_px, max_px):
+        if factor < 1.0:
+            gray = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+        lo = max(1, int(min_px * factor))
+        if min(gray.shape[:2]) < lo:
+            return np.empty((0, 4), dtype="int32")
+        limits = {"minSize": (lo, lo)}
+        if max_px is not None:
+            hi = max(lo + 1, int(max_px * factor))
+            limits["maxSize"] = (hi, hi)
+        boxes = _face_cascade.detectMultiScale(
+            gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            **limits
+        )
+        if len(boxes) == 0:
+            return np.empty((0, 4), dtype="int32")
+        return np.round(np.asarray(boxes, dtype="float32") / factor).astype("int32")
+
+    def detect(self, gray, rois=None):
+        """
+        Detect faces in a grayscale frame. Returns an (N, 4) int32 array of
+        full-resolution (x, y, w, h) boxes. With `rois`, only the dilated
+        regions are searched and overlapping hits are merged.
+        """
+        factor = self.downscale(gray.shape)
+        min_px, max_px = self.face_size_budget(gray.shape)
+        if rois is None:
+            return self._run(gray, factor, min_px, max_px)
+
+        found = []
+        for roi in rois:
+            rx, ry, rw, rh = dilate_box(roi, self.roi_margin, gray.shape)
+            if rw == 0 or rh == 0:
+                continue
+            for x, y, w, h in self._run(gray[ry:ry+rh, rx:rx+rw], factor, min_px, max_px):
+                box = (int(x) + rx, int(y) + ry, int(w), int(h))
+                if all(iou(box, other) < 0.5 for other in found):
+                    found.append(box)
+        return np.array(found, dtype="int32").reshape(-1, 4)
+
+
+# Stills, batch and the server: full resolution, any face from MIN_FACE_PX up to the whole image
+_detector = FaceDetector(detect_width=None, max_face_frac=None)
+
+
+def detect_faces(gray, rois=None):
+    """Run the default FaceDetector on an already-grayscale image. Returns (N, 4) boxes."""
+    return _detector.detect(gray, rois)
+
 
 def get_faces(frame):
     """Convert frame to grayscale and detect faces. Returns (gray, faces)."""
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    faces = _face_cascade.detectMultiScale(
-        gray,
-        scaleFactor=1.3,
-        minNeighbors=5,
-        minSize=(30, 30)
-    )
+    faces = detect_faces(gray)
     return gray, faces